@@ -1,6 +1,7 @@
 import streamlit as st
 from src.eval.logging import init_session
-from src.ui.sidebar import render_sidebar
+from src.risk.snapshot import get_risk_snapshot
+from src.ui.sidebar import render_sidebar, render_score_preview
 from src.ui.dashboard import render_dashboard
 from src.ui.explainability import render_explainability
 from src.ui.evaluation import render_evaluation
@@ -16,12 +17,14 @@ st.caption(
 init_session()
 
 state = render_sidebar()
+render_score_preview(state)
+snapshot = get_risk_snapshot(state)
 
 tab1, tab2, tab3, tab4 = st.tabs(["Dashboard", "Explainability", "Evaluation & Export", "Protocol & Figures"])
 with tab1:
-    render_dashboard(state)
+    render_dashboard(state, snapshot)
 with tab2:
-    render_explainability(state)
+    render_explainability(state, snapshot)
 with tab3:
     render_evaluation(state)
 with tab4:
@@ -0,0 +1,241 @@
+import json
+import os
+
+import pandas as pd
+
+from src.eval.sinks import read_log_file, read_snapshot_file
+
+RISK_LEVEL_ORDER = ["LOW", "MEDIUM", "HIGH"]
+# Exported logs of one session directory; logs.json is preferred when both exist.
+EXPORT_FILES = ("logs.json", "logs.csv")
+SNAPSHOT_EXPORT_FILES = ("snapshots.json", "snapshots.csv")
+# An event logged both in a sink file and in an export of the same session counts once.
+EVENT_KEY = ["session_id", "timestamp_utc", "event"]
+
+
+def _read_export(path: str) -> list:
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    df = pd.read_csv(path)
+    for col in ("weights", "sus_items"):
+        if col in df:
+            df[col] = df[col].map(lambda v: json.loads(v) if isinstance(v, str) else v)
+    return df.to_dict("records")
+
+
+def _sink_files(root: str):
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.endswith(".sqlite") or (name.endswith(".jsonl") and not name.endswith(".snapshots.jsonl")):
+                yield os.path.join(dirpath, name)
+
+
+def _export_files(root: str):
+    for dirpath, _, filenames in os.walk(root):
+        for name in EXPORT_FILES:
+            if name in filenames:
+                yield os.path.join(dirpath, name)
+                break
+
+
+class StudyLogs:
+    """All study events under a directory: durable sink files and exported logs.
+
+    refresh() scans `root` recursively and reads only what is new: sink files
+    (<session>.jsonl / .sqlite, see src.eval.sinks) are append-only, so each is read from
+    the position reached last time; exported logs.json / logs.csv files (flat or
+    normalized, with snapshots.json / snapshots.csv next to them) are re-read only when
+    their size or mtime changes. Each file's events are kept as one DataFrame chunk, and
+    the analyses below run as pandas operations over their concatenation, memoized until
+    the next refresh that finds something new.
+    """
+
+    def __init__(self, root: str):
+        self.root = str(root)
+        self._sink_positions = {}
+        self._export_stamps = {}
+        self._chunks = {}
+        self._snapshots = {}
+        self._derived = {}
+
+    def refresh(self) -> "StudyLogs":
+        """Reads sink records and export files that appeared or changed since the last refresh."""
+        changed = False
+        for path in _sink_files(self.root):
+            position, snapshot_position = self._sink_positions.get(path, (0, 0))
+            snapshots, snapshot_position = read_snapshot_file(path, snapshot_position)
+            events, position = read_log_file(path, position)
+            self._snapshots.update(snapshots)
+            if events:
+                self._chunks.setdefault(path, []).append(pd.DataFrame(events))
+            changed |= bool(events or snapshots)
+            self._sink_positions[path] = (position, snapshot_position)
+        for path in _export_files(self.root):
+            stat = os.stat(path)
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            if self._export_stamps.get(path) == stamp:
+                continue
+            directory = os.path.dirname(path)
+            for name in SNAPSHOT_EXPORT_FILES:
+                snapshot_path = os.path.join(directory, name)
+                if os.path.exists(snapshot_path):
+                    for row in _read_export(snapshot_path):
+                        ref = row.pop("snapshot_ref")
+                        self._snapshots[ref] = row
+                    break
+            # Exports are rewritten as a whole, so they replace what was read before.
+            self._chunks[path] = [pd.DataFrame(_read_export(path))]
+            self._export_stamps[path] = stamp
+            changed = True
+        if changed:
+            self._derived = {}
+        return self
+
+    def derived(self, key, factory):
+        """Memoizes `factory()` under `key` until the next refresh that finds new events."""
+        if key not in self._derived:
+            self._derived[key] = factory()
+        return self._derived[key]
+
+    def events(self) -> pd.DataFrame:
+        """One row per distinct event, snapshot fields joined in, sorted by time."""
+        return self.derived("events", self._build_events)
+
+    def _build_events(self) -> pd.DataFrame:
+        chunks = [c for chunks in self._chunks.values() for c in chunks]
+        if not chunks:
+            return pd.DataFrame(columns=EVENT_KEY)
+        df = pd.concat(chunks, ignore_index=True)
+        df = df.drop_duplicates(subset=[c for c in EVENT_KEY if c in df], ignore_index=True)
+        if "snapshot_ref" in df and self._snapshots:
+            snapshots = pd.DataFrame.from_dict(self._snapshots, orient="index")
+            for col in snapshots.columns:
+                joined = df["snapshot_ref"].map(snapshots[col])
+                df[col] = df[col].where(df[col].notna(), joined) if col in df else joined
+        df["timestamp"] = pd.to_datetime(df["timestamp_utc"], utc=True, format="ISO8601")
+        return df.sort_values("timestamp", kind="stable", ignore_index=True)
+
+    def decisions(self) -> pd.DataFrame:
+        """decision_submit events with an `accepted` flag (decision == "ACCEPT")."""
+        def build():
+            df = self.events()
+            if "event" not in df or "decision" not in df:
+                return df.iloc[:0]
+            d = df[df["event"] == "decision_submit"].copy()
+            d["accepted"] = (d["decision"] == "ACCEPT").astype(float)
+            return d
+        return self.derived("decisions", build)
+
+    def task_times(self) -> pd.DataFrame:
+        """task_timer_stop events paired with the latest earlier start of the same session and task.
+
+        Returns:
+            One row per stop with "start_utc", "stop_utc", the logged "elapsed_sec" and the
+            snapshot fields of the start event ("risk_level", "risk_score") when present.
+            "start_utc" is NaT for a stop without a start.
+        """
+        return self.derived("task_times", self._build_task_times)
+
+    def _build_task_times(self) -> pd.DataFrame:
+        df = self.events()
+        by = ["session_id", "task_id"]
+        if any(col not in df for col in ["event", "elapsed_sec"] + by):
+            return pd.DataFrame()
+        start_cols = [c for c in ("risk_level", "risk_score") if c in df]
+        starts = df.loc[df["event"] == "task_timer_start", by + ["timestamp"] + start_cols]
+        stops = df.loc[df["event"] == "task_timer_stop", by + ["participant_id", "condition", "timestamp", "elapsed_sec"]]
+        starts = starts.assign(start_utc=starts["timestamp"])
+        paired = pd.merge_asof(stops, starts, on="timestamp", by=by, direction="backward")
+        return paired.rename(columns={"timestamp": "stop_utc"})
+
+    def sus(self) -> pd.DataFrame:
+        df = self.events()
+        return df[df["event"] == "sus_submit"] if "event" in df else df
+
+    def _summary(self, keys: list) -> pd.DataFrame:
+        events, decisions, sus, times = self.events(), self.decisions(), self.sus(), self.task_times()
+        if decisions.empty and sus.empty and times.empty:
+            return pd.DataFrame()
+        parts = [events.groupby(keys).agg(participants=("participant_id", "nunique"), sessions=("session_id", "nunique"))]
+        if not decisions.empty:
+            parts.append(decisions.groupby(keys).agg(
+                decisions=("decision", "size"),
+                acceptance_rate=("accepted", "mean"),
+                trust_mean=("trust_1_7", "mean"),
+                trust_sd=("trust_1_7", "std"),
+                confidence_mean=("confidence_1_7", "mean"),
+                confidence_sd=("confidence_1_7", "std"),
+            ))
+        if not sus.empty:
+            parts.append(sus.groupby(keys).agg(sus_n=("sus_score", "size"), sus_mean=("sus_score", "mean"), sus_sd=("sus_score", "std")))
+        if not times.empty:
+            parts.append(times.groupby(keys).agg(
+                timed_tasks=("elapsed_sec", "size"),
+                task_time_mean=("elapsed_sec", "mean"),
+                task_time_median=("elapsed_sec", "median"),
+            ))
+        return pd.concat(parts, axis=1).dropna(how="all", subset=[c for p in parts[1:] for c in p.columns])
+
+    def condition_summary(self) -> pd.DataFrame:
+        """Per condition: participants, acceptance rate, trust/confidence, SUS and task times."""
+        return self.derived("condition_summary", lambda: self._summary(["condition"]))
+
+    def task_summary(self) -> pd.DataFrame:
+        """The condition summary broken down by task_id."""
+        return self.derived("task_summary", lambda: self._summary(["condition", "task_id"]))
+
+    def trust_calibration(self) -> dict:
+        """How trust and acceptance track the risk shown, per condition.
+
+        Returns:
+            Dict with
+            - "by_level": per condition and risk level, decisions, mean trust and confidence,
+              and acceptance rate;
+            - "by_condition": per condition, the Spearman correlation of trust with the
+              risk score ("trust_risk_corr"), of acceptance with the risk score
+              ("accept_risk_corr"), the point-biserial correlation of trust with acceptance
+              ("trust_accept_corr") and the mean trust of accepted minus not accepted
+              decisions ("trust_gap").
+        """
+        return self.derived("trust_calibration", self._build_trust_calibration)
+
+    def _build_trust_calibration(self) -> dict:
+        d = self.decisions()
+        if d.empty:
+            return {"by_level": pd.DataFrame(), "by_condition": pd.DataFrame()}
+        d = d.assign(risk_level=pd.Categorical(d["risk_level"], RISK_LEVEL_ORDER, ordered=True))
+        by_level = d.groupby(["condition", "risk_level"], observed=True).agg(
+            decisions=("decision", "size"),
+            trust_mean=("trust_1_7", "mean"),
+            confidence_mean=("confidence_1_7", "mean"),
+            acceptance_rate=("accepted", "mean"),
+        )
+        # Spearman = Pearson on within-condition ranks.
+        cols = ["trust_1_7", "risk_score", "accepted"]
+        ranks = d.groupby("condition")[cols].rank().groupby(d["condition"])
+        values = d.groupby("condition")[cols]
+        trust = d["trust_1_7"].astype(float)
+        by_condition = pd.DataFrame({
+            "trust_risk_corr": ranks.apply(lambda g: g["trust_1_7"].corr(g["risk_score"])),
+            "accept_risk_corr": ranks.apply(lambda g: g["accepted"].corr(g["risk_score"])),
+            "trust_accept_corr": values.apply(lambda g: g["trust_1_7"].corr(g["accepted"])),
+            "trust_gap": trust.where(d["accepted"] == 1).groupby(d["condition"]).mean()
+            - trust.where(d["accepted"] == 0).groupby(d["condition"]).mean(),
+        })
+        return {"by_level": by_level, "by_condition": by_condition}
+
+    def report(self) -> dict:
+        """Everything the README's evaluation section asks for, as DataFrames."""
+        calibration = self.trust_calibration()
+        return {
+            "conditions": self.condition_summary(),
+            "tasks": self.task_summary(),
+            "trust_by_level": calibration["by_level"],
+            "trust_calibration": calibration["by_condition"],
+        }
+
+
+def study_report(root: str) -> dict:
+    """One-shot StudyLogs(root).refresh().report()."""
+    return StudyLogs(root).refresh().report()
@@ -0,0 +1,202 @@
+import csv
+import json
+import math
+import os
+
+EXPORT_MODES = ("flat", "normalized")
+# Snapshot fields that an event type logged after the others before snapshots were stored
+# by reference (decision_submit had the weights last); rehydration puts them back there.
+TRAILING_SNAPSHOT_FIELDS = {"decision_submit": ("weights",)}
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _kind(value) -> str:
+    if _is_missing(value):
+        return "missing"
+    if isinstance(value, bool):
+        return "other"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "other"
+
+
+def _float_columns(kinds: dict) -> set:
+    # Columns pandas would store as float64: integers mixed with floats or missing values
+    # (and nothing else), whose integers it then writes as 4.0.
+    return {c for c, k in kinds.items() if "int" in k and k & {"float", "missing"} and "other" not in k}
+
+
+def _csv_cell(value, as_float: bool = False):
+    # Formats a value the way DataFrame.to_csv writes it.
+    if _is_missing(value):
+        return ""
+    if isinstance(value, float) or (as_float and _kind(value) == "int"):
+        return repr(float(value))
+    return value
+
+
+def _columns(rows: list, columns: list = None) -> list:
+    # Union of keys in first appearance order (as pd.DataFrame(rows) would give).
+    columns = list(columns or [])
+    known = set(columns)
+    columns.extend(k for r in rows for k in r if not (k in known or known.add(k)))
+    return columns
+
+
+def _json_items(rows: list) -> bytes:
+    return ",\n".join(
+        "  " + json.dumps(r, indent=2, default=str).replace("\n", "\n  ") for r in rows
+    ).encode("utf-8")
+
+
+def rehydrate(event: dict, snapshots: dict) -> dict:
+    """The flat form of an event: its snapshot_ref replaced, in place, by the snapshot fields.
+
+    Fields in TRAILING_SNAPSHOT_FIELDS for the event type go after the other snapshot
+    fields, so the keys come in the order the event had when it carried them inline.
+    """
+    ref = event.get("snapshot_ref")
+    payload = snapshots.get(ref) if ref is not None else None
+    if payload is None:
+        return event
+    trailing = TRAILING_SNAPSHOT_FIELDS.get(event.get("event"), ())
+    if trailing:
+        payload = {
+            **{k: v for k, v in payload.items() if k not in trailing},
+            **{k: payload[k] for k in trailing if k in payload},
+        }
+    flat = {}
+    for k, v in event.items():
+        if k == "snapshot_ref":
+            flat.update(payload)
+        else:
+            flat[k] = v
+    return flat
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class ExportBuffer:
+    """CSV and JSON exports of an event log, kept on disk and extended as events are appended.
+
+    The exports are files next to the sink's log (<session>.export-<mode>.csv / .json),
+    so a session holds only positions and column names in memory. refresh() reads the
+    events written since the last call (EventSink.read_from, which flushes the sink) and
+    appends their rows to the CSV file and their objects to the JSON array file, so an
+    export costs O(new events) rather than O(log); call it only when an export is
+    requested. The CSV is what pd.DataFrame(logs).to_csv(index=False) would write: the
+    columns are the union of event keys in first appearance order, and integers are written
+    as floats (4.0) in columns pandas would store as float64 (integers mixed with floats or
+    missing values). When a new key appears or a column changes between int and float, the
+    CSV is rewritten once from the sink.
+
+    mode="flat" rehydrates snapshot_refs to the snapshot fields, so the output has the
+    same shape as when every event carried its snapshot (the JSON is the same as
+    json.dumps(logs, indent=2)). mode="normalized" keeps the refs; the snapshots are
+    exported separately by write_snapshot_tables().
+    """
+
+    def __init__(self, sink, mode: str = "flat"):
+        if mode not in EXPORT_MODES:
+            raise ValueError(f"mode must be one of {EXPORT_MODES}, got {mode!r}")
+        self.sink = sink
+        self.mode = mode
+        self.count = 0
+        self.columns = []
+        self._kinds = {}  # column -> kinds of value seen ("int", "float", "missing", "other")
+        self._float_columns = set()
+        self._position = 0
+        stem = os.path.splitext(sink.path)[0]
+        self.csv_path = f"{stem}.export-{mode}.csv"
+        self.json_path = f"{stem}.export-{mode}.json"
+        self.snapshots_csv_path = f"{stem}.export-snapshots.csv"
+        self.snapshots_json_path = f"{stem}.export-snapshots.json"
+        with open(self.csv_path, "wb"):
+            pass
+        with open(self.json_path, "wb") as f:
+            f.write(b"[]")
+
+    def _shape(self, events: list) -> list:
+        if self.mode == "normalized":
+            return events
+        refs = {e["snapshot_ref"] for e in events if e.get("snapshot_ref") is not None}
+        snapshots = {ref: self.sink.cached_snapshot(ref) for ref in refs}
+        if any(payload is None for payload in snapshots.values()):
+            # Evicted from the sink's cache: read them back from the log.
+            snapshots = self.sink.read_snapshots()
+        return [rehydrate(e, snapshots) for e in events]
+
+    def _write_rows(self, f, events: list):
+        csv.writer(f, lineterminator="\n").writerows([
+            [_csv_cell(e.get(c), c in self._float_columns) for c in self.columns] for e in events
+        ])
+
+    def _rewrite_csv(self):
+        tmp = self.csv_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(self.columns)
+            self._write_rows(f, self._shape(self.sink.read_all()))
+        os.replace(tmp, self.csv_path)
+
+    def refresh(self) -> "ExportBuffer":
+        """Appends events written to the sink since the last refresh (flushing the sink first)."""
+        events, self._position = self.sink.read_from(self._position)
+        if not events:
+            return self
+        events = self._shape(events)
+        columns = _columns(events, self.columns)
+        for c in columns:
+            # A column new in these events was missing from all earlier rows.
+            kinds = self._kinds.setdefault(c, {"missing"} if self.count else set())
+            kinds.update(_kind(e.get(c)) for e in events)
+        float_columns = _float_columns(self._kinds)
+        if len(columns) > len(self.columns) or float_columns != self._float_columns:
+            self.columns = columns
+            self._float_columns = float_columns
+            self._rewrite_csv()
+        else:
+            with open(self.csv_path, "a", encoding="utf-8", newline="") as f:
+                self._write_rows(f, events)
+
+        with open(self.json_path, "r+b") as f:
+            # Replace the closing "]" (or "\n]") by the new items and close the array again.
+            f.seek(-1 if self.count == 0 else -2, os.SEEK_END)
+            f.write((b"\n" if self.count == 0 else b",\n") + _json_items(events) + b"\n]")
+            f.truncate()
+        self.count += len(events)
+        return self
+
+    def csv_bytes(self) -> bytes:
+        return _read_bytes(self.csv_path)
+
+    def json_bytes(self) -> bytes:
+        return _read_bytes(self.json_path)
+
+    def write_snapshot_tables(self) -> int:
+        """Writes the snapshots table (one row per distinct snapshot, keyed by snapshot_ref)
+        next to the normalized export; returns the number of snapshots."""
+        rows = [{"snapshot_ref": ref, **payload} for ref, payload in self.sink.read_snapshots().items()]
+        columns = _columns(rows)
+        float_columns = _float_columns({c: {_kind(r.get(c)) for r in rows} for c in columns})
+        with open(self.snapshots_csv_path, "w", encoding="utf-8", newline="") as f:
+            if rows:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(columns)
+                writer.writerows([[_csv_cell(r.get(c), c in float_columns) for c in columns] for r in rows])
+        with open(self.snapshots_json_path, "wb") as f:
+            f.write(json.dumps(rows, indent=2, default=str).encode("utf-8"))
+        return len(rows)
+
+    def snapshots_csv_bytes(self) -> bytes:
+        return _read_bytes(self.snapshots_csv_path)
+
+    def snapshots_json_bytes(self) -> bytes:
+        return _read_bytes(self.snapshots_json_path)
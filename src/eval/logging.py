@@ -3,15 +3,27 @@ import uuid
 import pandas as pd
 import streamlit as st
 
+from src.eval.export import ExportBuffer, rehydrate
+from src.eval.sinks import acquire_event_sink
 from src.utils.time_utils import now_iso
 
+# Durable per-session event logs: "jsonl" or "sqlite", one file per session in EVENT_LOG_DIR.
+EVENT_LOG_BACKEND = "jsonl"
+EVENT_LOG_DIR = "artifacts/event_logs"
+EVENT_LOG_FSYNC = "interval"
+
 def init_session():
     if "session_id" not in st.session_state:
         st.session_state.session_id = str(uuid.uuid4())
     if "start_ts" not in st.session_state:
         st.session_state.start_ts = time.time()
-    if "logs" not in st.session_state:
-        st.session_state.logs = []
+    if "event_sink" not in st.session_state:
+        # The lease lives and dies with the session state: when Streamlit discards the
+        # session, the lease is collected and the sink's thread and file are closed.
+        st.session_state.event_sink_lease = acquire_event_sink(
+            EVENT_LOG_BACKEND, EVENT_LOG_DIR, st.session_state.session_id, fsync=EVENT_LOG_FSYNC
+        )
+        st.session_state.event_sink = st.session_state.event_sink_lease.sink
     if "condition" not in st.session_state:
         st.session_state.condition = "EXPLANATION_ON"
 
@@ -19,23 +31,61 @@ def log_event(event: dict):
     e = dict(event)
     e["timestamp_utc"] = now_iso()
     e["session_id"] = st.session_state.session_id
-    st.session_state.logs.append(e)
+    st.session_state.event_sink.append(e)
+
+def store_snapshot(snapshot: dict) -> str:
+    """Stores a snapshot once per distinct content; events reference it by the returned snapshot_ref."""
+    return st.session_state.event_sink.append_snapshot(snapshot)
+
+def read_logs() -> list:
+    """All events of this session, read back from the sink, with snapshots rehydrated."""
+    sink = st.session_state.event_sink
+    snapshots = sink.read_snapshots()
+    return [rehydrate(e, snapshots) for e in sink.read_all()]
+
+def recent_logs(flat: bool = True) -> list:
+    """The last events of this session kept in memory (bounded), without touching the sink.
+
+    With flat=True, snapshot_refs are rehydrated from the sink's recent-snapshot cache.
+    """
+    sink = st.session_state.event_sink
+    tail = list(sink.tail)
+    if not flat:
+        return tail
+    refs = {e["snapshot_ref"] for e in tail if e.get("snapshot_ref") is not None}
+    snapshots = {ref: sink.cached_snapshot(ref) for ref in refs}
+    return [rehydrate(e, snapshots) for e in tail]
+
+def export_buffer(mode: str = "flat") -> ExportBuffer:
+    """This session's incremental CSV/JSON export files (call .refresh() to catch up)."""
+    if "export_buffers" not in st.session_state:
+        st.session_state.export_buffers = {}
+    buffers = st.session_state.export_buffers
+    if mode not in buffers:
+        buffers[mode] = ExportBuffer(st.session_state.event_sink, mode=mode)
+    return buffers[mode]
 
 def logs_to_df():
-    return pd.DataFrame(st.session_state.logs) if st.session_state.logs else pd.DataFrame()
+    logs = read_logs()
+    return pd.DataFrame(logs) if logs else pd.DataFrame()
 
-def export_logs(artifacts_dir: str):
+def export_logs(artifacts_dir: str, mode: str = "flat"):
+    """Writes logs.csv/logs.json; the normalized mode also writes snapshots.csv/snapshots.json."""
+    import shutil
     from pathlib import Path
-    import json
 
     export_dir = Path(artifacts_dir)
     export_dir.mkdir(parents=True, exist_ok=True)
 
-    df_logs = logs_to_df()
+    buffer = export_buffer(mode).refresh()
     csv_path = export_dir / "logs.csv"
     json_path = export_dir / "logs.json"
 
-    df_logs.to_csv(csv_path, index=False)
-    json_path.write_text(json.dumps(st.session_state.logs, indent=2), encoding="utf-8")
+    shutil.copyfile(buffer.csv_path, csv_path)
+    shutil.copyfile(buffer.json_path, json_path)
+    if mode == "normalized":
+        buffer.write_snapshot_tables()
+        shutil.copyfile(buffer.snapshots_csv_path, export_dir / "snapshots.csv")
+        shutil.copyfile(buffer.snapshots_json_path, export_dir / "snapshots.json")
 
     return csv_path, json_path
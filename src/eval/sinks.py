@@ -0,0 +1,420 @@
+import abc
+import atexit
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+FSYNC_POLICIES = ("always", "interval", "never")
+SINK_BACKENDS = ("jsonl", "sqlite")
+# Events kept in memory per session (the rest live only in the sink).
+DEFAULT_TAIL_SIZE = 200
+# Recent snapshot payloads kept in memory per sink, to skip rewriting them and to rehydrate the tail.
+SNAPSHOT_CACHE_SIZE = 256
+
+_FLUSH = object()
+_STOP = object()
+# Every sink not yet closed (closed at exit), and the shared sinks handed out by acquire_event_sink.
+_open_sinks = set()
+_shared_sinks = {}
+_shared_sinks_lock = threading.Lock()
+
+
+def _dumps(event: dict) -> str:
+    # default=str keeps numpy scalars, timestamps etc. from failing a study log write.
+    return json.dumps(event, default=str, ensure_ascii=False)
+
+
+def snapshot_ref(snapshot: dict) -> str:
+    """Stable content hash of a snapshot payload (key order does not matter)."""
+    canonical = json.dumps(snapshot, default=str, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _Snapshot:
+    __slots__ = ("ref", "payload")
+
+    def __init__(self, ref: str, payload: dict):
+        self.ref = ref
+        self.payload = payload
+
+
+def _open_append(path: str):
+    f = open(path, "a", encoding="utf-8")
+    if f.tell() > 0:
+        with open(path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                # Terminate a line cut off by a crash so the next record starts cleanly.
+                f.write("\n")
+    return f
+
+
+def _snapshot_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".snapshots.jsonl"
+
+
+def _read_lines(path: str, position: int):
+    # Positions are byte offsets; only complete lines are consumed.
+    if not os.path.exists(path):
+        return [], position
+    with open(path, "rb") as f:
+        f.seek(position)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records, position + end
+
+
+def _sqlite_rows(path: str, sql: str, position):
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql, (position,)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def read_log_file(path: str, position=0):
+    """Events of a sink file (.jsonl or .sqlite) written after `position`, and the next position.
+
+    Lets other processes read a session log without its EventSink (e.g. for analysis).
+    """
+    if str(path).endswith(".sqlite"):
+        # Positions are row ids.
+        rows = _sqlite_rows(path, "SELECT id, payload FROM events WHERE id > ? ORDER BY id", position)
+        return [json.loads(payload) for _, payload in rows], (rows[-1][0] if rows else position)
+    return _read_lines(path, position)
+
+
+def read_snapshot_file(path: str, position=0):
+    """Snapshots stored with a sink file after `position`, as {snapshot_ref: payload}, and the next position."""
+    if str(path).endswith(".sqlite"):
+        rows = _sqlite_rows(path, "SELECT rowid, ref, payload FROM snapshots WHERE rowid > ? ORDER BY rowid", position)
+        return {ref: json.loads(payload) for _, ref, payload in rows}, (rows[-1][0] if rows else position)
+    records, position = _read_lines(_snapshot_path(path), position)
+    return {r["snapshot_ref"]: r["snapshot"] for r in records}, position
+
+
+class EventSink(abc.ABC):
+    """Append-only event log written by a background thread.
+
+    append() only records the event in a bounded in-memory tail and enqueues it; the
+    writer thread collects up to `batch_size` events (waiting at most `flush_interval`
+    seconds for more) and writes them in one batch. `fsync` controls durability:
+
+    - "always": every batch is fsynced before the next is taken.
+    - "interval": at most one fsync per `fsync_interval` seconds, and once the log goes
+      idle, so a crash loses at most that much.
+    - "never": leave it to the OS.
+
+    Snapshots (the portfolio/model state events refer to) are content-addressed:
+    append_snapshot() stores each distinct payload under its snapshot_ref, and events
+    carry only the ref. The last `snapshot_cache_size` payloads are kept in memory, so
+    a repeated snapshot is not written again; one evicted and seen again is rewritten
+    (an INSERT OR IGNORE in SQLite, a duplicate line in JSONL that readers collapse).
+
+    flush() blocks until everything appended so far is written (not necessarily
+    fsynced); the read methods flush first, so they always see the caller's own events.
+    Subclasses implement _open, _write_batch, _sync and _close.
+    """
+
+    def __init__(self, path: str, fsync: str = "interval", fsync_interval: float = 1.0,
+                 batch_size: int = 64, flush_interval: float = 0.05, tail_size: int = DEFAULT_TAIL_SIZE,
+                 snapshot_cache_size: int = SNAPSHOT_CACHE_SIZE):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = str(path)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.tail = deque(maxlen=tail_size)
+        self.count = 0
+        self.snapshot_cache_size = snapshot_cache_size
+        self._snapshots = OrderedDict()
+        self.error = None
+        self._queue = queue.Queue()
+        self._closed = False
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-writer", daemon=True)
+        self._thread.start()
+        _open_sinks.add(self)
+
+    def append(self, event: dict):
+        if self._closed:
+            raise RuntimeError(f"Event sink {self.path} is closed")
+        self.tail.append(event)
+        self.count += 1
+        self._queue.put(event)
+
+    def append_snapshot(self, payload: dict) -> str:
+        """Stores `payload` unless an identical one was stored recently; returns its snapshot_ref."""
+        ref = snapshot_ref(payload)
+        if ref in self._snapshots:
+            self._snapshots.move_to_end(ref)
+            return ref
+        if self._closed:
+            raise RuntimeError(f"Event sink {self.path} is closed")
+        self._snapshots[ref] = payload
+        while len(self._snapshots) > self.snapshot_cache_size:
+            self._snapshots.popitem(last=False)
+        self._queue.put(_Snapshot(ref, payload))
+        return ref
+
+    def cached_snapshot(self, ref: str):
+        """The payload of a recently stored snapshot, without reading the sink; None if evicted."""
+        return self._snapshots.get(ref)
+
+    def flush(self):
+        if not self._closed:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+            _open_sinks.discard(self)
+
+    def read_from(self, position=0):
+        """Events written after `position` and the position to continue from.
+
+        Start with position 0; pass the returned position back to read only new events.
+        """
+        self.flush()
+        return read_log_file(self.path, position)
+
+    def read_all(self) -> list:
+        return self.read_from(0)[0]
+
+    def read_snapshots_from(self, position=0):
+        """Snapshots stored after `position`, as {snapshot_ref: payload}, and the next position."""
+        self.flush()
+        return read_snapshot_file(self.path, position)
+
+    def read_snapshots(self) -> dict:
+        return self.read_snapshots_from(0)[0]
+
+    def _maybe_sync(self, force: bool = False):
+        if not self._dirty or self.fsync == "never":
+            return
+        now = time.monotonic()
+        if force or self.fsync == "always" or now - self._last_sync >= self.fsync_interval:
+            self._sync()
+            self._dirty = False
+            self._last_sync = now
+
+    def _run(self):
+        try:
+            self._open()
+        except Exception as e:
+            self.error = e
+        stop = False
+        while not stop:
+            timeout = self.fsync_interval if self._dirty and self.fsync == "interval" else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._guarded(self._maybe_sync, True)
+                continue
+            items = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size and items[-1] is not _FLUSH and items[-1] is not _STOP:
+                try:
+                    items.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop = items[-1] is _STOP
+            events = [e for e in items if isinstance(e, dict)]
+            snapshots = [e for e in items if isinstance(e, _Snapshot)]
+            if (events or snapshots) and self.error is None:
+                # Snapshots first, so a reader never sees a ref before its payload.
+                self._guarded(self._write_batch, events, snapshots)
+                self._dirty = True
+            self._guarded(self._maybe_sync, stop)
+            for _ in items:
+                self._queue.task_done()
+        self._guarded(self._close)
+
+    def _guarded(self, fn, *args):
+        # A failing disk must not kill the writer (flush() would block forever); the
+        # error is kept on the sink for the UI to surface.
+        try:
+            fn(*args)
+        except Exception as e:
+            self.error = e
+
+    @abc.abstractmethod
+    def _open(self):
+        """Opens the log (in the writer thread)."""
+
+    @abc.abstractmethod
+    def _write_batch(self, events: list, snapshots: list):
+        """Writes snapshots, then events, without fsyncing."""
+
+    @abc.abstractmethod
+    def _sync(self):
+        """Makes everything written so far durable."""
+
+    @abc.abstractmethod
+    def _close(self):
+        """Closes the log (in the writer thread)."""
+
+
+class JsonlSink(EventSink):
+    """One JSON object per line, appended to `path`; snapshots go to <path>.snapshots.jsonl.
+
+    A crash can leave a partial last line; readers skip lines that do not parse.
+    """
+
+    @property
+    def snapshot_path(self) -> str:
+        return _snapshot_path(self.path)
+
+    def _open(self):
+        self._file = _open_append(self.path)
+        self._snapshot_file = _open_append(self.snapshot_path)
+
+    def _write_batch(self, events: list, snapshots: list):
+        if snapshots:
+            self._snapshot_file.write("".join(
+                _dumps({"snapshot_ref": s.ref, "snapshot": s.payload}) + "\n" for s in snapshots
+            ))
+            self._snapshot_file.flush()
+        if events:
+            self._file.write("".join(_dumps(e) + "\n" for e in events))
+            self._file.flush()
+
+    def _sync(self):
+        os.fsync(self._snapshot_file.fileno())
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._snapshot_file.close()
+        self._file.close()
+
+
+class SqliteSink(EventSink):
+    """Events in an embedded SQLite table (WAL mode), one row per event, and snapshots in
+    a `snapshots` table keyed by snapshot_ref.
+
+    The fsync policy maps to PRAGMA synchronous (always: FULL, interval: NORMAL with an
+    explicit WAL checkpoint per interval, never: OFF).
+    """
+
+    _SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+
+    def _open(self):
+        # The connection belongs to the writer thread; readers open their own.
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={self._SYNCHRONOUS[self.fsync]}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp_utc TEXT, session_id TEXT, event TEXT, payload TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "ref TEXT PRIMARY KEY, payload TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _write_batch(self, events: list, snapshots: list):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO snapshots (ref, payload) VALUES (?, ?)",
+                [(s.ref, _dumps(s.payload)) for s in snapshots],
+            )
+            self._conn.executemany(
+                "INSERT INTO events (timestamp_utc, session_id, event, payload) VALUES (?, ?, ?, ?)",
+                [(e.get("timestamp_utc"), e.get("session_id"), e.get("event"), _dumps(e)) for e in events],
+            )
+
+    def _sync(self):
+        if self.fsync == "interval":
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def _close(self):
+        self._conn.close()
+
+
+def _session_log_path(backend: str, log_dir: str, session_id: str) -> str:
+    if backend not in SINK_BACKENDS:
+        raise ValueError(f"backend must be one of {SINK_BACKENDS}, got {backend!r}")
+    return os.path.join(log_dir, f"{session_id}.{backend}")
+
+
+def open_event_sink(backend: str, log_dir: str, session_id: str, **kwargs) -> EventSink:
+    """A new sink for one session: <log_dir>/<session_id>.jsonl or .sqlite. The caller closes it."""
+    path = _session_log_path(backend, log_dir, session_id)
+    return (JsonlSink if backend == "jsonl" else SqliteSink)(path, **kwargs)
+
+
+class SinkLease:
+    """One holder's reference to a shared sink (see acquire_event_sink).
+
+    The reference is released by release() or, failing that, when the lease is garbage
+    collected, e.g. with the Streamlit session state that holds it; the last release
+    closes the sink, stopping its writer thread and closing its file.
+    """
+
+    def __init__(self, sink: EventSink):
+        self.sink = sink
+        # The finalizer must not refer to the lease itself, or it would keep it alive.
+        self._finalizer = weakref.finalize(self, _release_shared_sink, sink)
+
+    def release(self):
+        self._finalizer()
+
+
+def acquire_event_sink(backend: str, log_dir: str, session_id: str, **kwargs) -> SinkLease:
+    """A lease on the process-wide sink for this session's log, opened on first use.
+
+    Holders of the same path share one sink (one writer thread and file), which is
+    reference counted and closed when the last lease is released.
+    """
+    path = _session_log_path(backend, log_dir, session_id)
+    with _shared_sinks_lock:
+        entry = _shared_sinks.get(path)
+        if entry is None or entry[0]._closed:
+            entry = _shared_sinks[path] = [open_event_sink(backend, log_dir, session_id, **kwargs), 0]
+        entry[1] += 1
+        return SinkLease(entry[0])
+
+
+def _release_shared_sink(sink: EventSink):
+    with _shared_sinks_lock:
+        entry = _shared_sinks.get(sink.path)
+        if entry is None or entry[0] is not sink:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _shared_sinks[sink.path]
+    sink.close()
+
+
+@atexit.register
+def _close_open_sinks():
+    for sink in list(_open_sinks):
+        sink.close()
@@ -0,0 +1,168 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.utils.parallel import map_chunks
+
+CONDITIONS = ("EXPLANATION_ON", "EXPLANATION_OFF")
+# Study metric -> (event it is logged with, field).
+STUDY_METRICS = {
+    "acceptance": ("decision_submit", "accepted"),
+    "trust": ("decision_submit", "trust_1_7"),
+    "confidence": ("decision_submit", "confidence_1_7"),
+    "sus": ("sus_submit", "sus_score"),
+    "task_time": ("task_timer_stop", "elapsed_sec"),
+}
+# Permutations / bootstrap replicates per task; fixed so results depend on the seed only.
+CHUNK_SIZE = 2048
+
+
+def metric_samples(events, conditions=CONDITIONS, metrics=None, by_participant: bool = False) -> dict:
+    """The values of each study metric in the two conditions.
+
+    Args:
+        events: Logged events, as a list of dicts or a DataFrame (e.g. StudyLogs.events()).
+        by_participant: Average each participant's values first, so every participant
+            counts once (repeated decisions are not independent).
+
+    Returns:
+        {metric: (values in conditions[0], values in conditions[1])} as float arrays; both
+        empty when a column the metric needs is not in the log.
+    """
+    df = events if isinstance(events, pd.DataFrame) else pd.DataFrame(events)
+    if "decision" in df and "accepted" not in df:
+        df = df.assign(accepted=(df["decision"] == "ACCEPT").astype(float))
+    keys = ["condition", "participant_id"] if by_participant else ["condition"]
+    samples = {}
+    for name in metrics or STUDY_METRICS:
+        event, field = STUDY_METRICS[name]
+        if any(col not in df for col in ["event", field] + keys):
+            samples[name] = (np.empty(0), np.empty(0))
+            continue
+        rows = df.loc[df["event"] == event, keys + [field]].dropna(subset=[field])
+        values = rows.assign(**{field: rows[field].astype(float)})
+        if by_participant:
+            values = values.groupby(keys, as_index=False)[field].mean()
+        samples[name] = tuple(values.loc[values["condition"] == c, field].to_numpy(dtype=float) for c in conditions)
+    return samples
+
+
+def _hedges_g(mean_a, mean_b, var_a, var_b, n_a: int, n_b: int):
+    # var_* are sample variances (ddof=1); works elementwise on replicate arrays.
+    dof = n_a + n_b - 2
+    pooled = np.sqrt(((n_a - 1) * var_a + (n_b - 1) * var_b) / dof)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (1 - 3 / (4 * dof - 1)) * (mean_a - mean_b) / pooled
+
+
+def _resample_chunk(a: np.ndarray, b: np.ndarray, n_perm: int, n_boot: int, seed_seq, observed: float) -> dict:
+    """One batch of permutations and bootstrap replicates, each drawn as an index matrix."""
+    rng = np.random.default_rng(seed_seq)
+    n_a, n_b = len(a), len(b)
+    pooled = np.concatenate([a, b])
+    # Difference of means from the first group's sum alone: the pooled sum is fixed.
+    perms = rng.permuted(np.tile(np.arange(n_a + n_b), (n_perm, 1)), axis=1)
+    sum_a = pooled[perms[:, :n_a]].sum(axis=1)
+    diffs = sum_a / n_a - (pooled.sum() - sum_a) / n_b
+    extreme = int(np.count_nonzero(np.abs(diffs) >= abs(observed) - 1e-12))
+
+    boot_a = a[rng.integers(0, n_a, size=(n_boot, n_a))]
+    boot_b = b[rng.integers(0, n_b, size=(n_boot, n_b))]
+    mean_a, mean_b = boot_a.mean(axis=1), boot_b.mean(axis=1)
+    return {
+        "extreme": extreme,
+        "mean_diff": mean_a - mean_b,
+        "hedges_g": _hedges_g(mean_a, mean_b, boot_a.var(axis=1, ddof=1), boot_b.var(axis=1, ddof=1), n_a, n_b),
+    }
+
+
+def compare_conditions(events, conditions=CONDITIONS, metrics=None, n_permutations: int = 10000,
+                       n_bootstrap: int = 10000, confidence: float = 0.95, by_participant: bool = False,
+                       seed: int = 7, workers: int = 1) -> dict:
+    """Permutation and bootstrap tests of conditions[0] against conditions[1] on every study metric.
+
+    The p-value is from a two-sided permutation test of the difference in means (the
+    condition labels shuffled `n_permutations` times, counted as (1 + extreme) / (1 + n)).
+    The intervals are percentile bootstrap intervals from resampling each condition
+    separately. Permutations and replicates are generated in chunks of CHUNK_SIZE, each
+    as one index matrix from its own child of SeedSequence(seed), so results are
+    reproducible and identical for any number of workers. With more than one worker the
+    chunks run in the shared process pool (see map_chunks).
+
+    Args:
+        events: Logged events, as a list of dicts or a DataFrame (e.g. StudyLogs.events()).
+        metrics: Names from STUDY_METRICS; defaults to all of them.
+        by_participant: Compare per-participant means instead of individual events.
+        n_permutations, n_bootstrap: At least 1 each.
+        workers: Process count; 1 (the default) runs in-process.
+
+    Returns:
+        A dict with, for each metric, {"n_a", "n_b", "mean_a", "mean_b", "mean_diff",
+        "diff_lower", "diff_upper", "hedges_g", "g_lower", "g_upper", "p_value"} (NaN
+        where a condition has fewer than two values), plus "conditions",
+        "n_permutations", "n_bootstrap", "confidence_level", "by_participant" and "elapsed_ms".
+        A metric whose event, field, condition or participant column is missing from the
+        log gets NaN statistics with n_a = n_b = 0.
+    """
+    if n_permutations < 1 or n_bootstrap < 1:
+        raise ValueError(f"n_permutations and n_bootstrap must be at least 1, got {n_permutations} and {n_bootstrap}")
+    start = time.perf_counter()
+    samples = metric_samples(events, conditions, metrics, by_participant)
+
+    n_chunks = -(-max(n_permutations, n_bootstrap) // CHUNK_SIZE)
+    perm_sizes = [min(CHUNK_SIZE, max(0, n_permutations - i * CHUNK_SIZE)) for i in range(n_chunks)]
+    boot_sizes = [min(CHUNK_SIZE, max(0, n_bootstrap - i * CHUNK_SIZE)) for i in range(n_chunks)]
+    metric_seeds = np.random.SeedSequence(seed).spawn(len(samples))
+
+    jobs = []
+    for (name, (a, b)), metric_seed in zip(samples.items(), metric_seeds):
+        if len(a) < 2 or len(b) < 2:
+            continue
+        observed = a.mean() - b.mean()
+        jobs.extend((name, (a, b, p, n, s, observed))
+                    for p, n, s in zip(perm_sizes, boot_sizes, metric_seed.spawn(n_chunks)))
+    # The chunks of all metrics go through the pool together; results come back in order.
+    parts_by_metric = {}
+    for (name, _), part in zip(jobs, map_chunks(_resample_chunk, (args for _, args in jobs), workers)):
+        parts_by_metric.setdefault(name, []).append(part)
+
+    q = (1 - confidence) / 2
+    result = {}
+    for name, (a, b) in samples.items():
+        stats = dict.fromkeys(
+            ("mean_a", "mean_b", "mean_diff", "diff_lower", "diff_upper", "hedges_g", "g_lower", "g_upper", "p_value"),
+            np.nan,
+        )
+        stats.update(n_a=len(a), n_b=len(b))
+        if name in parts_by_metric:
+            parts = parts_by_metric[name]
+            diffs = np.concatenate([p["mean_diff"] for p in parts])
+            gs = np.concatenate([p["hedges_g"] for p in parts])
+            gs = gs[np.isfinite(gs)]
+            stats.update(
+                mean_a=float(a.mean()),
+                mean_b=float(b.mean()),
+                mean_diff=float(a.mean() - b.mean()),
+                hedges_g=float(_hedges_g(a.mean(), b.mean(), a.var(ddof=1), b.var(ddof=1), len(a), len(b))),
+                p_value=(1 + sum(p["extreme"] for p in parts)) / (1 + n_permutations),
+            )
+            stats["diff_lower"], stats["diff_upper"] = (float(v) for v in np.quantile(diffs, [q, 1 - q]))
+            if len(gs):
+                stats["g_lower"], stats["g_upper"] = (float(v) for v in np.quantile(gs, [q, 1 - q]))
+        result[name] = stats
+    result.update(
+        conditions=tuple(conditions),
+        n_permutations=int(n_permutations),
+        n_bootstrap=int(n_bootstrap),
+        confidence_level=confidence,
+        by_participant=by_participant,
+        elapsed_ms=1000 * (time.perf_counter() - start),
+    )
+    return result
+
+
+def comparison_table(result: dict) -> pd.DataFrame:
+    """The per-metric part of a compare_conditions result as a DataFrame (one row per metric)."""
+    rows = {name: stats for name, stats in result.items() if isinstance(stats, dict)}
+    return pd.DataFrame.from_dict(rows, orient="index")
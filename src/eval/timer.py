@@ -1,7 +1,7 @@
 import time
 import streamlit as st
 
-from src.eval.logging import log_event
+from src.eval.logging import log_event, store_snapshot
 
 
 def init_task_timer():
@@ -29,7 +29,7 @@ def start_task_timer(participant_id: str, task_id: str, condition: str):
     }
     snapshot = st.session_state.get("latest_snapshot")
     if snapshot:
-        event.update(snapshot)
+        event["snapshot_ref"] = store_snapshot(snapshot)
     log_event(event)
 
 
@@ -0,0 +1,119 @@
+import numpy as np
+
+from src.risk.metrics import normalize_weights
+from src.risk.scoring import risk_score
+
+# Score blend of src.risk.scoring.risk_score: metric -> (score weight, d(normalized)/d(metric)).
+_SCORE_TERMS = {
+    "hhi": (0.25, 1 / (0.6 - 0.2)),
+    "semidev": (0.25, 1 / 0.03),
+    "mdd": (0.25, -1 / 0.30),
+    "var": (0.15, -1 / 0.05),
+    "es": (0.10, -1 / 0.05),
+}
+_SCORE_OFFSETS = {"hhi": -0.2 / (0.6 - 0.2), "semidev": 0.0, "mdd": 0.0, "var": 0.0, "es": 0.0}
+
+
+def _shares(components: np.ndarray, total: float) -> np.ndarray:
+    if total == 0 or np.isnan(total):
+        return np.zeros_like(components)
+    return components / total
+
+
+def risk_attribution(asset_returns: np.ndarray, weights, alpha: float = 0.05, mar: float = 0.0) -> dict:
+    """Per-asset contributions to each risk metric and to risk_score, in one pass.
+
+    Gradients are taken with respect to the (normalized) weights of r_p = R @ w:
+
+    - VaR/ES: the return of each asset in the tail periods, i.e. R[t*] at the VaR order
+      statistic and the mean of R over the k worst periods used by historical_var_es.
+    - Semideviation: mean(min(0, r_p - mar) * R) / semidev.
+    - HHI: 2 w.
+    - Max drawdown: (1 + mdd) * sum over the drawdown window of R[s] / (1 + r_p[s]).
+
+    All of them come from a single (N x T) @ (T x 3) product plus one row of R.
+    Contributions are Euler allocations w_i * dmetric/dw_i, which sum to the metric for
+    VaR, ES and semideviation (mar = 0); HHI uses w_i^2, and the max drawdown allocation is
+    rescaled to sum to mdd since it is not homogeneous in w. The score contribution of an
+    asset is its share of each metric times that metric's normalized term in risk_score,
+    so the contributions sum to the score (assets can contribute negatively as hedges).
+
+    Returns:
+        A dict with "weights", per-asset (N,) arrays "hhi", "semidev", "mdd", "var", "es"
+        and "score", "gradients" (same keys, d/dw of each metric; "score" is the gradient
+        of risk_score where no term is clipped) and "metrics" (the portfolio values).
+    """
+    R = np.asarray(asset_returns, dtype=float)
+    w = normalize_weights(weights)
+    T, n = R.shape
+    r = R @ w
+
+    # Tail periods, as selected by historical_var_es.
+    idx = max(0, int(np.floor(alpha * T)) - 1)
+    tail = np.argpartition(r, idx)[: idx + 1]
+    var_t = tail[np.argmax(r[tail])]
+    var = float(r[var_t])
+    es = float(np.mean(r[tail]))
+
+    downside = np.minimum(0.0, r - mar)
+    semidev = float(np.sqrt(np.mean(downside ** 2)))
+
+    equity = np.cumprod(1 + r)
+    peak = np.maximum.accumulate(equity)
+    dd = (equity - peak) / peak
+    trough = int(np.argmin(dd))
+    mdd = float(dd[trough])
+    peak_t = int(np.argmax(equity[: trough + 1]))
+
+    V = np.zeros((T, 3))
+    V[tail, 0] = 1.0 / len(tail)
+    if semidev > 0:
+        V[:, 1] = downside / (T * semidev)
+    if trough > peak_t:
+        s = slice(peak_t + 1, trough + 1)
+        V[s, 2] = (1 + mdd) / (1 + r[s])
+    G = R.T @ V
+
+    hhi = float(np.sum(w ** 2))
+    gradients = {
+        "hhi": 2 * w,
+        "semidev": G[:, 1],
+        "mdd": G[:, 2],
+        "var": R[var_t].copy(),
+        "es": G[:, 0],
+    }
+    metrics = {"hhi": hhi, "semidev": semidev, "mdd": mdd, "var": var, "es": es}
+
+    mdd_euler = w * gradients["mdd"]
+    components = {
+        "hhi": w ** 2,
+        "semidev": w * gradients["semidev"],
+        "mdd": mdd * _shares(mdd_euler, float(mdd_euler.sum())),
+        "var": w * gradients["var"],
+        "es": w * gradients["es"],
+    }
+
+    score_grad = np.zeros(n)
+    score_parts = np.zeros(n)
+    for name, (coef, scale) in _SCORE_TERMS.items():
+        term = scale * metrics[name] + _SCORE_OFFSETS[name]
+        if 0.0 < term < 1.0:
+            score_grad += coef * scale * gradients[name]
+        score_parts += coef * min(max(term, 0.0), 1.0) * _shares(components[name], metrics[name])
+    gradients["score"] = score_grad
+
+    return {
+        "weights": w,
+        **components,
+        "score": score_parts,
+        "gradients": gradients,
+        "metrics": {**metrics, "score": risk_score(hhi, semidev, mdd, var, es)},
+    }
+
+
+def top_contributors(attribution: dict, k: int = 2) -> list:
+    """The k assets with the largest score contribution, as (asset index, share of score)."""
+    parts = attribution["score"]
+    total = parts.sum()
+    order = np.argsort(-parts, kind="stable")[:k]
+    return [(int(i), float(parts[i] / total) if total else 0.0) for i in order if parts[i] > 0]
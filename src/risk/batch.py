@@ -0,0 +1,83 @@
+import numpy as np
+
+from src.risk.recommendations import risk_levels
+from src.risk.scoring import risk_score_array
+
+
+def normalize_weight_matrix(W: np.ndarray) -> np.ndarray:
+    """Row-wise normalize_weights for a (K x N) matrix of candidate weight vectors."""
+    W = np.array(W, dtype=float, ndmin=2)
+    W[W < 0] = 0.0
+    s = W.sum(axis=1, keepdims=True)
+    return np.divide(W, s, out=np.zeros_like(W), where=s > 0)
+
+
+def _rows(port_rets: np.ndarray) -> np.ndarray:
+    # Work on a (K x T) C-contiguous layout so each portfolio's series is one contiguous row.
+    return np.ascontiguousarray(port_rets.T)
+
+
+def batch_max_drawdown(port_rets: np.ndarray) -> np.ndarray:
+    """max_drawdown for every column of a (T x K) portfolio return matrix."""
+    equity = np.cumprod(1 + _rows(port_rets), axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.subtract(equity, peak, out=equity)
+    np.divide(equity, peak, out=equity)
+    return equity.min(axis=1)
+
+
+def batch_downside_semidev(port_rets: np.ndarray, mar: float = 0.0) -> np.ndarray:
+    """downside_semidev for every column of a (T x K) portfolio return matrix."""
+    downside = np.minimum(0.0, _rows(port_rets) - mar)
+    return np.sqrt(np.mean(downside ** 2, axis=1))
+
+
+def batch_historical_var_es(port_rets: np.ndarray, alpha: float = 0.05):
+    """historical_var_es for every column of a (T x K) matrix, same indexing convention.
+
+    Uses a partition rather than a full sort: O(T) per column to find the order statistic,
+    then only the tail of idx + 1 values is sorted before averaging.
+    """
+    T, K = port_rets.shape
+    if T == 0:
+        return np.full(K, np.nan), np.full(K, np.nan)
+    idx = max(0, int(np.floor(alpha * T)) - 1)
+    part = np.partition(_rows(port_rets), idx, axis=1)
+    tail = np.sort(part[:, : idx + 1], axis=1)
+    return part[:, idx].copy(), tail.mean(axis=1)
+
+
+def evaluate_weight_batch(asset_returns: np.ndarray, W: np.ndarray, alpha: float = 0.05,
+                          mar: float = 0.0, block_size: int = 256) -> dict:
+    """Evaluates the full risk pipeline for K candidate allocations at once.
+
+    Each block of up to `block_size` weight vectors becomes a (T x block) return matrix
+    through one matmul, so peak memory is O(T * block_size) regardless of K.
+
+    Args:
+        asset_returns: A (T x N) array of asset returns.
+        W: A (K x N) array of weight vectors (normalized row-wise like normalize_weights).
+        alpha: VaR/ES tail probability.
+        mar: Minimum acceptable return for the semideviation.
+        block_size: Weight vectors evaluated per block.
+
+    Returns:
+        A dict of length-K arrays: "hhi", "semidev", "mdd", "var", "es", "score" and
+        "level" (LOW/MEDIUM/HIGH).
+    """
+    W = normalize_weight_matrix(W)
+    K = W.shape[0]
+    out = {name: np.empty(K) for name in ("hhi", "semidev", "mdd", "var", "es")}
+    out["hhi"][:] = np.sum(W ** 2, axis=1)
+
+    for start in range(0, K, block_size):
+        stop = min(start + block_size, K)
+        # (block x N) @ (N x T) -> a (T x block) view with each portfolio contiguous.
+        port_rets = (W[start:stop] @ asset_returns.T).T
+        out["mdd"][start:stop] = batch_max_drawdown(port_rets)
+        out["semidev"][start:stop] = batch_downside_semidev(port_rets, mar=mar)
+        out["var"][start:stop], out["es"][start:stop] = batch_historical_var_es(port_rets, alpha=alpha)
+
+    out["score"] = risk_score_array(out["hhi"], out["semidev"], out["mdd"], out["var"], out["es"])
+    out["level"] = risk_levels(out["score"])
+    return out
@@ -0,0 +1,145 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.risk.batch import batch_downside_semidev, batch_historical_var_es, batch_max_drawdown
+from src.risk.metrics import downside_semidev, historical_var_es, max_drawdown
+from src.risk.scoring import risk_score, risk_score_array
+from src.utils.parallel import attach_shared_memory, default_workers, map_chunks
+
+BOOTSTRAP_METHODS = ("iid", "block")
+# Hourly bars: one-day blocks keep the intraday autocorrelation inside each block.
+DEFAULT_BLOCK_LENGTH = 24
+# Replicates per task; fixed so results depend on (seed, n_boot) only, not on the pool size.
+CHUNK_SIZE = 64
+BOOTSTRAP_METRICS = ("hhi", "semidev", "mdd", "var", "es", "score")
+
+
+def resample_indices(rng: np.random.Generator, T: int, n: int, method: str = "iid",
+                     block_length: int = DEFAULT_BLOCK_LENGTH) -> np.ndarray:
+    """Indices of `n` bootstrap resamples of a length-T series, as one (n x T) array.
+
+    "iid" draws periods independently. "block" is the moving-block bootstrap: contiguous
+    blocks of `block_length` periods at uniform random starts, concatenated and cut to T.
+    """
+    if method == "iid":
+        return rng.integers(0, T, size=(n, T))
+    if method == "block":
+        L = max(1, min(int(block_length), T))
+        n_blocks = -(-T // L)
+        starts = rng.integers(0, T - L + 1, size=(n, n_blocks))
+        return (starts[:, :, None] + np.arange(L)).reshape(n, -1)[:, :T]
+    raise ValueError(f"method must be one of {BOOTSTRAP_METHODS}, got {method!r}")
+
+
+def _replicate_metrics(returns: np.ndarray, idx: np.ndarray, alpha: float, hhi: float) -> dict:
+    samples = returns[idx].T  # (T x n) view over the row-major resamples
+    semidev = batch_downside_semidev(samples)
+    mdd = batch_max_drawdown(samples)
+    var, es = batch_historical_var_es(samples, alpha=alpha)
+    hhi = np.full(len(idx), hhi)
+    return {
+        "hhi": hhi,
+        "semidev": semidev,
+        "mdd": mdd,
+        "var": var,
+        "es": es,
+        "score": risk_score_array(hhi, semidev, mdd, var, es),
+    }
+
+
+def _bootstrap_chunk(shm_name: str, T: int, n: int, seed_seq, method: str, block_length: int,
+                     alpha: float, hhi: float) -> dict:
+    # Runs in a worker: reads the series from shared memory rather than a pickled copy.
+    shm = attach_shared_memory(shm_name)
+    try:
+        returns = np.ndarray((T,), dtype=np.float64, buffer=shm.buf)
+        idx = resample_indices(np.random.default_rng(seed_seq), T, n, method, block_length)
+        return _replicate_metrics(returns, idx, alpha, hhi)
+    finally:
+        shm.close()
+
+
+def bootstrap_metrics(port_rets: np.ndarray, weights, alpha: float = 0.05, n_boot: int = 1000,
+                      method: str = "iid", block_length: int = DEFAULT_BLOCK_LENGTH,
+                      confidence: float = 0.90, seed: int = 7, workers: int = None) -> dict:
+    """Bootstrap confidence intervals for the metrics of src.risk.metrics and risk_score.
+
+    Replicates are generated in chunks of CHUNK_SIZE, each chunk's resample indices as one
+    array from its own child of SeedSequence(seed), so results are reproducible from the
+    sidebar seed and identical for any number of workers. With more than one worker the
+    chunks run in a process pool that reads the series from a shared-memory buffer.
+    HHI depends only on the weights, so its interval is degenerate.
+
+    Args:
+        port_rets: The (T,) portfolio return series.
+        weights: Portfolio weights (for HHI).
+        method: "iid" or "block" (moving blocks of `block_length` periods).
+        confidence: Two-sided level of the percentile intervals.
+        workers: Process count; defaults to the CPU count, 1 runs in-process.
+
+    Returns:
+        A dict with, for each metric, {"estimate", "lower", "upper", "std"}, plus "n_boot",
+        "method", "block_length", "confidence" and "elapsed_ms".
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"method must be one of {BOOTSTRAP_METHODS}, got {method!r}")
+    start = time.perf_counter()
+    r = np.ascontiguousarray(port_rets, dtype=np.float64)
+    T = len(r)
+    w = np.asarray(weights, dtype=float)
+    hhi = float(np.sum((w / w.sum()) ** 2)) if w.sum() > 0 else 0.0
+
+    sizes = [min(CHUNK_SIZE, n_boot - i) for i in range(0, n_boot, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or default_workers()
+
+    if workers <= 1 or len(sizes) == 1:
+        parts = [
+            _replicate_metrics(r, resample_indices(np.random.default_rng(s), T, n, method, block_length), alpha, hhi)
+            for n, s in zip(sizes, seeds)
+        ]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(r.nbytes, 1))
+        try:
+            np.ndarray((T,), dtype=np.float64, buffer=shm.buf)[:] = r
+            parts = list(map_chunks(
+                _bootstrap_chunk,
+                [(shm.name, T, n, s, method, block_length, alpha, hhi) for n, s in zip(sizes, seeds)],
+                workers,
+            ))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    var, es = historical_var_es(r, alpha=alpha)
+    semidev = downside_semidev(r)
+    mdd = max_drawdown(r)
+    estimates = {
+        "hhi": hhi,
+        "semidev": semidev,
+        "mdd": mdd,
+        "var": var,
+        "es": es,
+        "score": risk_score(hhi, semidev, mdd, var, es),
+    }
+    q = (1 - confidence) / 2
+    result = {}
+    for name in BOOTSTRAP_METRICS:
+        reps = np.concatenate([p[name] for p in parts])
+        lower, upper = np.nanquantile(reps, [q, 1 - q])
+        result[name] = {
+            "estimate": float(estimates[name]),
+            "lower": float(lower),
+            "upper": float(upper),
+            "std": float(np.nanstd(reps)),
+        }
+    result.update(
+        n_boot=int(n_boot),
+        method=method,
+        block_length=int(block_length) if method == "block" else None,
+        confidence=confidence,
+        elapsed_ms=1000 * (time.perf_counter() - start),
+    )
+    return result
@@ -0,0 +1,188 @@
+import time
+
+import numpy as np
+
+from src.risk.batch import evaluate_weight_batch
+from src.risk.metrics import normalize_weights
+from src.risk.moments import get_moments, moment_metrics
+from src.risk.recommendations import HIGH_THRESHOLD, MEDIUM_THRESHOLD, recommendation_from_score
+from src.risk.scoring import risk_score_array
+
+# Interactive latency budget for one search (N <= 8, T <= 4000 fits comfortably).
+DEFAULT_TIME_LIMIT_MS = 200.0
+# Random allocations drawn per round of the sampling phase, and how many of them (the
+# best by the moment screen) are scored exactly.
+SCREEN_DRAWS = 256
+SCREEN_KEEP = 64
+
+
+def turnover(w_from: np.ndarray, w_to: np.ndarray) -> float:
+    """Fraction of the portfolio that has to be reallocated: half the L1 distance."""
+    return float(0.5 * np.abs(np.asarray(w_to) - np.asarray(w_from)).sum(axis=-1))
+
+
+def target_threshold(score: float):
+    """The next threshold below `score` in recommendation_from_score, or None if already LOW."""
+    if score >= HIGH_THRESHOLD:
+        return HIGH_THRESHOLD
+    if score >= MEDIUM_THRESHOLD:
+        return MEDIUM_THRESHOLD
+    return None
+
+
+def search_counterfactual(asset_returns: np.ndarray, weights, alpha: float = 0.05,
+                          time_limit_ms: float = DEFAULT_TIME_LIMIT_MS, warm_start=None,
+                          line_steps: int = 12, max_samples: int = 512, seed: int = 0) -> dict:
+    """Finds the smallest reallocation that moves the risk score below the next threshold.
+
+    Searches the weight simplex for the allocation with the least turnover from `weights`
+    whose risk_score is strictly below 0.66 (from HIGH) or 0.33 (from MEDIUM):
+
+    1. Line search from the current weights toward equal weights, each single-asset
+       corner and `warm_start` (e.g. the previous answer), all candidates in one batch.
+    2. If no line crosses, random allocations (Dirichlet) until one does, at most
+       `max_samples` of them scored. Each round draws SCREEN_DRAWS and scores the
+       SCREEN_KEEP with the lowest concentration and co-semivariance downside terms of the
+       score (moment_metrics, O(N^2) per allocation, no pass over the returns).
+    3. Local refinement: move the best crossing allocation back toward the current
+       weights, one pairwise transfer at a time, halving the step when nothing improves.
+
+    Candidates are scored with evaluate_weight_batch. The search stops at
+    `time_limit_ms` and returns the best allocation found so far. With a single asset
+    there is nothing to reallocate and the search returns at once.
+
+    Returns:
+        A dict with "found", "weights" (N,), "score", "level", "threshold", "turnover",
+        "lowest_weights"/"lowest_score" (the lowest-scoring allocation evaluated, useful
+        when nothing crosses), "evaluations", "elapsed_ms" and "timed_out" (the budget ran
+        out; otherwise the search finished, including when no allocation was found).
+        "threshold" is None when the current allocation is already LOW (nothing to search
+        for).
+    """
+    start = time.perf_counter()
+    deadline = start + time_limit_ms / 1000.0
+    w0 = normalize_weights(weights)
+    n = len(w0)
+    rng = np.random.default_rng(seed)
+    evaluations = 0
+
+    def score_batch(candidates):
+        nonlocal evaluations
+        evaluations += len(candidates)
+        return evaluate_weight_batch(asset_returns, candidates, alpha=alpha, block_size=64)["score"]
+
+    current = float(score_batch(w0[None, :])[0])
+    threshold = target_threshold(current)
+    result = {
+        "found": False,
+        "weights": None,
+        "score": None,
+        "level": None,
+        "threshold": threshold,
+        "turnover": None,
+        "lowest_weights": None,
+        "lowest_score": None,
+        "evaluations": 0,
+        "elapsed_ms": 0.0,
+        "timed_out": False,
+    }
+
+    best_w, best_score, best_cost = None, None, np.inf
+    lowest_w, lowest_score = w0, current
+
+    def consider(candidates, scores):
+        nonlocal best_w, best_score, best_cost, lowest_w, lowest_score
+        k = int(np.argmin(scores))
+        if scores[k] < lowest_score:
+            lowest_w, lowest_score = candidates[k].copy(), float(scores[k])
+        ok = scores < threshold
+        if not np.any(ok):
+            return False
+        costs = np.where(ok, 0.5 * np.abs(candidates - w0).sum(axis=1), np.inf)
+        k = int(np.argmin(costs))
+        if costs[k] < best_cost - 1e-12:
+            best_w, best_score, best_cost = candidates[k].copy(), float(scores[k]), float(costs[k])
+            return True
+        return False
+
+    if threshold is not None and n > 1:
+        # 1. Lines toward anchor allocations.
+        anchors = [np.full(n, 1.0 / n)] + list(np.eye(n))
+        if warm_start is not None and len(warm_start) == n:
+            anchors.insert(0, normalize_weights(warm_start))
+        steps = np.linspace(1.0 / line_steps, 1.0, line_steps)
+        lines = np.array([(1 - t) * w0 + t * a for a in anchors for t in steps])
+        consider(lines, score_batch(lines))
+
+        # 2. Random allocations if no line crossed the threshold, screened on moments.
+        sampled = 0
+        moments = get_moments(asset_returns) if best_w is None else None
+        while best_w is None and sampled < max_samples and time.perf_counter() < deadline:
+            draws = rng.dirichlet(np.full(n, 0.5), size=SCREEN_DRAWS)
+            hhi = np.sum(draws ** 2, axis=1)
+            screen = risk_score_array(hhi, moment_metrics(moments, draws)["semidev"], 0.0, np.nan, np.nan)
+            samples = draws[np.argsort(screen, kind="stable")[:SCREEN_KEEP]]
+            sampled += len(samples)
+            consider(samples, score_batch(samples))
+
+        # 3. Pairwise transfers back toward the current weights.
+        step = 0.05
+        while best_w is not None and step >= 1e-3 and time.perf_counter() < deadline:
+            gap = w0 - best_w
+            receivers = np.flatnonzero(gap > 1e-12)
+            donors = np.flatnonzero(gap < -1e-12)
+            if len(receivers) == 0 or len(donors) == 0:
+                break
+            moves = []
+            for i in receivers:
+                for j in donors:
+                    delta = min(step, gap[i], -gap[j])
+                    w = best_w.copy()
+                    w[i] += delta
+                    w[j] -= delta
+                    moves.append(w)
+            moves = np.array(moves)
+            if not consider(moves, score_batch(moves)):
+                step /= 2
+
+        result["timed_out"] = time.perf_counter() >= deadline
+        if best_w is None and sampled >= max_samples:
+            result["timed_out"] = False
+
+    if best_w is not None:
+        result.update(
+            found=True,
+            weights=best_w,
+            score=best_score,
+            level=recommendation_from_score(best_score)[0],
+            turnover=best_cost,
+        )
+    result["lowest_weights"] = lowest_w
+    result["lowest_score"] = lowest_score
+    result["evaluations"] = evaluations
+    result["elapsed_ms"] = 1000 * (time.perf_counter() - start)
+    return result
+
+
+def counterfactual_allocation_text(result: dict) -> str:
+    """One-sentence description of a search result for the counterfactual panel."""
+    if result["threshold"] is None:
+        return "The current allocation is already in the LOW range."
+    if not result["found"] and len(result["lowest_weights"]) == 1:
+        return "With a single asset there is no other allocation to move to."
+    if not result["found"] and not result["timed_out"]:
+        return (
+            f"No allocation reaching a risk score below {result['threshold']:.2f} was found; "
+            f"the lowest score found was {result['lowest_score']:.2f}."
+        )
+    if not result["found"]:
+        return (
+            f"No allocation reaching a risk score below {result['threshold']:.2f} was found "
+            f"within the {result['elapsed_ms']:.0f} ms search budget; the lowest score found "
+            f"was {result['lowest_score']:.2f}."
+        )
+    alloc = ", ".join(f"Asset {i + 1}: {w:.0%}" for i, w in enumerate(result["weights"]))
+    return (
+        f"Reallocating {result['turnover']:.0%} of the portfolio to ({alloc}) would lower the risk "
+        f"score to {result['score']:.2f} ({result['level']})."
+    )
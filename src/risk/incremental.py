@@ -0,0 +1,156 @@
+import heapq
+import math
+
+import numpy as np
+
+
+def _neumaier_add(total: float, comp: float, x: float):
+    """One step of a Neumaier-compensated sum; returns the new (total, compensation)."""
+    t = total + x
+    if abs(total) >= abs(x):
+        comp += (total - t) + x
+    else:
+        comp += (x - t) + total
+    return t, comp
+
+
+class DrawdownAccumulator:
+    """Running equity, peak and drawdown over an expanding return series.
+
+    Equity is continued with np.cumprod from the last value, so equity, peak and
+    max_drawdown are bit-identical to max_drawdown() on the full series.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.equity = 1.0
+        self.peak = -np.inf
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+
+    def update(self, returns) -> "DrawdownAccumulator":
+        r = np.atleast_1d(np.asarray(returns, dtype=float))
+        if len(r) == 0:
+            return self
+        equity = np.cumprod(np.r_[self.equity, 1 + r])[1:]
+        peak = np.maximum.accumulate(np.r_[self.peak, equity])[1:]
+        dd = (equity - peak) / peak
+        self.max_drawdown = float(dd.min()) if self.count == 0 else min(self.max_drawdown, float(dd.min()))
+        self.equity = float(equity[-1])
+        self.peak = float(peak[-1])
+        self.drawdown = float(dd[-1])
+        self.count += len(r)
+        return self
+
+
+class SemidevAccumulator:
+    """Running downside sum of squares below `mar`; O(1) per new return."""
+
+    def __init__(self, mar: float = 0.0):
+        self.mar = mar
+        self.count = 0
+        self._sum_sq = 0.0
+        self._comp = 0.0
+
+    def update(self, returns) -> "SemidevAccumulator":
+        r = np.atleast_1d(np.asarray(returns, dtype=float))
+        downside = np.minimum(0.0, r - self.mar)
+        # Neumaier-compensated running sum keeps the result within rounding of np.mean.
+        for x in (downside ** 2).tolist():
+            self._sum_sq, self._comp = _neumaier_add(self._sum_sq, self._comp, x)
+        self.count += len(r)
+        return self
+
+    @property
+    def value(self) -> float:
+        if self.count == 0:
+            return np.nan
+        return float(math.sqrt((self._sum_sq + self._comp) / self.count))
+
+
+class TailAccumulator:
+    """Historical VaR/ES over an expanding series in O(log T) per new return.
+
+    Keeps the k = max(1, floor(alpha * T)) smallest returns in a max-heap and the rest in a
+    min-heap, i.e. the order statistic historical_var_es reads at
+    idx = max(0, floor(alpha * T) - 1), so VaR is bit-identical to the batch function. The
+    tail sum is maintained with a compensated sum as returns enter and leave the tail, so
+    var_es() is O(1) and ES matches historical_var_es to within rounding (not bit for bit:
+    np.mean sums the sorted tail pairwise).
+    """
+
+    def __init__(self, alpha: float = 0.05):
+        self.alpha = alpha
+        self.count = 0
+        self._tail = []  # negated values: max-heap of the smallest k returns
+        self._rest = []  # min-heap of the remaining returns
+        self._tail_sum = 0.0
+        self._tail_comp = 0.0
+
+    def _tail_size(self) -> int:
+        return max(0, int(np.floor(self.alpha * self.count)) - 1) + 1
+
+    def _add_to_tail(self, x: float):
+        heapq.heappush(self._tail, -x)
+        self._tail_sum, self._tail_comp = _neumaier_add(self._tail_sum, self._tail_comp, x)
+
+    def _pop_from_tail(self) -> float:
+        x = -heapq.heappop(self._tail)
+        self._tail_sum, self._tail_comp = _neumaier_add(self._tail_sum, self._tail_comp, -x)
+        return x
+
+    def update(self, returns) -> "TailAccumulator":
+        for x in np.atleast_1d(np.asarray(returns, dtype=float)).tolist():
+            self.count += 1
+            if self._tail and x < -self._tail[0]:
+                self._add_to_tail(x)
+            else:
+                heapq.heappush(self._rest, x)
+            k = self._tail_size()
+            while len(self._tail) > k:
+                heapq.heappush(self._rest, self._pop_from_tail())
+            while len(self._tail) < k and self._rest:
+                self._add_to_tail(heapq.heappop(self._rest))
+        return self
+
+    def var_es(self):
+        if not self._tail:
+            return np.nan, np.nan
+        return float(-self._tail[0]), float((self._tail_sum + self._tail_comp) / len(self._tail))
+
+
+class RiskAccumulator:
+    """Incremental max drawdown, downside semideviation and historical VaR/ES.
+
+    Feed the portfolio return series once, then only the returns of newly appended bars
+    (e.g. from src.risk.simulation.append_market_bars projected onto the weights).
+
+    Example:
+        acc = RiskAccumulator(alpha=0.05).update(port_rets)
+        acc.update(new_port_rets)
+        acc.metrics()  # {"mdd": ..., "semidev": ..., "var": ..., "es": ...}
+    """
+
+    def __init__(self, alpha: float = 0.05, mar: float = 0.0):
+        self.drawdown = DrawdownAccumulator()
+        self.semidev = SemidevAccumulator(mar=mar)
+        self.tail = TailAccumulator(alpha=alpha)
+
+    def update(self, returns) -> "RiskAccumulator":
+        self.drawdown.update(returns)
+        self.semidev.update(returns)
+        self.tail.update(returns)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.drawdown.count
+
+    def metrics(self) -> dict:
+        var, es = self.tail.var_es()
+        return {
+            "mdd": self.drawdown.max_drawdown,
+            "semidev": self.semidev.value,
+            "var": var,
+            "es": es,
+        }
@@ -27,6 +27,25 @@ def portfolio_returns(asset_returns: np.ndarray, w: np.ndarray) -> np.ndarray:
     return asset_returns @ w
 
 
+def portfolio_returns_chunked(asset_return_blocks, w: np.ndarray) -> np.ndarray:
+    """Portfolio returns from asset returns supplied block by block.
+
+    Lets a (T x N) matrix that does not fit in memory (e.g. from
+    src.risk.simulation.iter_correlated_returns) be reduced to the (T,) portfolio
+    series, which the other metric functions then consume as usual.
+
+    Args:
+        asset_return_blocks: An iterable of (t x N) arrays, in time order.
+        w: An (N,) array of portfolio weights.
+
+    Returns:
+        A (T,) array of periodic portfolio returns.
+    """
+    w = normalize_weights(w)
+    parts = [block @ w for block in asset_return_blocks]
+    return np.concatenate(parts) if parts else np.array([])
+
+
 def max_drawdown(returns: np.ndarray) -> float:
     """Calculates the largest peak-to-trough drop in portfolio equity.
 
@@ -49,20 +68,61 @@ def downside_semidev(returns: np.ndarray, mar: float = 0.0) -> float:
     return float(np.sqrt(np.mean(downside ** 2)))
 
 
-def historical_var_es(returns: np.ndarray, alpha: float = 0.05):
+def historical_var_es(returns: np.ndarray, alpha: float = 0.05, method: str = "exact",
+                      relative_accuracy: float = 0.01):
     """Calculates historical Value-at-Risk (VaR) and Expected Shortfall (ES).
 
     Args:
         returns: An array of periodic portfolio returns.
         alpha: The significance level for VaR/ES (e.g., 0.05 for 95% confidence).
+        method: "exact" (default) or "sketch" for the bounded-memory estimate from
+                src.risk.sketch.QuantileSketch, accurate to `relative_accuracy`.
+        relative_accuracy: Relative error bound of the sketch method.
 
     Returns:
         A tuple containing the VaR and ES as floats.
     """
     # Historical simulation VaR/ES: returns are periodic.
-    r = np.sort(returns)
+    if method == "sketch":
+        from src.risk.sketch import QuantileSketch
+        return QuantileSketch(relative_accuracy=relative_accuracy).update(returns).var_es(alpha)
+    if method != "exact":
+        raise ValueError(f"Unknown VaR/ES method {method!r}")
+
+    r = np.asarray(returns)
+    if not len(r):
+        return np.nan, np.nan
     idx = max(0, int(np.floor(alpha * len(r))) - 1)
-    var = float(r[idx]) if len(r) else np.nan
-    tail = r[: idx + 1] if len(r) else np.array([])
-    es = float(np.mean(tail)) if len(tail) else np.nan
+    # Selection instead of a full sort: O(T) to place the order statistic, then only
+    # the idx + 1 tail values are sorted, giving the same values in the same order.
+    part = np.partition(r, idx)
+    var = float(part[idx])
+    es = float(np.mean(np.sort(part[: idx + 1])))
     return var, es
+
+
+VAR_ES_METHODS = ("historical", "sketch", "gaussian", "cornish_fisher")
+
+
+def var_es(returns: np.ndarray, alpha: float = 0.05, method: str = "historical"):
+    """VaR and ES of a return series with the estimator named by `method`.
+
+    Args:
+        returns: An array of periodic portfolio returns.
+        alpha: The significance level for VaR/ES.
+        method: "historical" (historical_var_es), "sketch" (its bounded-memory estimate),
+                or "gaussian" / "cornish_fisher" for the moment-based estimators of
+                src.risk.parametric (cheaper and less noisy for small alpha on short
+                windows, but parametric).
+
+    Returns:
+        A tuple containing the VaR and ES as floats.
+    """
+    if method == "historical":
+        return historical_var_es(returns, alpha=alpha)
+    if method == "sketch":
+        return historical_var_es(returns, alpha=alpha, method="sketch")
+    if method in ("gaussian", "cornish_fisher"):
+        from src.risk.parametric import parametric_var_es
+        return parametric_var_es(returns, alpha=alpha, method=method)
+    raise ValueError(f"method must be one of {VAR_ES_METHODS}, got {method!r}")
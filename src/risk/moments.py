@@ -0,0 +1,110 @@
+import numpy as np
+
+from src.risk.batch import batch_downside_semidev, normalize_weight_matrix
+from src.utils.cache import ByteLRUCache, data_fingerprint
+
+MOMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_moment_cache = ByteLRUCache(MOMENT_CACHE_MAX_BYTES, sizeof=lambda m: m["cov"].nbytes + m["cosemi"].nbytes + m["mean"].nbytes)
+
+
+def compute_moments(asset_returns: np.ndarray, mar: float = 0.0) -> dict:
+    """N x N summaries of a (T x N) return matrix, computed in one pass.
+
+    - mean: per-asset mean return (N,).
+    - cov: population covariance (ddof=0), so w' cov w is exactly the variance of R @ w.
+    - cosemi: co-semivariance S_ij = mean(min(r_i - mar, 0) * min(r_j - mar, 0)) (Estrada,
+      2008). sqrt(w' S w) approximates downside_semidev(R @ w, mar); it is exact when all
+      assets fall below `mar` in the same periods, and typically a few percent off when
+      they do not.
+    """
+    R = np.asarray(asset_returns, dtype=float)
+    T = len(R)
+    mean = R.mean(axis=0)
+    centered = R - mean
+    downside = np.minimum(R - mar, 0.0)
+    return {
+        "mean": mean,
+        "cov": centered.T @ centered / T,
+        "cosemi": downside.T @ downside / T,
+        "mar": mar,
+        "n_periods": T,
+    }
+
+
+def merge_moments(a: dict, b: dict) -> dict:
+    """Moments of the rows of two blocks stacked, from the moments of each block.
+
+    The means and covariances are combined with the pairwise update of Chan et al. (1979);
+    the co-semivariance is a plain mean and is weighted by the block lengths. Lets moments
+    be extended with newly appended bars without touching the earlier rows.
+    """
+    if a["mar"] != b["mar"]:
+        raise ValueError(f"Cannot merge moments with different mar ({a['mar']} and {b['mar']}).")
+    na, nb = a["n_periods"], b["n_periods"]
+    if na == 0 or nb == 0:
+        return dict(b if na == 0 else a)
+    n = na + nb
+    delta = b["mean"] - a["mean"]
+    return {
+        "mean": a["mean"] + delta * (nb / n),
+        "cov": (na * a["cov"] + nb * b["cov"]) / n + np.outer(delta, delta) * (na * nb / n ** 2),
+        "cosemi": (na * a["cosemi"] + nb * b["cosemi"]) / n,
+        "mar": a["mar"],
+        "n_periods": n,
+    }
+
+
+def get_moments(asset_returns: np.ndarray, mar: float = 0.0, fingerprint: str = None) -> dict:
+    """compute_moments cached per dataset fingerprint (data_fingerprint of the matrix)."""
+    key = (fingerprint or data_fingerprint(asset_returns), float(mar))
+    return _moment_cache.get_or_create(key, lambda: compute_moments(asset_returns, mar=mar))
+
+
+def moment_metrics(moments: dict, weights) -> dict:
+    """Mean, variance, volatility and approximate downside semideviation in O(N^2).
+
+    Accepts one weight vector (N,) or a batch (M x N); weights are normalized as in
+    portfolio_returns. Mean and variance are exact; "semidev" is the co-semivariance
+    approximation (see compute_moments).
+    """
+    W = normalize_weight_matrix(weights)
+    variance = np.einsum("mi,ij,mj->m", W, moments["cov"], W)
+    semivar = np.einsum("mi,ij,mj->m", W, moments["cosemi"], W)
+    out = {
+        "mean": W @ moments["mean"],
+        "variance": variance,
+        "volatility": np.sqrt(np.maximum(variance, 0.0)),
+        "semidev": np.sqrt(np.maximum(semivar, 0.0)),
+    }
+    if np.ndim(weights) == 1:
+        out = {k: float(v[0]) for k, v in out.items()}
+    return out
+
+
+def semidev_approximation_error(asset_returns: np.ndarray, weights, moments: dict = None) -> dict:
+    """Co-semivariance semideviation against the exact downside_semidev of R @ w.
+
+    Accepts one weight vector or a batch, like moment_metrics.
+
+    Returns:
+        A dict with "exact", "approx", "abs_error" and "rel_error" (abs_error / exact).
+    """
+    R = np.asarray(asset_returns, dtype=float)
+    moments = moments or get_moments(R)
+    W = normalize_weight_matrix(weights)
+    exact = batch_downside_semidev(R @ W.T, mar=moments["mar"])
+    approx = moment_metrics(moments, W)["semidev"]
+    abs_error = np.abs(approx - exact)
+    out = {
+        "exact": exact,
+        "approx": approx,
+        "abs_error": abs_error,
+        "rel_error": np.divide(abs_error, exact, out=np.zeros_like(abs_error), where=exact > 0),
+    }
+    if np.ndim(weights) == 1:
+        out = {k: float(v[0]) for k, v in out.items()}
+    return out
+
+
+def moment_cache_stats() -> dict:
+    return _moment_cache.stats()
@@ -0,0 +1,157 @@
+import time
+
+import numpy as np
+
+from src.risk.batch import batch_max_drawdown
+from src.risk.metrics import normalize_weights
+from src.risk.scoring import risk_score
+from src.risk.simulation import cholesky_factor
+from src.risk.sketch import QuantileSketch
+from src.utils.parallel import default_workers, map_chunks
+
+MC_METHODS = ("gbm", "fhs")
+# Paths per chunk: a chunk holds (CHUNK_PATHS x horizon x N) draws, ~22 MB at 168 h and N = 8.
+CHUNK_PATHS = 2048
+# RiskMetrics decay for the EWMA volatility filter of the filtered historical simulation.
+EWMA_LAMBDA = 0.94
+SKETCH_ACCURACY = 0.005
+
+
+def gbm_params(asset_returns: np.ndarray) -> dict:
+    """Per-bar drift and Cholesky factor of the asset log returns (multivariate GBM)."""
+    log_rets = np.log1p(np.asarray(asset_returns, dtype=float))
+    mu = log_rets.mean(axis=0)
+    cov = np.atleast_2d(np.cov(log_rets, rowvar=False))
+    vols = np.sqrt(np.diag(cov))
+    corr = cov / np.outer(vols, vols)
+    return {"mu": mu, "chol_t": cholesky_factor(corr, vols).T}
+
+
+def fhs_params(port_rets: np.ndarray, lam: float = EWMA_LAMBDA) -> dict:
+    """EWMA-filtered residuals of the portfolio series and the volatility state at its end.
+
+    The series is demeaned before filtering, and the filtered residuals are standardized
+    to zero mean and unit variance: raw residuals are neither (the EWMA variance lags
+    the shocks), and resampling them through the recursion would inflate the simulated
+    volatility.
+    """
+    r = np.asarray(port_rets, dtype=float)
+    mu = float(r.mean())
+    e = r - mu
+    var = np.empty(len(e) + 1)
+    var[0] = e.var()
+    for t, x in enumerate(e.tolist()):
+        var[t + 1] = lam * var[t] + (1 - lam) * x * x
+    z = e / np.sqrt(var[:-1])
+    z = (z - z.mean()) / z.std()
+    return {"residuals": z, "mu": mu, "sigma2": float(var[-1]), "lam": lam}
+
+
+def _simulate_chunk(method: str, params: dict, weights: np.ndarray, n_paths: int, horizon: int, seed_seq) -> np.ndarray:
+    """(n_paths x horizon) portfolio returns for one chunk."""
+    rng = np.random.default_rng(seed_seq)
+    if method == "gbm":
+        z = rng.standard_normal((n_paths, horizon, len(params["mu"])))
+        log_rets = z @ params["chol_t"]
+        log_rets += params["mu"]
+        return np.expm1(log_rets, out=log_rets) @ weights
+    # Filtered historical simulation: resampled residuals rescaled by the EWMA recursion.
+    resid = params["residuals"]
+    z = resid[rng.integers(0, len(resid), size=(n_paths, horizon))]
+    out = np.empty_like(z)
+    lam = params["lam"]
+    sigma2 = np.full(n_paths, params["sigma2"])
+    for h in range(horizon):
+        shock = z[:, h] * np.sqrt(sigma2)
+        out[:, h] = params["mu"] + shock
+        sigma2 = lam * sigma2 + (1 - lam) * shock ** 2
+    return out
+
+
+def _reduce_chunk(method: str, params: dict, weights: np.ndarray, n_paths: int, horizon: int, seed_seq) -> dict:
+    # Runs in a worker: simulates one chunk and keeps only sketches and running sums.
+    paths = _simulate_chunk(method, params, weights, n_paths, horizon, seed_seq)
+    horizon_returns = np.prod(1 + paths, axis=1) - 1
+    return {
+        "period": QuantileSketch(SKETCH_ACCURACY).update(paths),
+        "horizon": QuantileSketch(SKETCH_ACCURACY).update(horizon_returns),
+        "mdd": QuantileSketch(SKETCH_ACCURACY).update(batch_max_drawdown(paths.T)),
+        "downside_sq": float(np.sum(np.minimum(0.0, paths) ** 2)),
+        "losses": int(np.count_nonzero(horizon_returns < 0)),
+    }
+
+
+def simulate_forward_risk(asset_returns: np.ndarray, weights, horizon: int = 168, n_paths: int = 10000,
+                          method: str = "gbm", alpha: float = 0.05, seed: int = 7, workers: int = None,
+                          chunk_paths: int = CHUNK_PATHS) -> dict:
+    """Forward Monte Carlo distribution of portfolio risk over the next `horizon` bars.
+
+    Methods:
+        "gbm": multivariate geometric Brownian motion with the drift and covariance of the
+               historical asset log returns; the portfolio is rebalanced every bar, as in
+               portfolio_returns.
+        "fhs": filtered historical simulation of the portfolio series: residuals of an EWMA
+               volatility filter are resampled and rescaled by the same recursion forward
+               from today's volatility, keeping volatility clustering.
+
+    Paths are generated in chunks of `chunk_paths` and each chunk is reduced to quantile
+    sketches (per-bar returns, horizon return, path max drawdown) and running sums before
+    the next, so peak memory depends on the chunk size, not on `n_paths`. Chunks draw from
+    SeedSequence(seed) children, so results are reproducible for any worker count, and run
+    in the shared process pool when more than one worker is available, with only a few
+    chunks in flight at a time (see map_chunks).
+
+    The forward risk_score uses per-bar semideviation, VaR and ES of the simulated returns
+    and the median path max drawdown.
+
+    Returns:
+        A dict with "terminal" (5/50/95% terminal value of $1), "prob_loss", "horizon_var"/
+        "horizon_es" (tail of the horizon return), "mdd_median"/"mdd_worst" (median and
+        alpha-quantile path drawdown), "var"/"es"/"semidev" (per bar), "score", "n_paths",
+        "horizon", "method" and "elapsed_ms".
+    """
+    if method not in MC_METHODS:
+        raise ValueError(f"method must be one of {MC_METHODS}, got {method!r}")
+    start = time.perf_counter()
+    R = np.asarray(asset_returns, dtype=float)
+    w = normalize_weights(weights)
+    params = gbm_params(R) if method == "gbm" else fhs_params(R @ w)
+
+    sizes = [min(chunk_paths, n_paths - i) for i in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or default_workers()
+    args = ((method, params, w, n, horizon, s) for n, s in zip(sizes, seeds))
+    parts = map_chunks(_reduce_chunk, args, workers if len(sizes) > 1 else 1)
+
+    period = QuantileSketch(SKETCH_ACCURACY)
+    horizon_sketch = QuantileSketch(SKETCH_ACCURACY)
+    mdd = QuantileSketch(SKETCH_ACCURACY)
+    downside_sq, losses = 0.0, 0
+    for part in parts:
+        period.merge(part["period"])
+        horizon_sketch.merge(part["horizon"])
+        mdd.merge(part["mdd"])
+        downside_sq += part["downside_sq"]
+        losses += part["losses"]
+
+    var, es = period.var_es(alpha)
+    horizon_var, horizon_es = horizon_sketch.var_es(alpha)
+    semidev = float(np.sqrt(downside_sq / max(period.count, 1)))
+    mdd_median = mdd.quantile(0.5)
+    hhi = float(np.sum(w ** 2))
+    return {
+        "terminal": {q: 1 + horizon_sketch.quantile(q) for q in (0.05, 0.5, 0.95)},
+        "prob_loss": losses / n_paths,
+        "horizon_var": horizon_var,
+        "horizon_es": horizon_es,
+        "mdd_median": mdd_median,
+        "mdd_worst": mdd.quantile(alpha),
+        "var": var,
+        "es": es,
+        "semidev": semidev,
+        "score": risk_score(hhi, semidev, mdd_median, var, es),
+        "n_paths": int(n_paths),
+        "horizon": int(horizon),
+        "method": method,
+        "elapsed_ms": 1000 * (time.perf_counter() - start),
+    }
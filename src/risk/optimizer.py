@@ -0,0 +1,179 @@
+import time
+
+import numpy as np
+
+from src.risk.attribution import risk_attribution
+from src.risk.metrics import normalize_weights
+from src.utils.cache import ByteLRUCache, data_fingerprint
+
+OBJECTIVES = ("es", "score")
+OPTIMIZER_CACHE_MAX_BYTES = 4 * 1024 * 1024
+_optimizer_cache = ByteLRUCache(OPTIMIZER_CACHE_MAX_BYTES, sizeof=lambda result: result["weights"].nbytes + 512)
+
+
+def project_capped_simplex(v: np.ndarray, lower: np.ndarray, upper: np.ndarray, iters: int = 60) -> np.ndarray:
+    """Euclidean projection onto {w : sum(w) = 1, lower <= w <= upper}.
+
+    The projection is clip(v - tau, lower, upper) for the tau that makes it sum to one;
+    sum is monotone in tau, so tau is found by bisection.
+    """
+    lo_tau = np.min(v - upper)
+    hi_tau = np.max(v - lower)
+    for _ in range(iters):
+        tau = 0.5 * (lo_tau + hi_tau)
+        if np.clip(v - tau, lower, upper).sum() > 1.0:
+            lo_tau = tau
+        else:
+            hi_tau = tau
+    return np.clip(v - 0.5 * (lo_tau + hi_tau), lower, upper)
+
+
+def _project_hhi_ball(v: np.ndarray, max_hhi: float) -> np.ndarray:
+    # On the plane sum(w) = 1, sum(w^2) <= h is the ball around 1/N of radius sqrt(h - 1/N).
+    n = len(v)
+    center = np.full(n, 1.0 / n)
+    d = v - center
+    d -= d.mean()
+    radius = np.sqrt(max(max_hhi - 1.0 / n, 0.0))
+    norm = np.linalg.norm(d)
+    if norm > radius:
+        d *= radius / norm
+    return center + d
+
+
+def project_feasible(v: np.ndarray, lower: np.ndarray, upper: np.ndarray, max_hhi=None,
+                     iters: int = 50, tol: float = 1e-10) -> np.ndarray:
+    """Projection onto the capped simplex, intersected with sum(w^2) <= max_hhi if given.
+
+    The intersection has no closed form, so Dykstra's alternating projections are used
+    (unlike plain alternation they converge to the projection, not just a feasible point).
+    """
+    w = project_capped_simplex(v, lower, upper)
+    if max_hhi is None or np.sum(w ** 2) <= max_hhi + tol:
+        return w
+    x = np.asarray(v, dtype=float)
+    p = np.zeros_like(x)
+    q = np.zeros_like(x)
+    for _ in range(iters):
+        y = _project_hhi_ball(x + p, max_hhi)
+        p = x + p - y
+        x_new = project_capped_simplex(y + q, lower, upper)
+        q = y + q - x_new
+        if np.abs(x_new - x).max() < tol:
+            x = x_new
+            break
+        x = x_new
+    return x
+
+
+def _bounds(n: int, min_weight, max_weight, max_hhi):
+    lower = np.broadcast_to(np.asarray(min_weight, dtype=float), (n,)).copy()
+    upper = np.broadcast_to(np.asarray(max_weight, dtype=float), (n,)).copy()
+    if np.any(lower > upper) or lower.sum() > 1.0 + 1e-12 or upper.sum() < 1.0 - 1e-12:
+        raise ValueError("Weight bounds admit no fully invested allocation.")
+    if max_hhi is not None and max_hhi < 1.0 / n - 1e-12:
+        raise ValueError(f"max_hhi must be at least 1/N = {1.0 / n:.4f}.")
+    return lower, upper
+
+
+def optimize_allocation(asset_returns: np.ndarray, objective: str = "es", alpha: float = 0.05,
+                        min_weight=0.0, max_weight=1.0, max_hhi=None, warm_start=None,
+                        max_iter: int = 300, patience: int = 60, step: float = 0.1,
+                        fingerprint: str = None) -> dict:
+    """Minimum-risk allocation over the simplex under box and concentration constraints.
+
+    Objectives:
+        "es": maximize historical ES (i.e. minimize the expected tail loss). This is the
+              Rockafellar-Uryasev program min_{w, z} z + 1/(k) sum_t max(0, -r_t.w - z);
+              its inner minimum over z is attained at the VaR order statistic, which
+              leaves a convex piecewise-linear problem in w. It is solved by projected
+              subgradient steps, the subgradient being minus the mean asset return over
+              the tail periods (so no LP solver is needed).
+        "score": minimize risk_score. The blend is non-smooth and non-convex (clipping,
+                 drawdown path), so this is a projected subgradient search along the
+                 risk_attribution score gradient that keeps the best iterate.
+
+    Each iteration costs two (T x N) products, so N in the hundreds with T in the tens of
+    thousands takes seconds. Results are cached by (data fingerprint, objective, alpha,
+    constraints, max_iter, patience, step); a cached answer is returned whatever the warm
+    start. The returned weights are read-only, since a cached result is shared.
+
+    Args:
+        asset_returns: A (T x N) array of asset returns.
+        objective: "es" or "score".
+        min_weight, max_weight: Scalar or (N,) bounds per asset.
+        max_hhi: Optional upper bound on sum(w^2).
+        warm_start: Starting weights (e.g. the current sidebar allocation); equal weights
+                    if omitted.
+        fingerprint: Precomputed data_fingerprint(asset_returns), to skip hashing.
+
+    Returns:
+        A dict with "weights", "objective", "value" (ES or score of the answer), "metrics"
+        (hhi, semidev, mdd, var, es, score), "iterations", "elapsed_ms" and "cached".
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, got {objective!r}")
+    R = np.asarray(asset_returns, dtype=float)
+    n = R.shape[1]
+    lower, upper = _bounds(n, min_weight, max_weight, max_hhi)
+
+    key = (
+        fingerprint or data_fingerprint(R),
+        objective,
+        float(alpha),
+        lower.tobytes(),
+        upper.tobytes(),
+        None if max_hhi is None else float(max_hhi),
+        int(max_iter),
+        int(patience),
+        float(step),
+    )
+    cached = _optimizer_cache.get(key)
+    if cached is not None:
+        return {**cached, "metrics": dict(cached["metrics"]), "cached": True}
+
+    start = time.perf_counter()
+    w0 = normalize_weights(warm_start) if warm_start is not None and len(warm_start) == n else np.full(n, 1.0 / n)
+    w = project_feasible(w0, lower, upper, max_hhi)
+
+    def value(attr):
+        # Minimized quantity.
+        return -attr["metrics"]["es"] if objective == "es" else attr["metrics"]["score"]
+
+    attr = risk_attribution(R, w, alpha=alpha)
+    best_w, best_attr, best_val = w, attr, value(attr)
+    stale = 0
+    iterations = 0
+    for k in range(max_iter):
+        iterations = k + 1
+        g = -attr["gradients"]["es"] if objective == "es" else attr["gradients"]["score"]
+        g = g - g.mean()  # the component along sum(w) = 1 is removed by the projection anyway
+        norm = np.linalg.norm(g)
+        if norm == 0:
+            break
+        w = project_feasible(w - (step / np.sqrt(k + 1)) * g / norm, lower, upper, max_hhi)
+        attr = risk_attribution(R, w, alpha=alpha)
+        val = value(attr)
+        if val < best_val - 1e-12:
+            best_w, best_attr, best_val = w, attr, val
+            stale = 0
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+
+    best_w.setflags(write=False)
+    result = {
+        "weights": best_w,
+        "objective": objective,
+        "value": best_attr["metrics"][objective],
+        "metrics": best_attr["metrics"],
+        "iterations": iterations,
+        "elapsed_ms": 1000 * (time.perf_counter() - start),
+    }
+    _optimizer_cache.put(key, result)
+    return {**result, "metrics": dict(result["metrics"]), "cached": False}
+
+
+def optimizer_cache_stats() -> dict:
+    return _optimizer_cache.stats()
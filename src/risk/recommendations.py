@@ -1,17 +1,31 @@
 import numpy as np
 
+# Score thresholds of the fixed recommendation logic: below MEDIUM -> LOW, at/above HIGH -> HIGH.
+MEDIUM_THRESHOLD = 0.33
+HIGH_THRESHOLD = 0.66
+
 def recommendation_from_score(score: float):
     """
     Fixed recommendation logic (controlled variable for your study).
     """
-    if score < 0.33:
+    if score < MEDIUM_THRESHOLD:
         return "LOW", "Maintain allocation", "Risk appears manageable given current metrics."
-    elif score < 0.66:
+    elif score < HIGH_THRESHOLD:
         return "MEDIUM", "Rebalance toward diversification", "Moderate risk; consider reducing concentration and downside exposure."
     else:
         return "HIGH", "Reduce exposure / increase safety buffer", "High risk; consider de-risking or hedging to reduce downside."
 
-def explanation_text(hhi, semidev, mdd, var, es, score):
+def risk_levels(scores) -> np.ndarray:
+    """Vectorized risk level ("LOW"/"MEDIUM"/"HIGH") for an array of scores."""
+    scores = np.asarray(scores, dtype=float)
+    return np.where(scores < MEDIUM_THRESHOLD, "LOW", np.where(scores < HIGH_THRESHOLD, "MEDIUM", "HIGH"))
+
+def explanation_text(hhi, semidev, mdd, var, es, score, contributors=None):
+    """Rule-based explanation bullets.
+
+    contributors: optional [(asset index, share of score)] from
+    src.risk.attribution.top_contributors, cited in the last bullet.
+    """
     parts = []
     if hhi >= 0.45:
         parts.append("• Concentration is high (HHI suggests the portfolio is dominated by few holdings).")
@@ -40,6 +54,9 @@ def explanation_text(hhi, semidev, mdd, var, es, score):
         parts.append("• Expected shortfall indicates heavy losses in the worst tail events.")
 
     parts.append(f"• Combined risk score: {score:.2f} (fixed rule-based blend for controlled evaluation).")
+    if contributors:
+        cited = ", ".join(f"Asset {i + 1} ({share:.0%})" for i, share in contributors)
+        parts.append(f"• Largest contributors to the risk score: {cited}.")
     return "\n".join(parts)
 
 def counterfactual_suggestion(hhi, semidev, mdd, var, es, score):
@@ -0,0 +1,170 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Rolling windows shown on the dashboard, in hourly bars.
+ROLLING_WINDOWS = {"24h": 24, "7d": 168, "30d": 720}
+
+
+class _Fenwick:
+    """Binary indexed tree over value ranks: counts and sums of the values in the window."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.counts = [0] * (size + 1)
+        self.sums = [0.0] * (size + 1)
+        self.top = 1 << (size.bit_length() - 1) if size else 0
+
+    def add(self, rank: int, value: float, sign: int):
+        i = rank + 1
+        while i <= self.size:
+            self.counts[i] += sign
+            self.sums[i] += sign * value
+            i += i & -i
+
+    def smallest(self, k: int):
+        """Rank of the k-th smallest value in the window (1-based k) and the sum of the k - 1 below it."""
+        pos, remaining, total = 0, k, 0.0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.counts[nxt] < remaining:
+                pos = nxt
+                remaining -= self.counts[nxt]
+                total += self.sums[nxt]
+            step >>= 1
+        return pos, total
+
+
+def rolling_var_es(returns: np.ndarray, window: int, alpha: float = 0.05):
+    """Historical VaR/ES over every trailing window of `window` returns.
+
+    Values are ranked once (O(T log T)); each step then inserts one rank, removes one and
+    selects the order statistic idx = max(0, floor(alpha*window) - 1) in a Fenwick tree,
+    O(log T) per step. VaR equals historical_var_es on each window exactly; ES is the
+    tree's prefix sum and agrees to floating-point rounding.
+
+    Returns:
+        Two (T,) arrays (VaR, ES), NaN until the first full window.
+    """
+    r = np.asarray(returns, dtype=float)
+    T = len(r)
+    var = np.full(T, np.nan)
+    es = np.full(T, np.nan)
+    if window <= 0 or T < window:
+        return var, es
+
+    order = np.argsort(r, kind="stable")
+    ranks = np.empty(T, dtype=np.int64)
+    ranks[order] = np.arange(T)
+    sorted_vals = r[order]
+    k = max(0, int(np.floor(alpha * window)) - 1) + 1
+
+    tree = _Fenwick(T)
+    ranks_list = ranks.tolist()
+    values = r.tolist()
+    for t in range(T):
+        tree.add(ranks_list[t], values[t], 1)
+        if t >= window:
+            tree.add(ranks_list[t - window], values[t - window], -1)
+        if t >= window - 1:
+            pos, total = tree.smallest(k)
+            var[t] = sorted_vals[pos]
+            es[t] = (total + sorted_vals[pos]) / k
+    return var, es
+
+
+def rolling_semidev(returns: np.ndarray, window: int, mar: float = 0.0) -> np.ndarray:
+    """downside_semidev over every trailing window, from cumulative sums in O(T)."""
+    r = np.asarray(returns, dtype=float)
+    out = np.full(len(r), np.nan)
+    if window <= 0 or len(r) < window:
+        return out
+    sq = np.minimum(0.0, r - mar) ** 2
+    csum = np.concatenate([[0.0], np.cumsum(sq)])
+    out[window - 1:] = np.sqrt(np.maximum(csum[window:] - csum[:-window], 0.0) / window)
+    return out
+
+
+def rolling_drawdown(returns: np.ndarray, window: int) -> np.ndarray:
+    """Current drawdown from the peak equity of the trailing window (monotonic deque, O(T))."""
+    r = np.asarray(returns, dtype=float)
+    equity = np.cumprod(1 + r).tolist()
+    out = np.full(len(r), np.nan)
+    peaks = deque()  # indices with decreasing equity; the front is the window peak
+    for t, e in enumerate(equity):
+        while peaks and equity[peaks[-1]] <= e:
+            peaks.pop()
+        peaks.append(t)
+        if peaks[0] <= t - window:
+            peaks.popleft()
+        if t >= window - 1:
+            out[t] = (e - equity[peaks[0]]) / equity[peaks[0]]
+    return out
+
+
+def _combine(a, b):
+    # a precedes b in time. Each summary is (max log-equity, min log-equity, worst drop).
+    return max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2], b[1] - a[0])
+
+
+def rolling_max_drawdown(returns: np.ndarray, window: int) -> np.ndarray:
+    """max_drawdown over every trailing window in amortized O(1) per step.
+
+    The worst peak-to-trough drop inside a window is an associative summary of
+    (max, min, worst drop) over log-equity, so the window is kept as a two-stack queue
+    (the sliding-window counterpart of a monotonic deque): the front stack stores suffix
+    summaries, the back stack one running prefix summary. Agrees with max_drawdown on each
+    window to floating-point rounding.
+    """
+    r = np.asarray(returns, dtype=float)
+    T = len(r)
+    out = np.full(T, np.nan)
+    if window <= 0 or T < window:
+        return out
+
+    log_eq = np.cumsum(np.log1p(r)).tolist()
+    front = []  # suffix summaries of the oldest elements, newest at index 0
+    back = []   # raw log-equity values of the newest elements
+    back_agg = None
+    for t in range(T):
+        x = log_eq[t]
+        item = (x, x, 0.0)
+        back.append(x)
+        back_agg = item if back_agg is None else _combine(back_agg, item)
+        if t >= window:
+            if not front:
+                agg = None
+                for v in reversed(back):
+                    agg = (v, v, 0.0) if agg is None else _combine((v, v, 0.0), agg)
+                    front.append(agg)
+                back.clear()
+                back_agg = None
+            front.pop()
+        if t >= window - 1:
+            if front and back_agg is not None:
+                summary = _combine(front[-1], back_agg)
+            else:
+                summary = front[-1] if front else back_agg
+            out[t] = np.expm1(summary[2])
+    return out
+
+
+def rolling_risk_metrics(returns: np.ndarray, window: int, alpha: float = 0.05, dates=None) -> pd.DataFrame:
+    """Rolling VaR, ES, semideviation and max drawdown for one window length.
+
+    Returns:
+        A DataFrame with columns "var", "es", "semidev", "mdd" (NaN before the first full
+        window), indexed by `dates` when given.
+    """
+    var, es = rolling_var_es(returns, window, alpha=alpha)
+    return pd.DataFrame(
+        {
+            "var": var,
+            "es": es,
+            "semidev": rolling_semidev(returns, window),
+            "mdd": rolling_max_drawdown(returns, window),
+        },
+        index=dates,
+    )
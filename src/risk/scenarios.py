@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from src.risk.batch import normalize_weight_matrix
+from src.risk.simulation import get_market_data, market_data_version
+from src.utils.cache import ByteLRUCache
+
+# Stress windows in hourly bars.
+SCENARIO_WINDOWS = {"24h": 24, "72h": 72, "7d": 168}
+DEFAULT_TOP_K = 5
+SCENARIO_CACHE_MAX_BYTES = 16 * 1024 * 1024
+_scenario_cache = ByteLRUCache(SCENARIO_CACHE_MAX_BYTES, sizeof=lambda library: library["returns"].nbytes)
+
+
+def worst_windows(returns: np.ndarray, window: int, top_k: int) -> np.ndarray:
+    """Start indices of the top_k worst non-overlapping windows of a return series.
+
+    Windows are ranked by compounded return (a rolling sum of log returns); the worst is
+    taken first and any window overlapping an accepted one is skipped.
+    """
+    r = np.asarray(returns, dtype=float)
+    if window <= 0 or len(r) < window:
+        return np.array([], dtype=np.int64)
+    csum = np.concatenate([[0.0], np.cumsum(np.log1p(r))])
+    window_logret = csum[window:] - csum[:-window]
+    blocked = np.zeros(len(window_logret), dtype=bool)
+    starts = []
+    for s in np.argsort(window_logret, kind="stable").tolist():
+        if blocked[s]:
+            continue
+        starts.append(s)
+        blocked[max(0, s - window + 1): s + window] = True
+        if len(starts) == top_k:
+            break
+    return np.array(starts, dtype=np.int64)
+
+
+def build_scenario_library(asset_returns: np.ndarray, dates=None, windows: dict = None,
+                           top_k: int = DEFAULT_TOP_K, benchmark: int = 0) -> dict:
+    """Extracts the worst historical windows into one indexed scenario tensor.
+
+    Windows are selected on the `benchmark` column (column 0 is ETH in get_market_data).
+    All scenarios share one zero-padded (S x L_max x N) tensor: a zero return leaves the
+    compounded value unchanged, so windows of different lengths can be applied together.
+
+    Returns:
+        A dict with "returns" (S x L_max x N), and per scenario "label", "bars", "start"
+        and "end" (dates, or bar indices without `dates`), "benchmark_return".
+    """
+    R = np.asarray(asset_returns, dtype=float)
+    windows = windows or SCENARIO_WINDOWS
+    rows = []
+    for label, bars in windows.items():
+        for rank, s in enumerate(worst_windows(R[:, benchmark], bars, top_k).tolist()):
+            rows.append((f"Worst {label} #{rank + 1}", bars, s))
+
+    L = max((bars for _, bars, _ in rows), default=0)
+    tensor = np.zeros((len(rows), L, R.shape[1]))
+    for i, (_, bars, s) in enumerate(rows):
+        tensor[i, :bars] = R[s: s + bars]
+    tensor.setflags(write=False)
+
+    index = dates if dates is not None else np.arange(len(R))
+    return {
+        "returns": tensor,
+        "label": [label for label, _, _ in rows],
+        "bars": np.array([bars for _, bars, _ in rows], dtype=np.int64),
+        "start": [index[s] for _, _, s in rows],
+        "end": [index[s + bars - 1] for _, bars, s in rows],
+        "benchmark_return": np.prod(1 + tensor[:, :, benchmark], axis=1) - 1,
+    }
+
+
+def get_scenario_library(n_assets: int, n_periods: int, seed: int = 7, top_k: int = DEFAULT_TOP_K) -> dict:
+    """Scenario library for the dashboard dataset, cached per data version.
+
+    The windows are the worst of the whole return history, not just of the `n_periods`
+    bars a snapshot analyses, so the library does not change with the lookback and is
+    built once per market data version (and asset set: the synthetic assets depend on
+    `n_assets` and `seed`). `n_periods` is only the history length used when the data file
+    is missing.
+    """
+    version = market_data_version()
+    # The version ends with the bar count; there is one return fewer.
+    history = version[-1] - 1 if version is not None else int(n_periods)
+    key = (int(n_assets), int(seed), int(top_k), version)
+
+    def build():
+        asset_returns, dates = get_market_data(n_assets=n_assets, n_periods=history, seed=seed)
+        return build_scenario_library(asset_returns, dates, top_k=top_k)
+
+    return _scenario_cache.get_or_create(key, build)
+
+
+def apply_scenarios(library: dict, weights) -> dict:
+    """Replays every scenario for one weight vector (N,) or a batch (M x N).
+
+    One contraction over the scenario tensor gives all portfolio paths; they are then
+    compounded along time.
+
+    Returns:
+        A dict with "return" (compounded scenario return) and "trough" (worst cumulative
+        point within the window), each (S,) for one weight vector or (M x S) for a batch.
+    """
+    W = normalize_weight_matrix(weights)
+    paths = np.einsum("sln,mn->msl", library["returns"], W)
+    equity = np.cumprod(1 + paths, axis=2)
+    out = {
+        "return": equity[:, :, -1] - 1 if equity.shape[2] else np.zeros(paths.shape[:2]),
+        "trough": equity.min(axis=2, initial=1.0) - 1,
+    }
+    if np.ndim(weights) == 1:
+        out = {k: v[0] for k, v in out.items()}
+    return out
+
+
+def scenario_table(library: dict, weights) -> pd.DataFrame:
+    """One row per scenario: window, dates, benchmark (ETH) and portfolio outcome."""
+    replay = apply_scenarios(library, weights)
+    return pd.DataFrame({
+        "Scenario": library["label"],
+        "Start": library["start"],
+        "End": library["end"],
+        "ETH Return": library["benchmark_return"],
+        "Portfolio Return": replay["return"],
+        "Portfolio Worst Point": replay["trough"],
+    })
@@ -25,3 +25,19 @@ def risk_score(hhi: float, semidev: float, mdd: float, var: float, es: float) ->
     es_n = clamp01((-es) / 0.05) if not np.isnan(es) else 0.0
     score = 0.25 * hhi_n + 0.25 * sd_n + 0.25 * mdd_n + 0.15 * var_n + 0.10 * es_n
     return float(clamp01(score))
+
+
+def risk_score_array(hhi, semidev, mdd, var, es) -> np.ndarray:
+    """Vectorized risk_score over arrays of metrics (one entry per portfolio).
+
+    Same normalization and weights as risk_score; NaN VaR/ES contribute 0.
+    """
+    var = np.asarray(var, dtype=float)
+    es = np.asarray(es, dtype=float)
+    hhi_n = np.clip((np.asarray(hhi, dtype=float) - 0.2) / (0.6 - 0.2), 0.0, 1.0)
+    sd_n = np.clip(np.asarray(semidev, dtype=float) / 0.03, 0.0, 1.0)
+    mdd_n = np.clip((-np.asarray(mdd, dtype=float)) / 0.30, 0.0, 1.0)
+    var_n = np.where(np.isnan(var), 0.0, np.clip((-var) / 0.05, 0.0, 1.0))
+    es_n = np.where(np.isnan(es), 0.0, np.clip((-es) / 0.05, 0.0, 1.0))
+    score = 0.25 * hhi_n + 0.25 * sd_n + 0.25 * mdd_n + 0.15 * var_n + 0.10 * es_n
+    return np.clip(score, 0.0, 1.0)
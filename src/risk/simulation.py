@@ -1,19 +1,624 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
 import numpy as np
 import pandas as pd
-import os
 
-def get_market_data(n_assets: int, n_periods: int, seed: int = 7):
+from src.utils.cache import ByteLRUCache
+
+# src/risk/simulation.py -> src/risk -> src -> app root
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DATA_DIR = os.path.join(APP_ROOT, "data")
+DATA_PATH = os.path.join(DATA_DIR, "eth_usdt_1h.csv")
+
+# Columns kept in the binary store. Timestamps are stored separately as int64 ns (UTC).
+STORE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+STORE_VERSION = 1
+
+# Supported bar sizes (the CSVs are hourly; coarser bars are resampled on the fly).
+BAR_SIZES_NS = {
+    "1h": 3600 * 10**9,
+    "4h": 4 * 3600 * 10**9,
+    "1d": 24 * 3600 * 10**9,
+}
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _store_dir(csv_path: str) -> str:
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path), ".cache", stem)
+
+
+def _parse_csv(csv_path: str):
+    """Parses a yfinance-style OHLCV CSV into int64 timestamps and float64 columns.
+
+    yfinance to_csv produces a multi-row header (Ticker / Price / Datetime), so the file
+    is read with a two-level header and the ticker level is dropped. A plain single-level
+    header is accepted as a fallback.
+
+    Returns:
+        A tuple (ts, columns, symbol) where ts is an (T,) int64 array of UTC nanoseconds,
+        columns maps each of STORE_COLUMNS to a (T,) float64 array, and symbol is the ticker
+        (or None if the file has no ticker row).
     """
-    Loads real ETH/USDT data from CSV.
+    df = pd.read_csv(csv_path, header=[0, 1], index_col=0, parse_dates=True)
+    symbol = None
+    if isinstance(df.columns, pd.MultiIndex) and "Close" in df.columns.get_level_values(1):
+        symbol = str(df.columns[0][0])
+        df.columns = df.columns.droplevel(0)
+    else:
+        # Try single level if formatting is different
+        df = pd.read_csv(csv_path, header=0, index_col=0, parse_dates=True)
+        if "Close" not in df.columns:
+            raise ValueError("Close column not found")
+
+    index = pd.to_datetime(df.index, utc=True)
+    ts = index.asi8.astype(np.int64)
+    columns = {}
+    for name in STORE_COLUMNS:
+        if name in df.columns:
+            columns[name] = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+        else:
+            columns[name] = np.full(len(df), np.nan)
+    return ts, columns, symbol
+
+
+def _csv_price_columns(csv_path: str) -> list:
+    """The price columns of a CSV as they appear in its header (the layout _parse_csv reads)."""
+    df = pd.read_csv(csv_path, header=[0, 1], index_col=0, nrows=0)
+    if isinstance(df.columns, pd.MultiIndex) and "Close" in df.columns.get_level_values(1):
+        return [str(name) for name in df.columns.get_level_values(1)]
+    return [str(name) for name in pd.read_csv(csv_path, header=0, index_col=0, nrows=0).columns]
+
+
+def _build_store(csv_path: str, store_dir: str, meta: dict):
+    ts, columns, symbol = _parse_csv(csv_path)
+
+    # Clean data once at build time: forward/back fill closes, then simple returns.
+    # Same arithmetic as prices.ffill().bfill().pct_change().dropna().
+    close = pd.Series(columns["Close"]).ffill().bfill().to_numpy()
+    returns = close[1:] / close[:-1] - 1.0
+
+    meta = dict(meta, symbol=symbol, n_rows=int(len(ts)))
+    parent = os.path.dirname(store_dir)
+    os.makedirs(parent, exist_ok=True)
+    # Write into a temp dir and swap it in, so readers never see a half-written store.
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        np.save(os.path.join(tmp_dir, "ts.npy"), ts)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+        np.save(os.path.join(tmp_dir, "returns.npy"), returns)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # A directory cannot be renamed over a non-empty one, so the old store is renamed
+        # aside first and deleted only after the swap (open memory maps stay valid).
+        old_dir = None
+        if os.path.isdir(store_dir):
+            old_dir = tmp_dir + ".old"
+            os.replace(store_dir, old_dir)
+        try:
+            os.replace(tmp_dir, store_dir)
+        except BaseException:
+            if old_dir is not None:
+                os.replace(old_dir, store_dir)
+            raise
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _read_meta(store_dir: str):
+    try:
+        with open(os.path.join(store_dir, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(store_dir: str, meta: dict):
+    # Temp file + rename, so a concurrent reader sees the old or the new meta.json, never a partial one.
+    path = os.path.join(store_dir, "meta.json")
+    fd, tmp = tempfile.mkstemp(prefix=".meta-", suffix=".json", dir=store_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _open_store(store_dir: str, meta: dict) -> dict:
+    store = {"ts": np.load(os.path.join(store_dir, "ts.npy"), mmap_mode="r")}
+    for name in STORE_COLUMNS:
+        store[name] = np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+    store["returns"] = np.load(os.path.join(store_dir, "returns.npy"), mmap_mode="r")
+    store["symbol"] = meta.get("symbol")
+    return store
+
+
+def load_market_store(csv_path: str = DATA_PATH) -> dict:
+    """Returns the parse-once binary store for an OHLCV CSV.
+
+    The CSV is parsed a single time into `.npy` columns under `<data dir>/.cache/<stem>/`
+    (int64 UTC-nanosecond timestamps, float64 OHLCV, float64 close-to-close returns) which
+    are then opened memory-mapped. The store is rebuilt only when the CSV's content hash
+    changes; a changed mtime alone triggers a re-hash, not a re-parse.
+
+    Args:
+        csv_path: Path to the yfinance-style CSV.
+
+    Returns:
+        A dict with read-only arrays "ts", each of STORE_COLUMNS, and "returns" (aligned to
+        ts[1:]), plus the ticker under "symbol".
+    """
+    stat = os.stat(csv_path)
+    store_dir = _store_dir(csv_path)
+    meta = _read_meta(store_dir)
+
+    valid = meta is not None and meta.get("version") == STORE_VERSION
+    if valid and (meta.get("mtime_ns") != stat.st_mtime_ns or meta.get("size") != stat.st_size):
+        digest = _file_sha256(csv_path)
+        valid = meta.get("sha256") == digest and meta.get("size") == stat.st_size
+        if valid:
+            # Touched but unchanged: refresh the recorded mtime so we skip hashing next time.
+            meta["mtime_ns"] = stat.st_mtime_ns
+            try:
+                _write_meta(store_dir, meta)
+            except OSError:
+                pass
+
+    if not valid:
+        meta = {
+            "version": STORE_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": _file_sha256(csv_path),
+        }
+        try:
+            _build_store(csv_path, store_dir, meta)
+        except OSError as e:
+            # Read-only data directory: serve the parsed arrays from memory instead.
+            print(f"Warning: could not write market data store ({e}). Using in-memory arrays.")
+            ts, columns, symbol = _parse_csv(csv_path)
+            close = pd.Series(columns["Close"]).ffill().bfill().to_numpy()
+            return dict(columns, ts=ts, returns=close[1:] / close[:-1] - 1.0, symbol=symbol)
+        meta = _read_meta(store_dir)
+
+    return _open_store(store_dir, meta)
+
+
+def _store_dates(ts: np.ndarray) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(np.asarray(ts).view("M8[ns]"), name="Datetime").tz_localize("UTC")
+
+
+# Process-wide, read-only market data shared by every Streamlit session (keyed by CSV path).
+_shared_lock = threading.Lock()
+_shared_data = {}
+_reload_listeners = []
+
+
+def _file_key(csv_path: str):
+    stat = os.stat(csv_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_shared(csv_path: str) -> dict:
+    data = load_market_store(csv_path)
+    for value in data.values():
+        if isinstance(value, np.ndarray) and value.flags.writeable:
+            value.setflags(write=False)
+    data["dates"] = _store_dates(data["ts"])
+    data["return_dates"] = data["dates"][1:]
+    return data
+
+
+def get_shared_market_data(csv_path: str = DATA_PATH) -> dict:
+    """Returns the process-wide, read-only market dataset for `csv_path`.
+
+    The dataset is loaded lazily on first use (double-checked under a lock, so concurrent
+    sessions load it once) and reloaded when the file's mtime or size changes. All arrays
+    are read-only; callers must copy before modifying.
+
+    Returns:
+        The dict from load_market_store plus "dates" (DatetimeIndex for every bar) and
+        "return_dates" (DatetimeIndex aligned to "returns").
+    """
+    key = _file_key(csv_path)
+    entry = _shared_data.get(csv_path)
+    if entry is not None and entry["key"] == key:
+        return entry["data"]
+
+    with _shared_lock:
+        entry = _shared_data.get(csv_path)
+        if entry is not None and entry["key"] == key:
+            return entry["data"]
+        reloaded = entry is not None
+        data = _load_shared(csv_path)
+        _shared_data[csv_path] = {"key": key, "data": data}
+
+    if reloaded:
+        for callback in list(_reload_listeners):
+            callback(csv_path)
+    return data
+
+
+def reload_market_data(csv_path: str = DATA_PATH) -> dict:
+    """Forces the shared dataset for `csv_path` to be reloaded and notifies listeners."""
+    with _shared_lock:
+        _shared_data.pop(csv_path, None)
+    data = get_shared_market_data(csv_path)
+    for callback in list(_reload_listeners):
+        callback(csv_path)
+    return data
+
+
+def market_data_version(csv_path: str = DATA_PATH):
+    """Identifies the current contents of the shared dataset (file state and bar count).
+
+    Caches of values derived from get_market_data include this in their keys so appended
+    or reloaded bars are never served stale. None when the data file is missing.
+    """
+    if not os.path.exists(csv_path):
+        return None
+    data = get_shared_market_data(csv_path)
+    return _file_key(csv_path) + (len(data["ts"]),)
+
+
+def add_reload_listener(callback):
+    """Registers `callback(csv_path)` to run after the shared dataset is reloaded.
+
+    Used by caches derived from the market data so they can drop stale entries.
+    """
+    if callback not in _reload_listeners:
+        _reload_listeners.append(callback)
+
+
+def _grow(buffer, used: int, values: np.ndarray) -> np.ndarray:
+    """Writes `values` after the first `used` slots, doubling capacity when full."""
+    needed = used + len(values)
+    if buffer is None or len(buffer) < needed:
+        grown = np.empty(max(needed, 2 * used, 1024), dtype=values.dtype)
+        if buffer is not None:
+            grown[:used] = buffer[:used]
+        buffer = grown
+    buffer[used:needed] = values
+    return buffer
+
+
+def append_market_bars(new_bars: pd.DataFrame, csv_path: str = DATA_PATH, persist: bool = False) -> np.ndarray:
+    """Appends bars to the shared dataset without reloading or re-parsing it.
+
+    Columns live in private buffers that double in capacity, so an append costs
+    O(new bars) amortized; sessions holding earlier arrays keep seeing their own
+    consistent (shorter) views. Derived caches keyed on the data length pick up the new
+    bars on their next lookup.
+
+    Args:
+        new_bars: DataFrame with a "Datetime" column and STORE_COLUMNS, the same shape
+                  get_full_market_data returns. Timestamps must be after the last bar.
+        csv_path: Dataset to extend.
+        persist: Also append the rows to the CSV (the binary store is then rebuilt on the
+                 next process start, when the file hash no longer matches).
+
+    Returns:
+        The close-to-close returns added to the dataset's "returns" array.
+    """
+    ts_new = pd.DatetimeIndex(pd.to_datetime(new_bars["Datetime"], utc=True)).asi8.astype(np.int64)
+    columns_new = {
+        name: pd.to_numeric(new_bars[name], errors="coerce").to_numpy(dtype=np.float64)
+        if name in new_bars else np.full(len(ts_new), np.nan)
+        for name in STORE_COLUMNS
+    }
+    get_shared_market_data(csv_path)
+
+    with _shared_lock:
+        entry = _shared_data[csv_path]
+        data = entry["data"]
+        used = len(data["ts"])
+        if len(ts_new) == 0:
+            return np.array([])
+        if np.any(np.diff(ts_new) <= 0) or (used and ts_new[0] <= data["ts"][-1]):
+            raise ValueError("Appended bars must have strictly increasing timestamps after the last bar")
+
+        buffers = entry.setdefault("buffers", {})
+        if "last_close" not in entry:
+            entry["last_close"] = pd.Series(data["Close"]).ffill().iloc[-1] if used else np.nan
+        filled = pd.Series(np.r_[entry["last_close"], columns_new["Close"]]).ffill().bfill().to_numpy()
+        returns_new = filled[1:] / filled[:-1] - 1.0 if used else filled[2:] / filled[1:-1] - 1.0
+        entry["last_close"] = filled[-1]
+
+        updated = dict(data)
+        for name, values in [("ts", ts_new), ("returns", returns_new)] + list(columns_new.items()):
+            current = len(data[name])
+            buffers[name] = _grow(buffers.get(name, data[name]), current, values)
+            view = buffers[name][:current + len(values)]
+            view.setflags(write=False)
+            updated[name] = view
+        updated["dates"] = _store_dates(updated["ts"])
+        updated["return_dates"] = updated["dates"][1:]
+
+        if persist:
+            # Written in the file's own column order; columns we do not store (e.g. "Adj
+            # Close") are taken from new_bars when given, else left empty.
+            rows = pd.DataFrame({
+                name: columns_new[name] if name in columns_new
+                else (new_bars[name].to_numpy() if name in new_bars else np.full(len(ts_new), np.nan))
+                for name in _csv_price_columns(csv_path)
+            }, index=pd.DatetimeIndex(_store_dates(ts_new)))
+            rows.to_csv(csv_path, mode="a", header=False)
+            entry["key"] = _file_key(csv_path)
+        entry["data"] = updated
+
+    return returns_new
+
+
+def _process_rss_bytes():
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+
+def market_data_memory_usage() -> dict:
+    """Reports the footprint of the shared market data.
+
+    Returns:
+        A dict with "datasets" (number of loaded files), "array_bytes" (total size of the
+        shared arrays), "mapped_bytes" (the part backed by the memory-mapped store, whose
+        pages the OS shares) and "process_rss_bytes" (current resident set size, or None
+        where /proc is unavailable).
+    """
+    array_bytes = 0
+    mapped_bytes = 0
+    with _shared_lock:
+        entries = list(_shared_data.values())
+    for entry in entries:
+        for value in entry["data"].values():
+            if isinstance(value, np.ndarray):
+                array_bytes += value.nbytes
+                if isinstance(value, np.memmap) or isinstance(value.base, np.memmap):
+                    mapped_bytes += value.nbytes
+    return {
+        "datasets": len(entries),
+        "array_bytes": int(array_bytes),
+        "mapped_bytes": int(mapped_bytes),
+        "process_rss_bytes": _process_rss_bytes(),
+    }
+
+
+def _close_returns(close: np.ndarray) -> np.ndarray:
+    # Same arithmetic as prices.ffill().bfill().pct_change().dropna().
+    filled = pd.Series(close).ffill().bfill().to_numpy()
+    return filled[1:] / filled[:-1] - 1.0
+
+
+# data_dir -> {"key": per-file (path, mtime_ns, size), "panel": symbol -> path}.
+_panel_cache = {}
+
+
+def load_market_panel(data_dir: str = DATA_DIR) -> dict:
+    """Indexes every yfinance-style CSV in `data_dir` as one symbol, in a single pass.
+
+    Each file gets its own binary store (see load_market_store) and is served from the
+    shared, read-only dataset. Symbols come from the CSV's ticker row; when two files carry
+    the same ticker, or there is none, the file stem is used instead.
+
+    The index is cached per directory and rebuilt only when a CSV is added, removed or
+    changes (by mtime and size), so repeated queries do not reopen every store.
+
+    Returns:
+        A dict mapping symbol -> CSV path, in sorted file order.
+    """
+    with os.scandir(data_dir) as entries:
+        files = sorted(
+            (entry.path, _file_key(entry.path)) for entry in entries if entry.name.lower().endswith(".csv")
+        )
+    key = tuple(files)
+    entry = _panel_cache.get(data_dir)
+    if entry is not None and entry["key"] == key:
+        return dict(entry["panel"])
+
+    paths = [path for path, _ in files]
+    tickers = {path: get_shared_market_data(path).get("symbol") for path in paths}
+    counts = {}
+    for ticker in tickers.values():
+        counts[ticker] = counts.get(ticker, 0) + 1
+
+    panel = {}
+    for path, ticker in tickers.items():
+        symbol = ticker if ticker and counts[ticker] == 1 else os.path.splitext(os.path.basename(path))[0]
+        panel[symbol] = path
+    _panel_cache[data_dir] = {"key": key, "panel": panel}
+    return dict(panel)
+
+
+RESAMPLE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_resample_cache = ByteLRUCache(RESAMPLE_CACHE_MAX_BYTES)
+add_reload_listener(lambda csv_path: _resample_cache.clear())
+
+
+def _resample_ohlcv(data: dict, bar_ns: int) -> dict:
+    """Aggregates bars into UTC-epoch-aligned buckets of `bar_ns` with reduceat.
+
+    Open is the first bar's open, High/Low the bucket max/min, Close the last (filled)
+    close and Volume the sum. Buckets without any source bar are not emitted.
+    """
+    ts = np.asarray(data["ts"])
+    if len(ts) == 0:
+        return {name: np.asarray(data[name]) for name in ("ts",) + STORE_COLUMNS}
+    buckets = ts - ts % bar_ns
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    close = pd.Series(data["Close"]).ffill().bfill().to_numpy()
+    return {
+        "ts": buckets[starts],
+        "Open": np.asarray(data["Open"])[starts],
+        "High": np.maximum.reduceat(data["High"], starts),
+        "Low": np.minimum.reduceat(data["Low"], starts),
+        "Close": close[ends],
+        "Volume": np.add.reduceat(data["Volume"], starts),
+    }
+
+
+def get_symbol_bars(csv_path: str, bar: str = "1h") -> dict:
+    """OHLCV bars and close-to-close returns for one file at bar size `bar`.
+
+    Hourly bars are the shared store itself (no copy); coarser bars are resampled once and
+    cached, keyed by file and bar size.
+
+    Returns:
+        A dict with "ts" and STORE_COLUMNS arrays plus "returns" aligned to ts[1:].
+    """
+    if bar not in BAR_SIZES_NS:
+        raise ValueError(f"Unsupported bar size {bar!r}; expected one of {sorted(BAR_SIZES_NS)}")
+    data = get_shared_market_data(csv_path)
+    if bar == "1h":
+        return data
+
+    def build():
+        bars = _resample_ohlcv(data, BAR_SIZES_NS[bar])
+        bars["returns"] = _close_returns(bars["Close"])
+        for value in bars.values():
+            value.setflags(write=False)
+        return bars
+
+    return _resample_cache.get_or_create((csv_path, _file_key(csv_path), len(data["ts"]), bar), build)
+
+
+def _utc_ns(value) -> int:
+    # Naive bounds are taken as UTC; aware ones are converted.
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.value
+
+
+def _range_slice(ts: np.ndarray, start=None, end=None) -> slice:
+    lo = 0 if start is None else int(np.searchsorted(ts, _utc_ns(start), side="left"))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, _utc_ns(end), side="right"))
+    return slice(lo, hi)
+
+
+def query_market_data(symbols=None, start=None, end=None, bar: str = "1h", data_dir: str = DATA_DIR) -> dict:
+    """Aligned multi-symbol OHLCV for a datetime range and bar size.
+
+    Symbols are aligned on the union of their bar timestamps; a symbol with no bar at a
+    timestamp gets NaN there. Range bounds are inclusive and naive datetimes are taken as UTC.
+
+    Args:
+        symbols: Symbols to include (default: every symbol in `data_dir`).
+        start: Optional first timestamp.
+        end: Optional last timestamp.
+        bar: One of BAR_SIZES_NS ("1h", "4h", "1d").
+        data_dir: Directory of yfinance-style CSVs.
+
+    Returns:
+        A dict with "symbols" (list), "dates" (DatetimeIndex) and one (T x S) float64
+        array per STORE_COLUMNS field.
+    """
+    panel = load_market_panel(data_dir)
+    symbols = list(panel) if symbols is None else list(symbols)
+    missing = [sym for sym in symbols if sym not in panel]
+    if missing:
+        raise KeyError(f"Unknown symbol(s) {missing}; available: {sorted(panel)}")
+
+    per_symbol = []
+    for sym in symbols:
+        bars = get_symbol_bars(panel[sym], bar)
+        sl = _range_slice(bars["ts"], start, end)
+        per_symbol.append({name: bars[name][sl] for name in ("ts",) + STORE_COLUMNS})
+
+    ts = per_symbol[0]["ts"] if len(per_symbol) == 1 else np.unique(np.concatenate([b["ts"] for b in per_symbol]))
+    out = {"symbols": symbols, "dates": _store_dates(ts)}
+    for name in STORE_COLUMNS:
+        matrix = np.full((len(ts), len(symbols)), np.nan)
+        for j, bars in enumerate(per_symbol):
+            matrix[np.searchsorted(ts, bars["ts"]), j] = bars[name]
+        out[name] = matrix
+    return out
+
+
+def get_symbol_returns(symbols, n_periods: int, bar: str = "1h", start=None, end=None, data_dir: str = DATA_DIR):
+    """Real, aligned close-to-close returns for several symbols.
+
+    Closes are forward-filled across the aligned timestamps and periods before every
+    symbol has a price are dropped, then the most recent `n_periods` are kept.
+
+    Returns:
+        A tuple ((T x S) returns, DatetimeIndex) like get_market_data.
+    """
+    data = query_market_data(symbols, start=start, end=end, bar=bar, data_dir=data_dir)
+    closes = pd.DataFrame(data["Close"], index=data["dates"]).ffill()
+    returns = (closes / closes.shift(1) - 1.0).iloc[1:].dropna()
+    returns = returns.iloc[-n_periods:]
+    return returns.to_numpy(), returns.index
+
+
+# Generated (T x N) synthetic return matrices, shared read-only across sessions.
+SYNTHETIC_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_synthetic_cache = ByteLRUCache(SYNTHETIC_CACHE_MAX_BYTES)
+add_reload_listener(lambda csv_path: _synthetic_cache.clear())
+
+
+def _generate_synthetic_assets(base_rets: np.ndarray, n_assets: int, seed: int) -> np.ndarray:
+    """Builds N-1 noisy clones of the base return series in one vectorized draw.
+
+    Each synthetic asset is base + noise + drift, with noise ~ N(0, (0.8 * vol)^2) per
+    period and a per-asset drift ~ N(0, 0.0001^2). Column 0 is the base series itself.
+    """
+    rng = np.random.default_rng(seed)
+    vol = np.std(base_rets)
+    noise = rng.normal(0, vol * 0.8, size=(len(base_rets), n_assets - 1))
+    drift_adj = rng.normal(0, 0.0001, size=n_assets - 1)
+
+    assets_rets = np.empty((len(base_rets), n_assets))
+    assets_rets[:, 0] = base_rets
+    assets_rets[:, 1:] = base_rets[:, None] + noise + drift_adj
+    assets_rets.setflags(write=False)
+    return assets_rets
+
+
+def synthetic_cache_stats() -> dict:
+    """Hit/miss/eviction counters and byte usage of the synthetic-asset cache."""
+    return _synthetic_cache.stats()
+
+
+def get_market_data(n_assets: int, n_periods: int, seed: int = 7, symbols=None, bar: str = "1h",
+                    start=None, end=None):
+    """
+    Loads real ETH/USDT data from the binary market-data store.
     If n_assets > 1, generates synthetic correlated assets based on ETH returns
     to simulate a crypto portfolio.
+
+    Passing `symbols` returns real aligned returns for those symbols from the CSVs in
+    data/ instead (one column per symbol, n_assets must match). `bar` ("1h", "4h", "1d")
+    and an inclusive `start`/`end` range apply to either path.
     """
-    # Go up 4 levels to get to project root: src/risk/simulation.py -> src/risk -> src -> hci_app -> project_root
-    # Path to the data file within the package (hci_app/data/eth_usdt_1h.csv)
-    # src/risk/simulation.py -> src/risk -> src -> hci_app
-    app_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    csv_path = os.path.join(app_root, "data/eth_usdt_1h.csv")
-    
+    csv_path = DATA_PATH
+
+    if symbols is not None:
+        if len(symbols) != n_assets:
+            raise ValueError(f"n_assets={n_assets} but {len(symbols)} symbols were requested")
+        return get_symbol_returns(symbols, n_periods, bar=bar, start=start, end=end)
+
     if not os.path.exists(csv_path):
         # Fallback to pure synthetic if file missing
         print(f"Warning: Data file not found at {csv_path}. Using random generation.")
@@ -23,67 +628,34 @@ def get_market_data(n_assets: int, n_periods: int, seed: int = 7):
         dates = pd.date_range(end=pd.Timestamp.now(), periods=n_periods, freq='H')
         return rng.normal(mus, sigmas, size=(n_periods, n_assets)), dates
 
-    # Read CSV
-    # yfinance to_csv produces a 3-row header structure effectively
-    # Row 0: Ticker
-    # Row 1: Price
-    # Row 2: Metadata (sometimes)
-    # We'll read carefully.
     try:
-        df = pd.read_csv(csv_path, header=[0, 1], index_col=0, parse_dates=True)
-        
-        # Depending on pandas version and read_csv, the header handling might vary.
-        # We look for 'Close' in the second level.
-        close_col = None
-        for col in df.columns:
-            if col[1] == 'Close':
-                close_col = col
-                break
-        
-        if close_col is None:
-            # Try single level if formatting is different
-            if 'Close' in df.columns:
-                prices = df['Close']
-            else:
-                raise ValueError("Close column not found")
-        else:
-            prices = df[close_col]
-            
-        # Clean data
-        prices = prices.ffill().bfill()
-        returns = prices.pct_change().dropna()
-        
+        bars = get_symbol_bars(csv_path, bar)
+        sl = _range_slice(bars["ts"][1:], start, end)
+
         # Slice to requested periods (take most recent)
-        # Note: dataset is ~6 months (~4300 hours)
-        if len(returns) > n_periods:
-            returns = returns.iloc[-n_periods:]
-        elif len(returns) < n_periods:
-            # If we don't have enough data, we MUST return what we have
-            # rather than failing or padding poorly.
-            pass 
-            
-        base_rets = returns.values.flatten()
-        
+        # Note: dataset is ~6 months (~4300 hours). If we don't have enough data,
+        # we return what we have rather than failing or padding poorly.
+        history = bars["returns"][sl]
+        base_rets = history[-n_periods:]
+        if bar == "1h":
+            dates = bars["return_dates"][sl][-n_periods:]
+        else:
+            dates = _store_dates(bars["ts"][1:][sl][-n_periods:])
+
         # Handle n_assets
         if n_assets == 1:
-            return base_rets.reshape(-1, 1), returns.index
-            
-        # Generate correlated assets
-        rng = np.random.default_rng(seed)
-        assets_rets = np.zeros((len(base_rets), n_assets))
-        assets_rets[:, 0] = base_rets
-        
-        vol = np.std(base_rets)
-        for i in range(1, n_assets):
-            # Create variations: some correlated, some noisier
-            # Noise level: 0.5 * volatility
-            noise = rng.normal(0, vol * 0.8, size=len(base_rets))
-            # Maybe some slight drift diff
-            drift_adj = rng.normal(0, 0.0001)
-            assets_rets[:, i] = base_rets + noise + drift_adj
-            
-        return assets_rets, returns.index
-        
+            return base_rets.reshape(-1, 1), dates
+
+        # Synthetic assets are drawn once over the whole range and then sliced, so an asset's
+        # return at a given bar does not depend on the lookback: a snapshot and the stress
+        # scenarios (full history) see the same matrix.
+        first = bars["ts"][1:][sl][0] if len(history) else None
+        assets_rets = _synthetic_cache.get_or_create(
+            (csv_path, n_assets, len(history), seed, bar, first),
+            lambda: _generate_synthetic_assets(history, n_assets, seed),
+        )
+        return assets_rets[len(assets_rets) - len(base_rets):], dates
+
     except Exception as e:
         print(f"Error reading market data: {e}")
         # Fallback
@@ -92,12 +664,84 @@ def get_market_data(n_assets: int, n_periods: int, seed: int = 7):
         dates = pd.date_range(end=pd.Timestamp.now(), periods=n_periods, freq='H')
         return rng.normal(0.0003, 0.01, size=(n_periods, n_assets)), dates
 
-def get_full_market_data():
-    app_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    csv_path = os.path.join(app_root, "data/eth_usdt_1h.csv")
-    df = pd.read_csv(csv_path, header=[0, 1], index_col=0, parse_dates=True)
-    df.columns = df.columns.droplevel(0)
-    df.reset_index(inplace=True)
-    df['Datetime'] = pd.to_datetime(df['Datetime'])
-    return df
 
+def constant_correlation(n_assets: int, rho: float) -> np.ndarray:
+    """Builds an (N x N) correlation matrix with a common off-diagonal correlation `rho`."""
+    corr = np.full((n_assets, n_assets), float(rho))
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def cholesky_factor(corr, vols) -> np.ndarray:
+    """Lower-triangular L with L @ L.T equal to the covariance diag(vols) corr diag(vols).
+
+    A target matrix that is not positive definite (e.g. hand-edited or estimated from short
+    samples) is repaired by clipping its eigenvalues and rescaling to a unit diagonal.
+    """
+    corr = np.asarray(corr, dtype=float)
+    vols = np.asarray(vols, dtype=float)
+    n = len(vols)
+    if corr.shape != (n, n):
+        raise ValueError(f"corr must be ({n} x {n}) to match vols, got {corr.shape}")
+    corr = 0.5 * (corr + corr.T)
+    try:
+        chol = np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        eigval, eigvec = np.linalg.eigh(corr)
+        fixed = (eigvec * np.maximum(eigval, 1e-10)) @ eigvec.T
+        d = np.sqrt(np.diag(fixed))
+        chol = np.linalg.cholesky(fixed / np.outer(d, d))
+    return chol * vols[:, None]
+
+
+def iter_correlated_returns(corr, vols, drifts, n_periods: int, seed: int = 7, chunk_size: int = 4096):
+    """Streams correlated multi-asset returns in blocks of at most `chunk_size` periods.
+
+    Each block is drifts + Z @ L.T with Z ~ N(0, I) and L the Cholesky factor of the target
+    covariance, so only a (chunk_size x N) block is ever held in memory. Blocks are drawn
+    from one generator in sequence, i.e. the same normals as simulate_correlated_returns.
+
+    Args:
+        corr: (N x N) target correlation matrix.
+        vols: (N,) per-period volatilities.
+        drifts: (N,) per-period mean returns (or a scalar for all assets).
+        n_periods: Total number of periods T.
+        seed: Random seed.
+        chunk_size: Periods per block.
+
+    Yields:
+        (t x N) arrays of periodic returns, t <= chunk_size, covering T periods in order.
+    """
+    chol_t = cholesky_factor(corr, vols).T
+    drifts = np.broadcast_to(np.asarray(drifts, dtype=float), (chol_t.shape[0],))
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_periods, chunk_size):
+        z = rng.standard_normal((min(chunk_size, n_periods - start), chol_t.shape[0]))
+        block = z @ chol_t
+        block += drifts
+        yield block
+
+
+def simulate_correlated_returns(corr, vols, drifts, n_periods: int, seed: int = 7) -> np.ndarray:
+    """Simulates a (T x N) matrix of returns with a target correlation structure.
+
+    One batched multiply of a (T x N) standard-normal draw by the transposed Cholesky
+    factor of diag(vols) corr diag(vols), plus per-asset drift. For T x N too large to
+    hold in memory use iter_correlated_returns and metrics.portfolio_returns_chunked.
+    n_periods=0 gives an empty (0 x N) array.
+    """
+    blocks = iter_correlated_returns(corr, vols, drifts, n_periods, seed=seed, chunk_size=max(n_periods, 1))
+    return next(blocks, np.empty((0, len(np.atleast_1d(vols)))))
+
+
+def get_full_market_data(symbol=None, bar: str = "1h", start=None, end=None):
+    """OHLCV bars as a DataFrame with a Datetime column (default: the ETH/USDT file, hourly)."""
+    csv_path = DATA_PATH if symbol is None else load_market_panel()[symbol]
+    bars = get_symbol_bars(csv_path, bar)
+    sl = _range_slice(bars["ts"], start, end)
+    dates = bars["dates"] if bar == "1h" else _store_dates(bars["ts"])
+    columns = {"Datetime": pd.Series(dates[sl])}
+    for name in STORE_COLUMNS:
+        columns[name] = bars[name][sl]
+    # copy=False keeps the OHLCV columns as views onto the memory-mapped store.
+    return pd.DataFrame(columns, copy=False)
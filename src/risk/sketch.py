@@ -0,0 +1,113 @@
+import numpy as np
+
+
+class QuantileSketch:
+    """Bounded-memory, mergeable quantile summary with a relative-error guarantee.
+
+    Log-spaced buckets in the style of DDSketch (Masson et al., 2019): a value x with
+    |x| >= min_value goes to bucket ceil(log_gamma |x|) of its sign, gamma = (1 + a) / (1 - a),
+    and is represented by the bucket midpoint 2 gamma^i / (gamma + 1). Values with
+    |x| < min_value are counted as zero.
+
+    Error bound (a = relative_accuracy): ranks are exact, so the value returned for the
+    order statistic of rank k is within a * |x_(k)| of the true one (plus min_value), and
+    an ES over the k smallest values is within a * mean(|tail|). Memory is one counter per
+    occupied bucket, about log(max|x| / min_value) / log(gamma) per sign and capped at
+    max_buckets by folding the smallest magnitudes together (which only loosens the bound
+    for values near zero, far from a loss tail).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-12, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self._pos = {}
+        self._neg = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add(self, store: dict, magnitudes: np.ndarray):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+        self._collapse(store)
+
+    def _collapse(self, store: dict):
+        # Folds the smallest magnitudes into one bucket until at most max_buckets remain.
+        if len(store) > self.max_buckets:
+            ordered = sorted(store)
+            folded = ordered[: len(store) - self.max_buckets + 1]
+            total = sum(store.pop(key) for key in folded)
+            store[folded[-1]] = total
+
+    def update(self, values) -> "QuantileSketch":
+        x = np.asarray(values, dtype=float).ravel()
+        x = x[~np.isnan(x)]
+        small = np.abs(x) < self.min_value
+        self.zero_count += int(small.sum())
+        if np.any(x >= self.min_value):
+            self._add(self._pos, x[x >= self.min_value])
+        if np.any(x <= -self.min_value):
+            self._add(self._neg, -x[x <= -self.min_value])
+        self.count += len(x)
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.gamma != self.gamma:
+            raise ValueError("Can only merge sketches with the same relative_accuracy")
+        for mine, theirs in ((self._pos, other._pos), (self._neg, other._neg)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+            self._collapse(mine)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _buckets(self):
+        """Representative values and counts of all buckets, in ascending value order."""
+        neg_keys = np.array(sorted(self._neg, reverse=True), dtype=np.int64)
+        pos_keys = np.array(sorted(self._pos), dtype=np.int64)
+        scale = 2.0 / (self.gamma + 1)
+        values = np.concatenate([
+            -scale * self.gamma ** neg_keys.astype(float),
+            [0.0] if self.zero_count else [],
+            scale * self.gamma ** pos_keys.astype(float),
+        ])
+        counts = np.concatenate([
+            np.array([self._neg[k] for k in neg_keys.tolist()], dtype=np.int64),
+            np.array([self.zero_count] if self.zero_count else [], dtype=np.int64),
+            np.array([self._pos[k] for k in pos_keys.tolist()], dtype=np.int64),
+        ])
+        return values, counts
+
+    def value_at_rank(self, rank: int) -> float:
+        """Approximate value of the 0-based order statistic `rank`."""
+        if not 0 <= rank < self.count:
+            raise IndexError(f"rank {rank} out of range for {self.count} values")
+        values, counts = self._buckets()
+        return float(values[np.searchsorted(np.cumsum(counts), rank, side="right")])
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return np.nan
+        return self.value_at_rank(min(self.count - 1, max(0, int(np.floor(q * self.count)) - 1)))
+
+    def var_es(self, alpha: float = 0.05):
+        """VaR/ES with the historical_var_es convention idx = max(0, floor(alpha*T) - 1)."""
+        if self.count == 0:
+            return np.nan, np.nan
+        idx = max(0, int(np.floor(alpha * self.count)) - 1)
+        values, counts = self._buckets()
+        cum = np.cumsum(counts)
+        b = int(np.searchsorted(cum, idx, side="right"))
+        full = cum[b - 1] if b else 0
+        tail_sum = np.dot(values[:b], counts[:b]) + (idx + 1 - full) * values[b]
+        return float(values[b]), float(tail_sum / (idx + 1))
+
+    @property
+    def n_buckets(self) -> int:
+        return len(self._pos) + len(self._neg) + (1 if self.zero_count else 0)
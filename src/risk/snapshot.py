@@ -0,0 +1,177 @@
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from src.risk.simulation import get_market_data, market_data_version
+from src.risk.metrics import (
+    portfolio_returns,
+    herfindahl_hirschman_index,
+    max_drawdown,
+    downside_semidev,
+    historical_var_es,
+)
+from src.risk.scoring import risk_score
+from src.risk.recommendations import (
+    recommendation_from_score,
+    explanation_text,
+    counterfactual_suggestion,
+)
+from src.risk.rolling import rolling_risk_metrics
+from src.risk.attribution import risk_attribution, top_contributors
+from src.utils.cache import ByteLRUCache, nbytes_of
+
+
+@dataclass(frozen=True, eq=False)
+class RiskSnapshot:
+    """Everything the tabs show for one portfolio configuration, computed once.
+
+    Arrays are read-only; the same snapshot may be shared by several sessions.
+    nbytes counts everything the snapshot keeps alive, including the (T x N)
+    asset_returns it shares with get_market_data. Results computed later on demand
+    (derived) live in their own byte-bounded cache, keyed by cache_key.
+    """
+
+    n_assets: int
+    n_periods: int
+    seed: int
+    alpha: float
+    weights: np.ndarray
+    dates: pd.DatetimeIndex
+    asset_returns: np.ndarray
+    port_rets: np.ndarray
+    equity: np.ndarray
+    hhi: float
+    semidev: float
+    mdd: float
+    var: float
+    es: float
+    score: float
+    risk_level: str
+    machine_action: str
+    rationale: str
+    explanation: str
+    counterfactual: str
+    attribution: dict
+    cache_key: str = field(default="", repr=False)
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.port_rets.nbytes + self.equity.nbytes + self.weights.nbytes
+            + self.asset_returns.nbytes + self.dates.nbytes + nbytes_of(self.attribution)
+        )
+
+    def derived(self, key, factory):
+        """Memoizes `factory()` under `key` for this snapshot, in the shared derived-results cache.
+
+        The cache is byte-bounded and thread-safe; a result may be recomputed after
+        eviction, so `factory` must be deterministic.
+        """
+        return _derived_cache.get_or_create((self.cache_key, key), factory)
+
+    def rolling(self, window: int) -> pd.DataFrame:
+        """Rolling metrics for `window` bars, computed on first use and kept with the snapshot."""
+        return self.derived(
+            ("rolling", window),
+            lambda: rolling_risk_metrics(self.port_rets, window, alpha=self.alpha, dates=self.dates),
+        )
+
+    def log_fields(self) -> dict:
+        """The portfolio and model fields recorded with study events (latest_snapshot, decisions)."""
+        return {
+            "n_assets": self.n_assets,
+            "n_periods": self.n_periods,
+            "seed": self.seed,
+            "alpha": self.alpha,
+            "weights": self.weights.tolist(),
+            "risk_level": self.risk_level,
+            "risk_score": float(self.score),
+            "hhi": float(self.hhi),
+            "semidev": float(self.semidev),
+            "mdd": float(self.mdd),
+            "var": float(self.var),
+            "es": float(self.es),
+            "machine_action": self.machine_action,
+            "machine_recommendation_text": self.rationale,
+        }
+
+
+SNAPSHOT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_snapshot_cache = ByteLRUCache(SNAPSHOT_CACHE_MAX_BYTES, sizeof=lambda snapshot: snapshot.nbytes)
+# Rolling frames, scenario tables, bootstrap and Monte Carlo results etc. of all snapshots.
+DERIVED_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_derived_cache = ByteLRUCache(DERIVED_CACHE_MAX_BYTES)
+
+
+def snapshot_key(n_assets: int, n_periods: int, seed: int, alpha: float, weights) -> str:
+    """Stable hash of the inputs that fully determine a snapshot (plus the market data version)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((int(n_assets), int(n_periods), int(seed), float(alpha), market_data_version())).encode("utf-8"))
+    h.update(np.ascontiguousarray(weights, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def compute_risk_snapshot(n_assets: int, n_periods: int, seed: int, alpha: float, weights) -> RiskSnapshot:
+    cache_key = snapshot_key(n_assets, n_periods, seed, alpha, weights)
+    weights = np.array(weights, dtype=float)
+    asset_rets, dates = get_market_data(n_assets=n_assets, n_periods=n_periods, seed=seed)
+    port_rets = portfolio_returns(asset_rets, weights)
+
+    hhi = herfindahl_hirschman_index(weights)
+    mdd = max_drawdown(port_rets)
+    sd = downside_semidev(port_rets, mar=0.0)
+    var, es = historical_var_es(port_rets, alpha=alpha)
+    score = risk_score(hhi, sd, mdd, var, es)
+    risk_level, rec, rationale = recommendation_from_score(score)
+
+    attribution = risk_attribution(asset_rets, weights, alpha=alpha)
+    contributors = top_contributors(attribution)
+
+    equity = np.cumprod(1 + port_rets)
+    for array in (weights, port_rets, equity):
+        array.setflags(write=False)
+
+    return RiskSnapshot(
+        n_assets=n_assets,
+        n_periods=n_periods,
+        seed=seed,
+        alpha=alpha,
+        weights=weights,
+        dates=dates,
+        asset_returns=asset_rets,
+        port_rets=port_rets,
+        equity=equity,
+        hhi=hhi,
+        semidev=sd,
+        mdd=mdd,
+        var=var,
+        es=es,
+        score=score,
+        risk_level=risk_level,
+        machine_action=rec,
+        rationale=rationale,
+        explanation=explanation_text(hhi, sd, mdd, var, es, score, contributors=contributors),
+        counterfactual=counterfactual_suggestion(hhi, sd, mdd, var, es, score),
+        attribution=attribution,
+        cache_key=cache_key,
+    )
+
+
+def get_risk_snapshot(state: dict) -> RiskSnapshot:
+    """Returns the memoized RiskSnapshot for the sidebar state of this rerun.
+
+    Keyed by a hash of (n_assets, n_periods, seed, alpha, weights) in a byte-bounded LRU
+    cache, so repeated reruns with the same inputs (from any session) skip the pipeline.
+    """
+    args = (state["n_assets"], state["n_periods"], state["seed"], state["alpha"], state["weights"])
+    return _snapshot_cache.get_or_create(snapshot_key(*args), lambda: compute_risk_snapshot(*args))
+
+
+def snapshot_cache_stats() -> dict:
+    return _snapshot_cache.stats()
+
+
+def derived_cache_stats() -> dict:
+    return _derived_cache.stats()
@@ -0,0 +1,214 @@
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from math import comb
+
+import numpy as np
+
+from src.risk.batch import evaluate_weight_batch
+from src.risk.metrics import normalize_weights
+from src.risk.recommendations import HIGH_THRESHOLD, MEDIUM_THRESHOLD, recommendation_from_score
+from src.risk.simulation import get_market_data, market_data_version
+
+# Lattice size budget: the finest resolution m with C(m + N - 1, N - 1) points under this.
+MAX_LATTICE_POINTS = 20000
+MAX_RESOLUTION = 20
+SURFACE_FIELDS = ("hhi", "semidev", "mdd", "var", "es", "score")
+# Largest interpolation error on the score that a preview may carry, and the number of
+# random allocations the error is measured on after the lattice is evaluated.
+SURFACE_TOLERANCE = 0.01
+ERROR_CHECK_POINTS = 256
+
+
+def lattice_resolution(n_assets: int, max_points: int = MAX_LATTICE_POINTS) -> int:
+    """Largest m <= MAX_RESOLUTION whose simplex lattice has at most `max_points` points."""
+    m = 1
+    while m < MAX_RESOLUTION and comb(m + n_assets, n_assets - 1) <= max_points:
+        m += 1
+    return m
+
+
+def simplex_lattice(n_assets: int, m: int) -> np.ndarray:
+    """Integer compositions of m into n_assets parts, as a (P x N) int array (stars and bars)."""
+    rows = []
+    for bars in itertools.combinations(range(m + n_assets - 1), n_assets - 1):
+        edges = np.array((-1,) + bars + (m + n_assets - 1,))
+        rows.append(np.diff(edges) - 1)
+    return np.array(rows, dtype=np.int64)
+
+
+class ScoreSurface:
+    """risk_score and its components on a lattice over the weight simplex.
+
+    Lattice points are w = k / m for non-negative integer k summing to m. Between points the
+    surface is interpolated linearly on the Freudenthal (Kuhn) triangulation of the lattice:
+    in cumulative coordinates c_j = m * (w_1 + ... + w_j) each enclosing cell splits into
+    simplices ordered by the fractional parts, so a lookup touches only N lattice points.
+
+    After the lattice, the score is also evaluated exactly at ERROR_CHECK_POINTS random
+    allocations; the largest interpolation error seen there is kept as `max_error`.
+    """
+
+    def __init__(self, n_assets: int, m: int):
+        self.n_assets = n_assets
+        self.m = m
+        self.counts = simplex_lattice(n_assets, m)
+        self.points = self.counts / m
+        self._index = {tuple(row): i for i, row in enumerate(self.counts.tolist())}
+        self.values = {}
+        self.levels = None
+        self.max_error = None
+        self.ready = threading.Event()
+        self.error = None
+
+    def compute(self, asset_returns: np.ndarray, alpha: float):
+        try:
+            out = evaluate_weight_batch(asset_returns, self.points, alpha=alpha)
+            self.values = {name: out[name] for name in SURFACE_FIELDS}
+            self.levels = out["level"]
+            check = np.random.default_rng(0).dirichlet(np.ones(self.n_assets), size=ERROR_CHECK_POINTS)
+            exact = evaluate_weight_batch(asset_returns, check, alpha=alpha)["score"]
+            interpolated = np.array([self._interpolate(w)["score"] for w in check])
+            self.max_error = float(np.max(np.abs(interpolated - exact)))
+        except Exception as e:  # surfaced to callers through .error; they fall back to exact
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def _vertices(self, w: np.ndarray):
+        n, m = self.n_assets, self.m
+        if n == 1:
+            return [0], np.array([1.0])
+        c = np.cumsum(w * m)[:-1]
+        base = np.clip(np.floor(c), 0, m - 1)
+        frac = np.clip(c - base, 0.0, 1.0)
+        # Descending fractional part; ties add the higher coordinate first so vertices stay
+        # inside the simplex (cumulative coordinates must remain non-decreasing).
+        order = np.lexsort((-np.arange(n - 1), -frac))
+        fs = frac[order]
+        lambdas = np.empty(n)
+        lambdas[0] = 1.0 - fs[0]
+        lambdas[1:-1] = fs[:-1] - fs[1:]
+        lambdas[-1] = fs[-1]
+
+        rows, weights = [], []
+        vertex = base.astype(np.int64)
+        for k in range(n):
+            if k:
+                vertex = vertex.copy()
+                vertex[order[k - 1]] += 1
+            if lambdas[k] <= 0:
+                continue
+            counts = np.diff(np.r_[0, vertex, m])
+            row = self._index.get(tuple(counts.tolist()))
+            if row is not None:
+                rows.append(row)
+                weights.append(lambdas[k])
+        weights = np.array(weights)
+        return rows, weights / weights.sum()
+
+    def lookup(self, weights):
+        """Interpolated fields for `weights`, or None if not ready or not on this simplex."""
+        if not self.ready.is_set() or self.error is not None:
+            return None
+        w = normalize_weights(weights)
+        if len(w) != self.n_assets or w.sum() <= 0:
+            return None
+        return self._interpolate(w)
+
+    def _interpolate(self, w: np.ndarray):
+        rows, lam = self._vertices(w)
+        if not rows:
+            return None
+        return {name: float(lam @ self.values[name][rows]) for name in SURFACE_FIELDS}
+
+    def level_boundaries(self) -> dict:
+        """Lattice points of each risk level (LOW/MEDIUM/HIGH regions), as (P_level x N) arrays."""
+        if not self.ready.is_set() or self.levels is None:
+            return {}
+        return {level: self.points[self.levels == level] for level in ("LOW", "MEDIUM", "HIGH")}
+
+    def distance_to_levels(self, weights) -> dict:
+        """Turnover from `weights` to the nearest lattice point of each risk level.
+
+        Accurate to the lattice spacing (1 / m per asset). Levels with no lattice point
+        are omitted.
+
+        Returns:
+            {level: (turnover, nearest lattice weights)}.
+        """
+        w = normalize_weights(weights)
+        out = {}
+        for level, pts in self.level_boundaries().items():
+            if len(pts):
+                dist = 0.5 * np.abs(pts - w).sum(axis=1)
+                k = int(np.argmin(dist))
+                out[level] = (float(dist[k]), pts[k])
+        return out
+
+
+MAX_SURFACES = 8
+_surfaces = OrderedDict()
+_surfaces_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="score-surface")
+
+
+def get_score_surface(n_assets: int, n_periods: int, seed: int, alpha: float) -> ScoreSurface:
+    """Returns the surface for these data parameters, starting its computation if needed.
+
+    The lattice is evaluated in a background thread; check `surface.ready` (or just call
+    lookup, which returns None until then). The most recent MAX_SURFACES surfaces are kept.
+    """
+    key = (int(n_assets), int(n_periods), int(seed), float(alpha), market_data_version())
+    with _surfaces_lock:
+        surface = _surfaces.get(key)
+        if surface is not None:
+            _surfaces.move_to_end(key)
+            return surface
+        surface = ScoreSurface(int(n_assets), lattice_resolution(int(n_assets)))
+        _surfaces[key] = surface
+        while len(_surfaces) > MAX_SURFACES:
+            _surfaces.popitem(last=False)
+
+    asset_returns, _ = get_market_data(n_assets=n_assets, n_periods=n_periods, seed=seed)
+    _executor.submit(surface.compute, asset_returns, alpha)
+    return surface
+
+
+def score_preview(surface: ScoreSurface, weights, exact, tolerance: float = SURFACE_TOLERANCE) -> dict:
+    """Risk score and level for `weights`, interpolated when that is accurate enough.
+
+    The surface answers when it is ready, the weights are on its simplex, its measured
+    `max_error` is within `tolerance` and the interpolated score is further than that error
+    from a level threshold (so the level is certain). Otherwise `exact()` is called and
+    must return the exact score.
+
+    Returns:
+        A dict with "score", "level" and "source" ("surface" or "exact").
+    """
+    values = surface.lookup(weights)
+    if values is not None and surface.max_error is not None and surface.max_error <= tolerance:
+        score = values["score"]
+        margin = min(abs(score - MEDIUM_THRESHOLD), abs(score - HIGH_THRESHOLD))
+        if margin > surface.max_error:
+            return {"score": score, "level": recommendation_from_score(score)[0], "source": "surface"}
+    score = float(exact())
+    return {"score": score, "level": recommendation_from_score(score)[0], "source": "exact"}
+
+
+def describe_level_distance(surface: ScoreSurface, weights, current_level: str) -> str:
+    """Short caption with the reallocation needed to reach each other risk level, if known."""
+    distances = surface.distance_to_levels(weights)
+    parts = [
+        f"{level}: ~{dist:.0%} reallocation"
+        for level, (dist, _) in distances.items()
+        if level != current_level
+    ]
+    if surface.error is not None:
+        return "Score surface unavailable; scores above are computed exactly."
+    if not distances:
+        return "Score surface: computing…"
+    if not parts:
+        return f"Score surface: every allocation of these assets is {current_level}."
+    return "Nearest other risk levels (precomputed surface): " + "; ".join(parts) + "."
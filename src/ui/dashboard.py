@@ -1,73 +1,48 @@
 import time
-import numpy as np
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-
-from src.risk.simulation import get_market_data
-from src.risk.metrics import (
-    portfolio_returns,
-    herfindahl_hirschman_index,
-    max_drawdown,
-    downside_semidev,
-    historical_var_es,
-)
-from src.risk.scoring import risk_score
-from src.risk.recommendations import (
-    recommendation_from_score,
-    explanation_text,
-    counterfactual_suggestion,
-)
-from src.eval.logging import log_event
+
+from src.risk.bootstrap import bootstrap_metrics
+from src.risk.counterfactual import search_counterfactual, counterfactual_allocation_text
+from src.risk.montecarlo import simulate_forward_risk
+from src.risk.rolling import ROLLING_WINDOWS
+from src.risk.scenarios import get_scenario_library, scenario_table
+from src.risk.snapshot import RiskSnapshot
+from src.risk.surface import get_score_surface, describe_level_distance
+from src.eval.logging import log_event, store_snapshot
+from src.ui.figures import line_chart_png, histogram_png
 from src.ui.market import render_market_data_chart
 
-def render_dashboard(state: dict):
+def render_dashboard(state: dict, snapshot: RiskSnapshot):
     """Renders the main dashboard UI for the HCI experiment.
 
     This function orchestrates the entire user-facing interface for a single trial,
-    including market data visualization, risk metric calculation, recommendation
+    including market data visualization, risk metric display, recommendation
     display, and user decision logging.
 
     Args:
         state: A dictionary containing the current application and condition state,
                including weights, seed, and experimental flags.
+        snapshot: The RiskSnapshot computed once for this rerun from `state`.
     """
     render_market_data_chart()
     st.divider()
-    n_assets = state["n_assets"]
-    n_periods = state["n_periods"]
-    seed = state["seed"]
-    alpha = state["alpha"]
-    weights = state["weights"]
-
-    asset_rets, dates = get_market_data(n_assets=n_assets, n_periods=n_periods, seed=seed)
-    port_rets = portfolio_returns(asset_rets, weights)
-
-    hhi = herfindahl_hirschman_index(weights)
-    mdd = max_drawdown(port_rets)
-    sd = downside_semidev(port_rets, mar=0.0)
-    var, es = historical_var_es(port_rets, alpha=alpha)
-
-    score = risk_score(hhi, sd, mdd, var, es)
-    risk_level, rec, rationale = recommendation_from_score(score)
+    alpha = snapshot.alpha
+    dates = snapshot.dates
+    port_rets = snapshot.port_rets
+
+    hhi = snapshot.hhi
+    mdd = snapshot.mdd
+    sd = snapshot.semidev
+    var, es = snapshot.var, snapshot.es
+
+    score = snapshot.score
+    risk_level, rec, rationale = snapshot.risk_level, snapshot.machine_action, snapshot.rationale
     explanation_shown = state["condition"] == "EXPLANATION_ON"
     counterfactual_shown = explanation_shown and state["show_counterfactual"]
 
     st.session_state.latest_snapshot = {
-        "n_assets": n_assets,
-        "n_periods": n_periods,
-        "seed": seed,
-        "alpha": alpha,
-        "weights": weights.tolist(),
-        "risk_level": risk_level,
-        "risk_score": float(score),
-        "hhi": float(hhi),
-        "semidev": float(sd),
-        "mdd": float(mdd),
-        "var": float(var),
-        "es": float(es),
-        "machine_action": rec,
-        "machine_recommendation_text": rationale,
+        **snapshot.log_fields(),
         "explanation_shown": explanation_shown,
         "counterfactual_shown": counterfactual_shown,
         "loss_aversion_mode": state["loss_aversion_mode"],
@@ -85,22 +60,50 @@ def render_dashboard(state: dict):
 
     with left:
         st.subheader("Portfolio Performance (Historical)")
-        fig = plt.figure()
-        equity = np.cumprod(1 + port_rets)
-        plt.plot(dates, equity)
-        plt.title("Equity Curve (Historical)")
-        plt.xlabel("Date")
-        plt.ylabel("Growth of $1")
-        fig.autofmt_xdate()
-        st.pyplot(fig)
+        st.image(line_chart_png(
+            dates,
+            snapshot.equity,
+            title="Equity Curve (Historical)",
+            xlabel="Date",
+            ylabel="Growth of $1",
+        ), use_column_width=True)
 
         st.subheader("Return Distribution")
-        fig2 = plt.figure()
-        plt.hist(port_rets, bins=40)
-        plt.title("Portfolio Returns Histogram")
-        plt.xlabel("Return")
-        plt.ylabel("Count")
-        st.pyplot(fig2)
+        st.image(histogram_png(
+            port_rets,
+            bins=40,
+            title="Portfolio Returns Histogram",
+            xlabel="Return",
+            ylabel="Count",
+        ), use_column_width=True)
+
+        st.subheader("Rolling Risk")
+        windows = {label: w for label, w in ROLLING_WINDOWS.items() if w <= len(port_rets)}
+        window_label = st.radio("Rolling window", list(windows), horizontal=True)
+        rolling = snapshot.rolling(windows[window_label])
+        st.line_chart(rolling.rename(columns={
+            "var": f"VaR (alpha={alpha:.2f})",
+            "es": f"ES (alpha={alpha:.2f})",
+            "semidev": "Semideviation",
+            "mdd": "Max Drawdown",
+        }))
+
+        st.subheader("Stress Scenarios (worst historical windows)")
+        scenarios = snapshot.derived("scenarios", lambda: scenario_table(
+            get_scenario_library(snapshot.n_assets, snapshot.n_periods, snapshot.seed),
+            snapshot.weights,
+        ))
+        st.dataframe(
+            scenarios.style.format({
+                "Start": "{:%Y-%m-%d %H:%M}",
+                "End": "{:%Y-%m-%d %H:%M}",
+                "ETH Return": "{:.2%}",
+                "Portfolio Return": "{:.2%}",
+                "Portfolio Worst Point": "{:.2%}",
+            }),
+            hide_index=True,
+            use_container_width=True,
+        )
 
     with right:
         st.subheader("System Recommendation")
@@ -122,13 +125,72 @@ def render_dashboard(state: dict):
         }])
         st.table(metrics_table.style.format(precision=4))
 
+        with st.expander("Uncertainty (bootstrap confidence intervals)"):
+            block = st.checkbox("Block bootstrap (24h blocks, keeps hourly autocorrelation)", value=True)
+            method = "block" if block else "iid"
+            if st.button("Compute 90% intervals"):
+                boot = snapshot.derived(("bootstrap", method), lambda: bootstrap_metrics(
+                    port_rets, snapshot.weights, alpha=alpha, method=method, seed=snapshot.seed,
+                ))
+                st.table(pd.DataFrame(
+                    {name: boot[key] for name, key in (
+                        ("Semideviation", "semidev"),
+                        (f"VaR (alpha={alpha:.2f})", "var"),
+                        (f"ES (alpha={alpha:.2f})", "es"),
+                        ("Max Drawdown", "mdd"),
+                        ("Risk Score", "score"),
+                    )}
+                ).T[["estimate", "lower", "upper"]].style.format(precision=4))
+                st.caption(f"{boot['n_boot']} {method} resamples in {boot['elapsed_ms']:.0f} ms (seed {snapshot.seed}).")
+
+        with st.expander("Forward risk (Monte Carlo, next 7 days)"):
+            methods = {"Filtered historical": "fhs", "GBM": "gbm"}
+            mc_method = methods[st.radio("Path model", list(methods), horizontal=True)]
+            # Capped so a run stays within a couple of seconds even in-process (one worker).
+            n_paths = st.select_slider("Paths", [10_000, 25_000, 50_000], value=10_000)
+            if st.button("Simulate paths"):
+                mc = snapshot.derived(("montecarlo", mc_method, n_paths), lambda: simulate_forward_risk(
+                    snapshot.asset_returns, snapshot.weights, horizon=168, n_paths=n_paths,
+                    method=mc_method, alpha=alpha, seed=snapshot.seed,
+                ))
+                st.table(pd.DataFrame([{
+                    "Median value of $1": mc["terminal"][0.5],
+                    "5% value of $1": mc["terminal"][0.05],
+                    "P(loss)": mc["prob_loss"],
+                    f"7d VaR (alpha={alpha:.2f})": mc["horizon_var"],
+                    f"7d ES (alpha={alpha:.2f})": mc["horizon_es"],
+                    "Median Max Drawdown": mc["mdd_median"],
+                    "Forward Risk Score": mc["score"],
+                }]).style.format(precision=4))
+                st.caption(f"{mc['n_paths']:,} paths in {mc['elapsed_ms']:.0f} ms (seed {snapshot.seed}).")
+
         if explanation_shown:
             st.subheader("Explanation (Why this recommendation?)")
-            st.text(explanation_text(hhi, sd, mdd, var, es, score))
+            st.text(snapshot.explanation)
 
             if counterfactual_shown:
                 st.subheader("Counterfactual (What would change it?)")
-                st.info(counterfactual_suggestion(hhi, sd, mdd, var, es, score))
+                st.info(snapshot.counterfactual)
+                # The search depends on this session's warm start and on the wall-clock
+                # budget, so it is memoized per session. Every outcome (found, not found,
+                # timed out) is kept until the snapshot changes, so reruns of the page do
+                # not pay for the search again in this condition only.
+                cached = st.session_state.get("counterfactual_search")
+                if cached is not None and cached[0] == snapshot.cache_key:
+                    search = cached[1]
+                else:
+                    search = search_counterfactual(
+                        snapshot.asset_returns,
+                        snapshot.weights,
+                        alpha=alpha,
+                        warm_start=st.session_state.get("counterfactual_warm_start"),
+                    )
+                    st.session_state.counterfactual_search = (snapshot.cache_key, search)
+                if search["found"]:
+                    st.session_state.counterfactual_warm_start = search["weights"]
+                st.caption(counterfactual_allocation_text(search))
+                surface = get_score_surface(snapshot.n_assets, snapshot.n_periods, snapshot.seed, alpha)
+                st.caption(describe_level_distance(surface, snapshot.weights, risk_level))
         else:
             st.caption("Explanation is hidden in this condition (Recommendation-Only).")
 
@@ -154,23 +216,7 @@ def render_dashboard(state: dict):
             "decision": decision,
             "confidence_1_7": int(confidence),
             "trust_1_7": int(trust),
-            "n_assets": n_assets,
-            "n_periods": n_periods,
-            "seed": seed,
-            "alpha": alpha,
-            "risk_level": risk_level,
-            "risk_score": score,
-            "hhi": hhi,
-            "semidev": sd,
-            "mdd": mdd,
-            "var": var,
-            "es": es,
-            "machine_action": rec,
-            "machine_recommendation_text": rationale,
-            "explanation_shown": explanation_shown,
-            "counterfactual_shown": counterfactual_shown,
-            "loss_aversion_mode": state["loss_aversion_mode"],
-            "weights": weights.tolist(),
+            "snapshot_ref": store_snapshot(st.session_state.latest_snapshot),
             "elapsed_sec": elapsed,
         })
         st.success("Logged.")
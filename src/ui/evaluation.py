@@ -1,9 +1,14 @@
-import json
 import time
+import pandas as pd
 import streamlit as st
 
 from src.eval.sus import SUS_ITEMS, compute_sus_score
-from src.eval.logging import log_event, logs_to_df, export_logs
+from src.eval.logging import log_event, export_logs, export_buffer, recent_logs
+
+EXPORT_FORMATS = {
+    "Flat (snapshot fields on every event)": "flat",
+    "Normalized (events + snapshots table)": "normalized",
+}
 
 def render_evaluation(state: dict):
     st.subheader("SUS (System Usability Scale) + Export")
@@ -32,23 +37,48 @@ def render_evaluation(state: dict):
     st.divider()
     st.subheader("Export Logs")
 
-    df_logs = logs_to_df()
-    if df_logs.empty:
+    sink = st.session_state.event_sink
+    if sink.count == 0:
         st.info("No logs yet. Submit a decision and/or SUS to create entries.")
         return
 
-    st.dataframe(df_logs, use_container_width=True)
+    mode = EXPORT_FORMATS[st.radio("Export format", list(EXPORT_FORMATS), horizontal=True)]
+    tail_size = st.select_slider("Show latest events", [10, 50, 200], value=10)
+    tail = recent_logs(flat=mode == "flat")[-tail_size:]
+    st.dataframe(pd.DataFrame(tail), use_container_width=True)
+    st.caption(f"Showing the latest {len(tail)} of {sink.count} logged events; exports contain all of them.")
+    if sink.error is not None:
+        st.error(f"Event log write failed ({sink.path}): {sink.error}")
+    else:
+        st.caption(f"Events are stored durably in {sink.path}.")
 
     if st.button("Export logs to artifacts folder"):
-        csv_path, json_path = export_logs(state["artifacts_dir"])
+        csv_path, json_path = export_logs(state["artifacts_dir"], mode)
         st.success(f"Exported: {csv_path.as_posix()} and {json_path.as_posix()}")
 
-    csv_bytes = df_logs.to_csv(index=False).encode("utf-8")
-    st.download_button("Download logs.csv", data=csv_bytes, file_name="logs.csv", mime="text/csv")
-
-    json_bytes = json.dumps(st.session_state.logs, indent=2).encode("utf-8")
-    st.download_button("Download logs.json", data=json_bytes, file_name="logs.json", mime="application/json")
-
-
-
+    # Exports are brought up to date (which flushes the sink) only when asked for. The
+    # prepared files are kept for reruns (a download click reruns the script) until an event
+    # is logged or the format changes.
+    version = (sink.count, mode)
+    if st.button("Prepare downloads"):
+        buffer = export_buffer(mode).refresh()
+        files = [
+            ("Download logs.csv", buffer.csv_bytes(), "logs.csv", "text/csv"),
+            ("Download logs.json", buffer.json_bytes(), "logs.json", "application/json"),
+        ]
+        note = None
+        if mode == "normalized":
+            n_snapshots = buffer.write_snapshot_tables()
+            note = f"{n_snapshots} distinct snapshots referenced by snapshot_ref."
+            files += [
+                ("Download snapshots.csv", buffer.snapshots_csv_bytes(), "snapshots.csv", "text/csv"),
+                ("Download snapshots.json", buffer.snapshots_json_bytes(), "snapshots.json", "application/json"),
+            ]
+        st.session_state.prepared_downloads = {"version": version, "files": files, "note": note}
 
+    prepared = st.session_state.get("prepared_downloads")
+    if prepared is not None and prepared["version"] == version:
+        if prepared["note"]:
+            st.caption(prepared["note"])
+        for label, data, file_name, mime in prepared["files"]:
+            st.download_button(label, data=data, file_name=file_name, mime=mime)
@@ -1,31 +1,13 @@
 import streamlit as st
 import pandas as pd
 
-from src.risk.simulation import get_market_data
-from src.risk.metrics import (
-    portfolio_returns,
-    herfindahl_hirschman_index,
-    max_drawdown,
-    downside_semidev,
-    historical_var_es,
-)
+from src.risk.optimizer import optimize_allocation
+from src.risk.parametric import compare_var_es_estimators
 from src.risk.scoring import risk_score
+from src.risk.snapshot import RiskSnapshot
 
-def render_explainability(state: dict):
-    n_assets = state["n_assets"]
-    n_periods = state["n_periods"]
-    seed = state["seed"]
-    alpha = state["alpha"]
-    weights = state["weights"]
-
-    asset_rets, _ = get_market_data(n_assets=n_assets, n_periods=n_periods, seed=seed)
-    port_rets = portfolio_returns(asset_rets, weights)
-
-    hhi = herfindahl_hirschman_index(weights)
-    mdd = max_drawdown(port_rets)
-    sd = downside_semidev(port_rets, mar=0.0)
-    var, es = historical_var_es(port_rets, alpha=alpha)
-    score = risk_score(hhi, sd, mdd, var, es)
+def render_explainability(state: dict, snapshot: RiskSnapshot):
+    score = snapshot.score
 
     st.subheader("Equations (for IEEE paper support)")
     st.latex(r"HHI = \sum_{i=1}^{N} w_i^2")
@@ -49,6 +31,62 @@ def render_explainability(state: dict):
     ])
     st.table(trace)
 
+    st.subheader("Per-Asset Risk Attribution")
+    attribution = snapshot.attribution
+    st.table(pd.DataFrame({
+        "Weight": attribution["weights"],
+        "Semideviation": attribution["semidev"],
+        "VaR": attribution["var"],
+        "ES": attribution["es"],
+        "HHI": attribution["hhi"],
+        "Max Drawdown": attribution["mdd"],
+        "Risk Score": attribution["score"],
+    }, index=[f"Asset {i + 1}" for i in range(len(attribution["weights"]))]).style.format(precision=4))
+    st.caption(
+        "Euler contributions: each column sums to the portfolio metric, and the Risk Score "
+        "column sums to the combined score."
+    )
+
+    with st.expander("VaR/ES Estimators (historical vs parametric)"):
+        rows = snapshot.derived("var_es_estimators", lambda: compare_var_es_estimators(snapshot.port_rets, alpha=snapshot.alpha))
+        comparison = pd.DataFrame(rows).set_index("estimator")
+        comparison["risk_score"] = [
+            risk_score(snapshot.hhi, snapshot.semidev, snapshot.mdd, var, es)
+            for var, es in zip(comparison["var"], comparison["es"])
+        ]
+        st.table(comparison.style.format(precision=4))
+        st.caption(
+            f"Exceedance rate is the share of periods below each VaR (ideally {snapshot.alpha:.2f}). "
+            "The displayed risk score always uses the historical estimator."
+        )
+
+    with st.expander("Minimum-Risk Allocation (optimizer)"):
+        if snapshot.n_assets == 1:
+            st.info("With a single asset the only allocation is 100%; add assets to optimize.")
+        else:
+            objectives = {"Expected Shortfall": "es", "Risk Score": "score"}
+            objective = objectives[st.radio("Minimize", list(objectives), horizontal=True)]
+            max_weight = st.slider("Max weight per asset", 1.0 / snapshot.n_assets, 1.0, 1.0, 0.05)
+            if st.button("Optimize allocation"):
+                result = optimize_allocation(
+                    snapshot.asset_returns,
+                    objective=objective,
+                    alpha=snapshot.alpha,
+                    max_weight=max_weight,
+                    warm_start=snapshot.weights,
+                )
+                metrics = result["metrics"]
+                st.table(pd.DataFrame(
+                    {"Current": snapshot.weights, "Optimized": result["weights"]},
+                    index=[f"Asset {i + 1}" for i in range(snapshot.n_assets)],
+                ).style.format("{:.1%}"))
+                st.caption(
+                    f"Risk score {metrics['score']:.2f} (current {score:.2f}), "
+                    f"ES {metrics['es']:.4f} (current {snapshot.es:.4f}); "
+                    f"{result['iterations']} iterations in {result['elapsed_ms']:.0f} ms"
+                    f"{' (cached)' if result['cached'] else ''}."
+                )
+
     st.subheader("Controlled Recommendation Logic (Fixed)")
     st.code(
         "if score < 0.33: LOW -> Maintain\n"
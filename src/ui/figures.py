@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import time
 from pathlib import Path
+
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import streamlit as st
 
+from src.utils.cache import ByteLRUCache
+from src.utils.math_utils import lttb_indices
+
+# Rendered PNG bytes keyed by a hash of the plotted data and the figure parameters.
+FIGURE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_figure_cache = ByteLRUCache(FIGURE_CACHE_MAX_BYTES)
+_render_stats = {"renders": 0, "render_seconds": 0.0}
+
 
 def _ensure_dir(path: str | Path) -> Path:
     p = Path(path)
@@ -11,6 +27,88 @@ def _ensure_dir(path: str | Path) -> Path:
     return p
 
 
+def _data_key(*parts) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(str(part.dtype).encode("ascii"))
+            h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            h.update(repr(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _to_png(fig: Figure, dpi: int) -> bytes:
+    # Draw through a private Agg canvas: no pyplot figure registry, nothing to close.
+    FigureCanvasAgg(fig)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi)
+    return buf.getvalue()
+
+
+def _cached_render(key: str, draw) -> bytes:
+    png = _figure_cache.get(key)
+    if png is None:
+        start = time.perf_counter()
+        png = draw()
+        _render_stats["renders"] += 1
+        _render_stats["render_seconds"] += time.perf_counter() - start
+        _figure_cache.put(key, png)
+    return png
+
+
+def line_chart_png(x, y, title: str, xlabel: str, ylabel: str, figsize=(6.4, 4.8), dpi: int = 100) -> bytes:
+    """PNG of a line chart, downsampled with LTTB to about one point per horizontal pixel.
+
+    `x` may be datetimes (drawn as a date axis) or numbers. Identical data and labels
+    return the cached PNG without drawing.
+    """
+    is_dates = isinstance(x, (pd.DatetimeIndex, pd.Series)) and pd.api.types.is_datetime64_any_dtype(x)
+    x_values = pd.DatetimeIndex(x).asi8 if is_dates else np.asarray(x, dtype=float)
+    y_values = np.asarray(y, dtype=float)
+    key = _data_key("line", x_values, y_values, title, xlabel, ylabel, figsize, dpi)
+
+    def draw():
+        keep = lttb_indices(x_values, y_values, int(figsize[0] * dpi))
+        fig = Figure(figsize=figsize)
+        ax = fig.add_subplot()
+        ax.plot(pd.DatetimeIndex(x)[keep] if is_dates else x_values[keep], y_values[keep])
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        if is_dates:
+            fig.autofmt_xdate()
+        return _to_png(fig, dpi)
+
+    return _cached_render(key, draw)
+
+
+def histogram_png(values, bins: int, title: str, xlabel: str, ylabel: str, figsize=(6.4, 4.8), dpi: int = 100) -> bytes:
+    """PNG of a histogram of `values`, cached on the data hash."""
+    values = np.asarray(values, dtype=float)
+    key = _data_key("hist", values, bins, title, xlabel, ylabel, figsize, dpi)
+
+    def draw():
+        fig = Figure(figsize=figsize)
+        ax = fig.add_subplot()
+        ax.hist(values, bins=bins)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        return _to_png(fig, dpi)
+
+    return _cached_render(key, draw)
+
+
+def figure_render_stats() -> dict:
+    """PNG cache counters plus the number of actual renders and their mean time (ms)."""
+    stats = _figure_cache.stats()
+    renders = _render_stats["renders"]
+    stats["renders"] = renders
+    stats["mean_render_ms"] = 1000 * _render_stats["render_seconds"] / renders if renders else 0.0
+    return stats
+
+
 def render_architecture_figure(export_dir: str = "artifacts", filename_prefix: str = "fig_"):
     """
     Renders a simple, IEEE-friendly system architecture figure and optionally exports it to disk.
@@ -70,3 +168,5 @@ def render_architecture_figure(export_dir: str = "artifacts", filename_prefix: s
             st.success(f"Exported: {export_path.as_posix()}")
     with col2:
         st.caption("Tip: Use this PNG directly as Figure 1 in your IEEE paper.")
+
+    plt.close(fig)
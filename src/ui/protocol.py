@@ -1,7 +1,9 @@
 import streamlit as st
 
-from src.ui.figures import render_architecture_figure
+from src.ui.figures import render_architecture_figure, figure_render_stats
 from src.eval.timer import render_task_timer_controls
+from src.risk.simulation import market_data_memory_usage, synthetic_cache_stats
+from src.risk.snapshot import derived_cache_stats, snapshot_cache_stats
 
 
 def render_protocol(state: dict):
@@ -59,3 +61,34 @@ def render_protocol(state: dict):
         "Include the exported architecture PNG as **Figure 1** in your IEEE paper, "
         "and include screenshots from the Dashboard and Explainability tabs as additional figures."
     )
+
+    with st.expander("Server Diagnostics (study operators)"):
+        usage = market_data_memory_usage()
+        rss = usage["process_rss_bytes"]
+        st.caption(
+            f"Shared market data: {usage['datasets']} dataset(s), "
+            f"{usage['array_bytes'] / 1e6:.2f} MB in arrays "
+            f"({usage['mapped_bytes'] / 1e6:.2f} MB memory-mapped). "
+            f"Process RSS: {'n/a' if rss is None else f'{rss / 1e6:.1f} MB'}."
+        )
+        cache = synthetic_cache_stats()
+        st.caption(
+            f"Synthetic asset cache: {cache['entries']} entries, {cache['bytes'] / 1e6:.2f} MB, "
+            f"hits {cache['hits']}, misses {cache['misses']} (hit rate {cache['hit_rate']:.0%})."
+        )
+        snap = snapshot_cache_stats()
+        st.caption(
+            f"Risk snapshot cache: {snap['entries']} entries, {snap['bytes'] / 1e6:.2f} MB, hits {snap['hits']}, "
+            f"misses {snap['misses']} (hit rate {snap['hit_rate']:.0%})."
+        )
+        derived = derived_cache_stats()
+        st.caption(
+            f"Derived results cache: {derived['entries']} entries, {derived['bytes'] / 1e6:.2f} MB "
+            f"of {derived['max_bytes'] / 1e6:.0f} MB."
+        )
+        figs = figure_render_stats()
+        st.caption(
+            f"Chart PNG cache: {figs['entries']} entries, {figs['bytes'] / 1e6:.2f} MB, "
+            f"hit rate {figs['hit_rate']:.0%}; {figs['renders']} renders, "
+            f"{figs['mean_render_ms']:.0f} ms mean render time."
+        )
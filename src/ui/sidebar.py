@@ -2,6 +2,8 @@ import streamlit as st
 import numpy as np
 
 from src.risk.metrics import normalize_weights
+from src.risk.snapshot import get_risk_snapshot
+from src.risk.surface import get_score_surface, score_preview
 
 def render_sidebar():
     st.sidebar.header("Study Mode")
@@ -54,3 +56,15 @@ def render_sidebar():
         "artifacts_dir": artifacts_dir,
         "artifacts_prefix": artifacts_prefix,
     }
+
+
+def render_score_preview(state: dict):
+    """Shows the score for the current sliders under the weights before the dashboard runs.
+
+    Read from the precomputed score surface when it is accurate enough there, otherwise
+    from the exact snapshot (which the dashboard then reuses from its cache).
+    """
+    surface = get_score_surface(state["n_assets"], state["n_periods"], state["seed"], state["alpha"])
+    preview = score_preview(surface, state["weights"], lambda: get_risk_snapshot(state).score)
+    source = "interpolated" if preview["source"] == "surface" else "exact"
+    st.sidebar.caption(f"Risk score: {preview['score']:.2f} ({preview['level']}, {source})")
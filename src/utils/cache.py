@@ -0,0 +1,110 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def data_fingerprint(array: np.ndarray) -> str:
+    """Content hash of a float array (shape and bytes), for keying per-dataset caches."""
+    a = np.ascontiguousarray(array, dtype=np.float64)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(a.shape).encode("utf-8"))
+    h.update(memoryview(a).cast("B"))
+    return h.hexdigest()
+
+
+def nbytes_of(value) -> int:
+    """Approximate memory footprint of a cached value (arrays, bytes, tuples/lists/dicts of them)."""
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes_of(v) for v in value)
+    if isinstance(value, dict):
+        return sum(nbytes_of(v) for v in value.values())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class ByteLRUCache:
+    """Thread-safe LRU cache bounded by the total byte size of its values.
+
+    Least recently used entries are evicted until the total fits in `max_bytes`. A single
+    value larger than the whole budget is returned to the caller but not stored.
+    """
+
+    def __init__(self, max_bytes: int, sizeof=nbytes_of):
+        self.max_bytes = int(max_bytes)
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def get_or_create(self, key, factory):
+        """Returns the cached value for `key`, computing it with `factory()` on a miss.
+
+        The factory runs outside the lock, so two threads missing on the same key may both
+        compute it; the last one stored wins. Values must therefore be deterministic.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, factory())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -9,3 +9,33 @@ def safe_float(x, default=np.nan):
     except Exception:
         return default
     
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013).
+
+    Keeps the first and last points and, from each of n_out - 2 equal-width buckets, the
+    point forming the largest triangle with the previously kept point and the average of
+    the next bucket. Preserves peaks and troughs far better than striding.
+
+    Returns:
+        Sorted indices of the points to keep (all indices if n_out >= len(x)).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float) - float(x[0])
+    y = np.asarray(y, dtype=float)
+    edges = (np.floor(np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1)
+    edges[-1] = n - 1
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        nxt_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:nxt_end].mean()
+        avg_y = y[end:nxt_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
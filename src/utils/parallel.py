@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+
+# The server process runs many threads (sink writers, the surface executor, Streamlit's
+# own); forking it can copy a held lock into a child and deadlock it, so workers are
+# started fresh instead.
+START_METHOD = "spawn"
+
+_pools = {}  # worker count -> pool
+_pool_lock = threading.Lock()
+_attach_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool of `workers` processes shared by the resampling/simulation engines.
+
+    There is one pool per worker count, so a caller asking for another size never shuts
+    down a pool whose futures other callers are waiting on.
+    """
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+            _pools[workers] = pool
+        return pool
+
+
+def reset_process_pool(pool: ProcessPoolExecutor = None):
+    """Discards `pool` if it is still shared (all pools when not given); the next call starts a new one."""
+    with _pool_lock:
+        for workers, shared in list(_pools.items()):
+            if pool is None or shared is pool:
+                shared.shutdown(wait=False, cancel_futures=True)
+                del _pools[workers]
+
+
+def _finished(future) -> bool:
+    # Completed in its pool (with a result or fn's own error), as opposed to not submitted,
+    # still queued or running, cancelled by a pool reset, or failed because its pool broke.
+    return (
+        future is not None and future.done() and not future.cancelled()
+        and not isinstance(future.exception(), BrokenProcessPool)
+    )
+
+
+def map_chunks(fn, arg_tuples, workers: int, max_pending: int = None):
+    """Yields fn(*args) for each tuple, in order.
+
+    With more than one worker the calls run in the shared process pool, with at most
+    `max_pending` (default 2 * workers) submitted but not yet consumed, so a long run
+    neither queues every chunk up front nor holds all results. If the pool breaks (a
+    worker died), it is replaced and the unfinished chunks are resubmitted once; if another
+    caller replaced it meanwhile (cancelling our queued chunks), the chunks not finished in
+    the old pool are resubmitted to the new one. The chunk functions are pure, so this does
+    not change the results.
+    """
+    if workers <= 1:
+        for args in arg_tuples:
+            yield fn(*args)
+        return
+    max_pending = max_pending or 2 * workers
+    remaining = iter(arg_tuples)
+    pending = deque()  # [args, future, pool it was submitted to]
+    retried = False
+    pool = get_process_pool(workers)
+
+    def resubmit(entries):
+        for entry in entries:
+            entry[1], entry[2] = None, pool
+            entry[1] = pool.submit(fn, *entry[0])
+
+    while True:
+        try:
+            while len(pending) < max_pending:
+                args = next(remaining, None)
+                if args is None:
+                    break
+                # Recorded before submitting, so a chunk is resubmitted even if submit() itself fails.
+                pending.append([args, None, pool])
+                pending[-1][1] = pool.submit(fn, *args)
+            if not pending:
+                return
+            result = pending[0][1].result()
+        except BrokenProcessPool:
+            if retried:
+                raise
+            retried = True
+            reset_process_pool(pool)
+            pool = get_process_pool(workers)
+            resubmit([entry for entry in pending if not _finished(entry[1])])
+            continue
+        except (CancelledError, RuntimeError):
+            # A reset by another caller cancels queued chunks and makes submit() raise
+            # RuntimeError. Errors raised by fn itself are finished chunks and propagate.
+            pool = get_process_pool(workers)
+            stale = [entry for entry in pending if entry[2] is not pool and not _finished(entry[1])]
+            if not stale:
+                raise
+            resubmit(stale)
+            continue
+        pending.popleft()
+        yield result
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attaches to a segment created by the parent process, without tracking it.
+
+    SharedMemory(name=...) registers the segment with the resource tracker even when only
+    attaching (before Python 3.13). Workers share the parent's tracker, so that entry is
+    the parent's own: unregistering it from the worker makes the parent's unlink() fail
+    in the tracker, and leaving a worker's registration behind after a crash would unlink
+    the segment under the parent. The attach is therefore done without registering; the
+    creating process owns the segment's lifetime.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The repo is run from its root (streamlit run app.py) and imports as `src.*`.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def returns():
+    """Fat-tailed hourly-like returns, with ties, reproducible."""
+    r = np.random.default_rng(11).standard_t(4, size=1500) * 0.01
+    r[::97] = r[5]
+    return r
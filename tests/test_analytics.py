@@ -0,0 +1,118 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from src.eval.analytics import StudyLogs, study_report
+from src.eval.export import ExportBuffer
+from src.eval.sinks import open_event_sink
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+# session -> (backend, condition, trust per task); trust > 3 is an ACCEPT.
+SESSIONS = {
+    "s0": ("jsonl", "EXPLANATION_ON", (6, 5)),
+    "s1": ("sqlite", "EXPLANATION_ON", (4, 2)),
+    "s2": ("jsonl", "EXPLANATION_OFF", (3, 2)),
+    "s3": ("sqlite", "EXPLANATION_OFF", (5, 1)),
+}
+
+
+def _log_session(sink, k, session_id, condition, trusts):
+    base = {"participant_id": f"P{k}", "condition": condition, "session_id": session_id}
+    t = T0 + timedelta(hours=k)
+    for task, trust, score in zip(("T1", "T2"), trusts, (0.2, 0.8)):
+        ref = sink.append_snapshot({"risk_score": score, "risk_level": "LOW" if score < 0.33 else "HIGH"})
+        t += timedelta(seconds=5)
+        sink.append({**base, "event": "task_timer_start", "task_id": task, "snapshot_ref": ref, "timestamp_utc": t.isoformat()})
+        t += timedelta(seconds=30)
+        sink.append({**base, "event": "decision_submit", "task_id": task, "snapshot_ref": ref,
+                     "decision": "ACCEPT" if trust > 3 else "REJECT", "trust_1_7": trust, "confidence_1_7": 5,
+                     "timestamp_utc": t.isoformat()})
+        t += timedelta(seconds=2)
+        sink.append({**base, "event": "task_timer_stop", "task_id": task, "elapsed_sec": 37.0, "timestamp_utc": t.isoformat()})
+    t += timedelta(seconds=2)
+    sink.append({**base, "event": "sus_submit", "task_id": "T2", "sus_score": 60.0 + 10 * k, "timestamp_utc": t.isoformat()})
+
+
+@pytest.fixture
+def study(tmp_path):
+    sinks = {}
+    for k, (session_id, (backend, condition, trusts)) in enumerate(SESSIONS.items()):
+        sinks[session_id] = open_event_sink(backend, str(tmp_path / "event_logs"), session_id)
+        _log_session(sinks[session_id], k, session_id, condition, trusts)
+    # Exports of sessions already in the sink files must not double count.
+    for session_id, mode, name in (("s0", "flat", "logs.csv"), ("s1", "normalized", "logs.json")):
+        buffer = ExportBuffer(sinks[session_id], mode).refresh()
+        directory = tmp_path / session_id
+        directory.mkdir()
+        (directory / name).write_bytes(buffer.csv_bytes() if name.endswith(".csv") else buffer.json_bytes())
+        if mode == "normalized":
+            buffer.write_snapshot_tables()
+            (directory / "snapshots.json").write_bytes(buffer.snapshots_json_bytes())
+    for sink in sinks.values():
+        sink.flush()
+    yield tmp_path, sinks
+    for sink in sinks.values():
+        sink.close()
+
+
+def test_events_are_deduplicated_and_joined_with_snapshots(study):
+    root, _ = study
+    events = StudyLogs(str(root)).refresh().events()
+    assert len(events) == 7 * len(SESSIONS)
+    assert events["timestamp"].is_monotonic_increasing
+    decisions = events[events["event"] == "decision_submit"]
+    assert decisions["risk_level"].notna().all()
+    assert sorted(decisions["risk_score"].unique()) == [0.2, 0.8]
+
+
+def test_condition_summary(study):
+    root, _ = study
+    summary = StudyLogs(str(root)).refresh().condition_summary()
+    on, off = summary.loc["EXPLANATION_ON"], summary.loc["EXPLANATION_OFF"]
+    assert (on["participants"], on["sessions"], on["decisions"]) == (2, 2, 4)
+    assert on["acceptance_rate"] == pytest.approx(3 / 4)
+    assert off["acceptance_rate"] == pytest.approx(1 / 4)
+    assert on["trust_mean"] == pytest.approx(17 / 4)
+    assert on["sus_mean"] == pytest.approx(65.0) and off["sus_mean"] == pytest.approx(85.0)
+    assert on["task_time_mean"] == pytest.approx(37.0)
+
+
+def test_task_times_pair_each_stop_with_its_start(study):
+    root, _ = study
+    times = StudyLogs(str(root)).refresh().task_times()
+    assert len(times) == 2 * len(SESSIONS)
+    assert times["start_utc"].notna().all()
+    assert ((times["stop_utc"] - times["start_utc"]).dt.total_seconds() == 32.0).all()
+    assert set(times["risk_level"]) == {"LOW", "HIGH"}
+
+
+def test_refresh_reads_only_what_changed(study):
+    root, sinks = study
+    logs = StudyLogs(str(root)).refresh()
+    summary = logs.condition_summary()
+    assert logs.refresh().condition_summary() is summary
+
+    sinks["s2"].append({"event": "sus_submit", "participant_id": "P2", "condition": "EXPLANATION_OFF",
+                        "session_id": "s2", "task_id": "T2", "sus_score": 100.0,
+                        "timestamp_utc": (T0 + timedelta(days=1)).isoformat()})
+    sinks["s2"].flush()
+    updated = logs.refresh().condition_summary()
+    assert updated is not summary
+    assert updated.loc["EXPLANATION_OFF", "sus_n"] == 3
+
+
+def test_study_report_tables(study):
+    root, _ = study
+    report = study_report(str(root))
+    assert set(report) == {"conditions", "tasks", "trust_by_level", "trust_calibration"}
+    assert set(report["tasks"].index.get_level_values("task_id")) == {"T1", "T2"}
+    assert report["trust_by_level"].loc[("EXPLANATION_ON", "LOW"), "trust_mean"] == pytest.approx(5.0)
+    assert report["trust_calibration"].loc["EXPLANATION_ON", "trust_gap"] == pytest.approx(5.0 - 2.0)
+
+
+def test_empty_directory(tmp_path):
+    logs = StudyLogs(str(tmp_path)).refresh()
+    assert logs.events().empty
+    assert logs.condition_summary().empty
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.risk.attribution import risk_attribution, top_contributors
+from src.risk.metrics import (
+    downside_semidev,
+    herfindahl_hirschman_index,
+    historical_var_es,
+    max_drawdown,
+    portfolio_returns,
+)
+from src.risk.scoring import risk_score
+from src.risk.simulation import constant_correlation, simulate_correlated_returns
+
+WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+
+
+@pytest.fixture
+def asset_returns():
+    return simulate_correlated_returns(constant_correlation(4, 0.4), [0.01, 0.02, 0.015, 0.005], 0.0002, 2000, seed=3)
+
+
+def test_metrics_match_the_batch_functions(asset_returns):
+    attr = risk_attribution(asset_returns, WEIGHTS, alpha=0.05)
+    r = portfolio_returns(asset_returns, np.array(WEIGHTS))
+    var, es = historical_var_es(r, alpha=0.05)
+    m = attr["metrics"]
+    assert m["var"] == var
+    assert m["es"] == pytest.approx(es, rel=1e-12)
+    assert m["semidev"] == pytest.approx(downside_semidev(r), rel=1e-12)
+    assert m["mdd"] == pytest.approx(max_drawdown(r), rel=1e-12)
+    assert m["hhi"] == pytest.approx(herfindahl_hirschman_index(WEIGHTS))
+    assert m["score"] == risk_score(m["hhi"], m["semidev"], m["mdd"], m["var"], m["es"])
+
+
+@pytest.mark.parametrize("metric", ["hhi", "semidev", "mdd", "var", "es", "score"])
+def test_euler_contributions_sum_to_the_metric(asset_returns, metric):
+    attr = risk_attribution(asset_returns, WEIGHTS, alpha=0.05)
+    assert attr[metric].shape == (4,)
+    assert attr[metric].sum() == pytest.approx(attr["metrics"][metric], rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize("metric", ["semidev", "es"])
+def test_gradients_match_finite_differences(asset_returns, metric):
+    w = np.array(WEIGHTS)
+    attr = risk_attribution(asset_returns, w, alpha=0.05)
+    eps = 1e-7
+    for i in range(len(w)):
+        # Perturb along a direction inside the simplex, so normalization leaves it alone.
+        d = -np.full(len(w), 1 / (len(w) - 1))
+        d[i] = 1.0
+        up = risk_attribution(asset_returns, w + eps * d, alpha=0.05)["metrics"][metric]
+        down = risk_attribution(asset_returns, w - eps * d, alpha=0.05)["metrics"][metric]
+        assert (up - down) / (2 * eps) == pytest.approx(attr["gradients"][metric] @ d, rel=1e-4, abs=1e-9)
+
+
+def test_top_contributors_are_the_largest_score_shares(asset_returns):
+    attr = risk_attribution(asset_returns, WEIGHTS, alpha=0.05)
+    top = top_contributors(attr, k=2)
+    order = np.argsort(-attr["score"], kind="stable")
+    assert [i for i, _ in top] == order[:2].tolist()
+    assert [share for _, share in top] == pytest.approx(attr["score"][order[:2]] / attr["score"].sum())
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.risk.batch import evaluate_weight_batch
+from src.risk.metrics import (
+    downside_semidev,
+    herfindahl_hirschman_index,
+    historical_var_es,
+    max_drawdown,
+    normalize_weights,
+    portfolio_returns,
+)
+from src.risk.recommendations import recommendation_from_score, risk_levels
+from src.risk.scoring import risk_score, risk_score_array
+
+
+@pytest.fixture
+def asset_returns():
+    rng = np.random.default_rng(6)
+    return rng.standard_t(4, size=(1200, 5)) * np.array([0.004, 0.01, 0.02, 0.015, 0.03])
+
+
+@pytest.fixture
+def weights():
+    W = np.random.default_rng(7).dirichlet(np.full(5, 0.5), size=300)
+    W[0] = [1, 0, 0, 0, 0]
+    W[1] = [2, 2, 2, 2, 2]  # unnormalized, as the sidebar sliders give
+    return W
+
+
+def _one_at_a_time(asset_returns, W, alpha):
+    # The per-vector pipeline the batch engine replaces.
+    rows = []
+    for w in W:
+        w = normalize_weights(w)
+        r = portfolio_returns(asset_returns, w)
+        hhi, sd, mdd = herfindahl_hirschman_index(w), downside_semidev(r, mar=0.0), max_drawdown(r)
+        var, es = historical_var_es(r, alpha=alpha)
+        score = risk_score(hhi, sd, mdd, var, es)
+        rows.append((hhi, sd, mdd, var, es, score, recommendation_from_score(score)[0]))
+    return rows
+
+
+@pytest.mark.parametrize("block_size", [1, 64, 256, 1000])
+def test_batch_matches_the_per_vector_pipeline(asset_returns, weights, block_size):
+    out = evaluate_weight_batch(asset_returns, weights, alpha=0.05, block_size=block_size)
+    expected = _one_at_a_time(asset_returns, weights, 0.05)
+    for k, name in enumerate(("hhi", "semidev", "mdd", "var", "es", "score")):
+        np.testing.assert_allclose(out[name], [row[k] for row in expected], rtol=1e-12, atol=1e-15)
+    assert list(out["level"]) == [row[6] for row in expected]
+
+
+def test_levels_use_the_recommendation_thresholds():
+    scores = [0.0, 0.3299, 0.33, 0.5, 0.6599, 0.66, 1.0]
+    assert list(risk_levels(scores)) == [recommendation_from_score(s)[0] for s in scores]
+
+
+def test_score_array_matches_scalar_score_including_nan_tail():
+    metrics = [(0.2, 0.01, -0.1, -0.02, -0.03), (0.9, 0.05, -0.5, np.nan, np.nan), (0.35, 0.0, 0.0, -0.2, -0.3)]
+    arrays = [np.array(column) for column in zip(*metrics)]
+    np.testing.assert_allclose(risk_score_array(*arrays), [risk_score(*m) for m in metrics], rtol=0, atol=1e-15)
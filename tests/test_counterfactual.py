@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.risk.batch import evaluate_weight_batch
+from src.risk.counterfactual import counterfactual_allocation_text, search_counterfactual, turnover
+from src.risk.simulation import constant_correlation, simulate_correlated_returns
+
+
+def _score(asset_returns, weights):
+    return float(evaluate_weight_batch(asset_returns, np.asarray(weights, dtype=float)[None, :])["score"][0])
+
+
+@pytest.fixture
+def reachable():
+    # One very volatile asset next to two calm ones: all-in on the first is HIGH.
+    return simulate_correlated_returns(constant_correlation(3, 0.2), [0.05, 0.004, 0.004], 0.0, 2000, seed=1)
+
+
+@pytest.fixture
+def unreachable():
+    # Every asset is volatile and they move together: no allocation leaves HIGH.
+    return simulate_correlated_returns(constant_correlation(3, 0.9), [0.05, 0.05, 0.05], 0.0, 2000, seed=1)
+
+
+def test_reachable_target_is_found(reachable):
+    result = search_counterfactual(reachable, [1.0, 0.0, 0.0], time_limit_ms=5000)
+    assert result["found"] and not result["timed_out"]
+    assert result["threshold"] == 0.66
+    assert result["score"] < result["threshold"]
+    assert result["score"] == pytest.approx(_score(reachable, result["weights"]))
+    assert result["turnover"] == pytest.approx(turnover([1.0, 0.0, 0.0], result["weights"]))
+    assert "would lower the risk score" in counterfactual_allocation_text(result)
+
+
+def test_unreachable_target_ends_without_using_the_budget(unreachable):
+    result = search_counterfactual(unreachable, [1.0, 0.0, 0.0], time_limit_ms=60_000, max_samples=256)
+    assert not result["found"] and not result["timed_out"]
+    assert result["elapsed_ms"] < 60_000
+    assert result["lowest_score"] >= result["threshold"]
+    assert "search budget" not in counterfactual_allocation_text(result)
+
+
+def test_search_stops_at_the_time_limit(unreachable):
+    result = search_counterfactual(unreachable, [1.0, 0.0, 0.0], time_limit_ms=0.0, max_samples=10**9)
+    assert result["timed_out"] and not result["found"]
+    assert "search budget" in counterfactual_allocation_text(result)
+
+
+def test_single_asset_returns_at_once(reachable):
+    result = search_counterfactual(reachable[:, :1], [1.0], time_limit_ms=60_000)
+    assert result["threshold"] is not None
+    assert not result["found"] and not result["timed_out"]
+    assert result["evaluations"] == 1
+    assert counterfactual_allocation_text(result) == "With a single asset there is no other allocation to move to."
+
+
+def test_low_allocation_needs_no_search():
+    calm = simulate_correlated_returns(constant_correlation(4, 0.2), [0.004] * 4, 0.0, 2000, seed=1)
+    result = search_counterfactual(calm, [0.25] * 4)
+    assert result["threshold"] is None and result["evaluations"] == 1
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from src.ui.figures import figure_render_stats, histogram_png, line_chart_png
+from src.utils.math_utils import lttb_indices
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def test_short_series_are_plotted_whole():
+    x = np.arange(500.0)
+    np.testing.assert_array_equal(lttb_indices(x, np.sin(x), 640), np.arange(500))
+    np.testing.assert_array_equal(lttb_indices(x, np.sin(x), 2), np.arange(500))
+
+
+def test_lttb_keeps_the_ends_and_the_spikes():
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(size=4300))
+    y[1234] += 200.0
+    y[3210] -= 200.0
+    keep = lttb_indices(np.arange(len(y), dtype=float), y, 640)
+    assert len(keep) == 640 and keep[0] == 0 and keep[-1] == len(y) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert {1234, 3210} <= set(keep.tolist())
+
+
+def test_charts_are_rendered_once_per_data():
+    dates = pd.Series(pd.date_range("2025-01-01", periods=3000, freq="h", tz="UTC"))
+    y = np.cumsum(np.random.default_rng(1).normal(size=3000))
+    renders = figure_render_stats()["renders"]
+    png = line_chart_png(dates, y, "Test", "Date", "Value")
+    assert png.startswith(PNG_SIGNATURE)
+    assert line_chart_png(dates, y.copy(), "Test", "Date", "Value") == png
+    assert figure_render_stats()["renders"] == renders + 1
+
+    assert line_chart_png(dates, y + 1, "Test", "Date", "Value") != png
+    hist = histogram_png(y, bins=40, title="Test", xlabel="x", ylabel="n")
+    assert hist.startswith(PNG_SIGNATURE) and histogram_png(y, 40, "Test", "x", "n") == hist
+    assert figure_render_stats()["renders"] == renders + 3
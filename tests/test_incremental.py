@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.risk.incremental import DrawdownAccumulator, RiskAccumulator, SemidevAccumulator, TailAccumulator
+from src.risk.metrics import downside_semidev, historical_var_es, max_drawdown
+from src.risk.simulation import _parse_csv, append_market_bars, get_shared_market_data
+
+
+def _batches(returns, size):
+    return [returns[i: i + size] for i in range(0, len(returns), size)]
+
+
+@pytest.mark.parametrize("size", [1, 37, 500])
+def test_tail_accumulator_matches_batch(returns, size):
+    acc = TailAccumulator(alpha=0.05)
+    seen = 0
+    for batch in _batches(returns, size):
+        acc.update(batch)
+        seen += len(batch)
+        var, es = historical_var_es(returns[:seen], alpha=0.05)
+        assert acc.var_es()[0] == var
+        assert acc.var_es()[1] == pytest.approx(es, rel=1e-14)
+
+
+def test_tail_sum_stays_exact_over_long_streams():
+    # Many returns crossing in and out of the tail; the compensated sum must not drift.
+    r = np.random.default_rng(5).standard_t(3, size=20000) * 0.01
+    acc = TailAccumulator(alpha=0.01)
+    for batch in _batches(r, 1):
+        acc.update(batch)
+    var, es = historical_var_es(r, alpha=0.01)
+    assert acc.var_es()[0] == var
+    assert acc.var_es()[1] == pytest.approx(es, rel=1e-14)
+
+
+@pytest.mark.parametrize("size", [1, 37, 500])
+def test_drawdown_accumulator_is_bit_identical_to_batch(returns, size):
+    acc = DrawdownAccumulator()
+    seen = 0
+    for batch in _batches(returns, size):
+        acc.update(batch)
+        seen += len(batch)
+        assert acc.max_drawdown == max_drawdown(returns[:seen])
+
+
+def test_semidev_accumulator_matches_batch(returns):
+    acc = SemidevAccumulator()
+    seen = 0
+    for batch in _batches(returns, 37):
+        acc.update(batch)
+        seen += len(batch)
+        assert acc.value == pytest.approx(downside_semidev(returns[:seen]), rel=1e-14)
+
+
+def test_risk_accumulator_metrics(returns):
+    acc = RiskAccumulator(alpha=0.05).update(returns[:1000]).update(returns[1000:])
+    var, es = historical_var_es(returns, alpha=0.05)
+    metrics = acc.metrics()
+    assert acc.count == len(returns)
+    assert (metrics["var"], metrics["mdd"]) == (var, max_drawdown(returns))
+    assert metrics["es"] == pytest.approx(es, rel=1e-14)
+    assert metrics["semidev"] == pytest.approx(downside_semidev(returns), rel=1e-14)
+
+
+def test_empty_accumulators():
+    assert all(np.isnan(v) for v in TailAccumulator().var_es())
+    assert np.isnan(SemidevAccumulator().value)
+    assert DrawdownAccumulator().update([]).count == 0
+
+
+def test_append_market_bars_persists_in_the_file_column_order(tmp_path):
+    csv_path = tmp_path / "bars.csv"
+    csv_path.write_text(
+        "Ticker,ETH-USD,ETH-USD,ETH-USD,ETH-USD,ETH-USD\n"
+        "Price,Close,High,Low,Open,Volume\n"
+        "Datetime,,,,,\n"
+        "2025-01-01 00:00:00+00:00,10.0,11.0,9.0,9.5,100\n"
+        "2025-01-01 01:00:00+00:00,10.5,11.5,9.5,10.0,200\n"
+    )
+    path = str(csv_path)
+    get_shared_market_data(path)
+    new_bars = pd.DataFrame({
+        "Datetime": [pd.Timestamp("2025-01-01 02:00", tz="UTC")],
+        "Open": [10.5], "High": [12.0], "Low": [10.0], "Close": [11.0], "Volume": [300.0],
+    })
+    returns = append_market_bars(new_bars, path, persist=True)
+
+    np.testing.assert_allclose(returns, [11.0 / 10.5 - 1])
+    ts, columns, symbol = _parse_csv(path)
+    assert symbol == "ETH-USD" and len(ts) == 3
+    assert {name: values[-1] for name, values in columns.items()} == {
+        "Open": 10.5, "High": 12.0, "Low": 10.0, "Close": 11.0, "Volume": 300.0,
+    }
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.risk.metrics import downside_semidev, portfolio_returns
+from src.risk.moments import compute_moments, merge_moments, moment_metrics, semidev_approximation_error
+
+
+@pytest.fixture
+def asset_returns():
+    rng = np.random.default_rng(4)
+    return rng.standard_t(4, size=(900, 4)) * np.array([0.01, 0.02, 0.005, 0.015]) + 0.0002
+
+
+def test_moments_match_numpy(asset_returns):
+    moments = compute_moments(asset_returns, mar=0.001)
+    downside = np.minimum(asset_returns - 0.001, 0.0)
+    np.testing.assert_allclose(moments["mean"], asset_returns.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(moments["cov"], np.cov(asset_returns, rowvar=False, bias=True), rtol=1e-12)
+    np.testing.assert_allclose(moments["cosemi"], downside.T @ downside / len(downside), rtol=1e-12)
+
+
+def test_moment_metrics_match_the_portfolio_series(asset_returns):
+    moments = compute_moments(asset_returns)
+    weights = np.random.default_rng(0).dirichlet(np.ones(4), size=20)
+    batch = moment_metrics(moments, weights)
+    for k, w in enumerate(weights):
+        r = portfolio_returns(asset_returns, w)
+        assert batch["mean"][k] == pytest.approx(r.mean(), rel=1e-12)
+        assert batch["variance"][k] == pytest.approx(r.var(), rel=1e-10)
+        assert batch["volatility"][k] == pytest.approx(r.std(), rel=1e-10)
+    single = moment_metrics(moments, weights[3])
+    assert single == {name: pytest.approx(values[3]) for name, values in batch.items()}
+
+
+@pytest.mark.parametrize("split", [1, 450, 899])
+def test_merged_moments_equal_moments_of_the_whole(asset_returns, split):
+    merged = merge_moments(
+        compute_moments(asset_returns[:split], mar=0.001),
+        compute_moments(asset_returns[split:], mar=0.001),
+    )
+    whole = compute_moments(asset_returns, mar=0.001)
+    assert merged["n_periods"] == whole["n_periods"] and merged["mar"] == whole["mar"]
+    for name in ("mean", "cov", "cosemi"):
+        np.testing.assert_allclose(merged[name], whole[name], rtol=1e-10, atol=1e-18)
+
+
+def test_merging_moments_with_different_mar_is_rejected(asset_returns):
+    with pytest.raises(ValueError):
+        merge_moments(compute_moments(asset_returns[:10]), compute_moments(asset_returns[10:], mar=0.01))
+
+
+def test_semidev_approximation_error_reports_against_the_exact_value(asset_returns):
+    weights = np.array([0.4, 0.1, 0.3, 0.2])
+    report = semidev_approximation_error(asset_returns, weights)
+    exact = downside_semidev(portfolio_returns(asset_returns, weights))
+    assert report["exact"] == pytest.approx(exact, rel=1e-12)
+    assert report["approx"] == pytest.approx(moment_metrics(compute_moments(asset_returns), weights)["semidev"])
+    assert report["abs_error"] == pytest.approx(abs(report["approx"] - exact))
+    assert report["rel_error"] == pytest.approx(report["abs_error"] / exact)
+    assert report["rel_error"] > 0  # independent assets rarely fall below mar together
+
+
+def test_semidev_approximation_is_exact_when_assets_fall_together():
+    base = np.random.default_rng(1).normal(0, 0.01, size=500)
+    asset_returns = np.column_stack([base, 2 * base, 0.5 * base])
+    report = semidev_approximation_error(asset_returns, np.random.default_rng(2).dirichlet(np.ones(3), size=5))
+    np.testing.assert_allclose(report["approx"], report["exact"], rtol=1e-12)
+
+
+def test_semidev_relative_error_is_zero_without_downside():
+    report = semidev_approximation_error(np.full((50, 2), 0.01), [0.5, 0.5])
+    assert report["exact"] == 0.0 and report["rel_error"] == 0.0
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.risk.metrics import historical_var_es
+from src.risk.montecarlo import _simulate_chunk, fhs_params, simulate_forward_risk
+from src.utils.parallel import reset_process_pool
+
+
+@pytest.fixture
+def iid_returns():
+    return np.random.default_rng(4).normal(0.0002, 0.01, size=(4000, 1))
+
+
+def test_fhs_residuals_are_standardized(returns):
+    params = fhs_params(returns)
+    assert params["residuals"].mean() == pytest.approx(0.0, abs=1e-12)
+    assert params["residuals"].std() == pytest.approx(1.0)
+    assert params["mu"] == pytest.approx(returns.mean())
+
+
+def test_fhs_one_step_std_matches_the_filtered_volatility(returns):
+    params = fhs_params(returns)
+    paths = _simulate_chunk("fhs", params, np.ones(1), 200_000, 1, np.random.SeedSequence(0))
+    assert paths.std() == pytest.approx(np.sqrt(params["sigma2"]), rel=0.02)
+    assert paths.mean() == pytest.approx(params["mu"], abs=3 * np.sqrt(params["sigma2"] / 200_000))
+
+
+@pytest.mark.parametrize("method", ["fhs", "gbm"])
+def test_one_bar_var_is_close_to_historical(iid_returns, method):
+    r = iid_returns[:, 0]
+    result = simulate_forward_risk(iid_returns, [1.0], horizon=1, n_paths=50_000, method=method, workers=1)
+    var, es = historical_var_es(r, alpha=0.05)
+    if method == "fhs":
+        # FHS starts from today's filtered volatility, so compare at that scale.
+        params = fhs_params(r)
+        scale = np.sqrt(params["sigma2"]) / r.std()
+        var, es = params["mu"] + scale * (var - params["mu"]), params["mu"] + scale * (es - params["mu"])
+    assert result["horizon_var"] == pytest.approx(var, rel=0.1)
+    assert result["horizon_es"] == pytest.approx(es, rel=0.1)
+
+
+def test_results_do_not_depend_on_workers(iid_returns):
+    kwargs = dict(horizon=24, n_paths=5000, method="fhs", chunk_paths=1024)
+    one = simulate_forward_risk(iid_returns, [1.0], workers=1, **kwargs)
+    try:
+        two = simulate_forward_risk(iid_returns, [1.0], workers=2, **kwargs)
+    finally:
+        reset_process_pool()
+    assert {k: v for k, v in one.items() if k != "elapsed_ms"} == {k: v for k, v in two.items() if k != "elapsed_ms"}
@@ -0,0 +1,38 @@
+import pytest
+
+from src.utils.parallel import get_process_pool, map_chunks, reset_process_pool
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    reset_process_pool()
+    yield
+    reset_process_pool()
+
+
+def test_each_worker_count_keeps_its_own_pool():
+    two = get_process_pool(2)
+    three = get_process_pool(3)
+    assert two is not three and get_process_pool(2) is two
+
+    # Asking for another size mid-run must not cancel this run's chunks.
+    results = map_chunks(pow, ((i, 2) for i in range(20)), workers=2, max_pending=8)
+    assert next(results) == 0
+    get_process_pool(4)
+    assert list(results) == [i * i for i in range(1, 20)]
+
+
+def test_chunks_cancelled_by_a_reset_are_resubmitted():
+    results = map_chunks(pow, ((i, 2) for i in range(20)), workers=2, max_pending=8)
+    assert next(results) == 0
+    old = get_process_pool(2)
+    reset_process_pool(old)  # another caller replacing the pool cancels our queued chunks
+    assert list(results) == [i * i for i in range(1, 20)]
+    assert get_process_pool(2) is not old
+
+
+def test_errors_raised_by_the_chunk_function_propagate():
+    pool = get_process_pool(2)
+    with pytest.raises(TypeError):
+        list(map_chunks(pow, [(2, 2), ("a", 2)], workers=2))
+    assert get_process_pool(2) is pool
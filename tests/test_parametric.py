@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.risk.metrics import VAR_ES_METHODS, historical_var_es, var_es
+from src.risk.parametric import (
+    StreamingMoments,
+    compare_var_es_estimators,
+    cornish_fisher_var_es,
+    gaussian_var_es,
+    parametric_var_es,
+)
+
+
+def _batch_moments(x):
+    c = x - x.mean()
+    m2 = np.sum(c ** 2)
+    return x.mean(), np.sqrt(m2 / len(x)), np.sqrt(len(x)) * np.sum(c ** 3) / m2 ** 1.5, len(x) * np.sum(c ** 4) / m2 ** 2 - 3
+
+
+@pytest.mark.parametrize("size", [1, 7, 500])
+def test_streaming_moments_match_batch(returns, size):
+    m = StreamingMoments()
+    for i in range(0, len(returns), size):
+        m.update(returns[i: i + size])
+    mean, std, skew, kurt = _batch_moments(returns)
+    assert m.count == len(returns)
+    assert m.mean == pytest.approx(mean, rel=1e-12)
+    assert m.std == pytest.approx(std, rel=1e-12)
+    assert m.skewness == pytest.approx(skew, rel=1e-9)
+    assert m.excess_kurtosis == pytest.approx(kurt, rel=1e-9)
+
+
+def test_merge_equals_one_pass(returns):
+    merged = StreamingMoments().update(returns[:400]).merge(StreamingMoments().update(returns[400:]))
+    whole = StreamingMoments().update(returns)
+    for attr in ("count", "mean", "std", "skewness", "excess_kurtosis"):
+        assert getattr(merged, attr) == pytest.approx(getattr(whole, attr), rel=1e-12)
+    assert StreamingMoments().merge(whole).mean == whole.mean
+
+
+@pytest.mark.parametrize("alpha", [0.01, 0.05, 0.1])
+def test_cornish_fisher_reduces_to_gaussian_without_skew_or_kurtosis(alpha):
+    assert cornish_fisher_var_es(0.001, 0.02, 0.0, 0.0, alpha) == pytest.approx(gaussian_var_es(0.001, 0.02, alpha))
+
+
+@pytest.mark.parametrize("skew, kurt", [(0.0, 0.0), (-0.5, 3.0), (-1.0, 6.0), (0.5, 2.0)])
+def test_cornish_fisher_is_a_loss_and_monotone_in_alpha(skew, kurt):
+    alphas = np.linspace(0.005, 0.2, 40)
+    var, es = np.array([cornish_fisher_var_es(0.0, 0.01, skew, kurt, a) for a in alphas]).T
+    assert np.all(var < 0) and np.all(es < var)
+    assert np.all(np.diff(var) > 0) and np.all(np.diff(es) > 0)
+
+
+def test_cornish_fisher_moves_the_tail_with_skew_and_kurtosis():
+    gaussian_var = gaussian_var_es(0.0, 0.01, 0.05)[0]
+    assert cornish_fisher_var_es(0.0, 0.01, -0.5, 0.0, 0.05)[0] < gaussian_var
+    assert cornish_fisher_var_es(0.0, 0.01, 0.5, 0.0, 0.05)[0] > gaussian_var
+    # Excess kurtosis deepens the far tail (at 5% its term nearly vanishes).
+    assert cornish_fisher_var_es(0.0, 0.01, 0.0, 4.0, 0.01)[0] < gaussian_var_es(0.0, 0.01, 0.01)[0]
+
+
+def test_gaussian_var_es_on_normal_sample():
+    x = np.random.default_rng(0).normal(0.0, 0.01, 200_000)
+    var, es = parametric_var_es(x, alpha=0.05, method="gaussian")
+    hist_var, hist_es = historical_var_es(x, alpha=0.05)
+    assert var == pytest.approx(hist_var, rel=0.02)
+    assert es == pytest.approx(hist_es, rel=0.02)
+
+
+def test_var_es_dispatches_by_method(returns):
+    assert var_es(returns, 0.05) == historical_var_es(returns, 0.05)
+    assert var_es(returns, 0.05, "sketch") == historical_var_es(returns, 0.05, method="sketch")
+    for method in ("gaussian", "cornish_fisher"):
+        assert var_es(returns, 0.05, method) == parametric_var_es(returns, 0.05, method=method)
+    with pytest.raises(ValueError):
+        var_es(returns, 0.05, "bogus")
+    with pytest.raises(ValueError):
+        historical_var_es(returns, 0.05, method="gaussian")
+    assert set(VAR_ES_METHODS) == {"historical", "sketch", "gaussian", "cornish_fisher"}
+
+
+def test_compare_var_es_estimators(returns):
+    rows = compare_var_es_estimators(returns, alpha=0.05, repeats=2)
+    assert [row["estimator"] for row in rows] == ["historical", "gaussian", "cornish_fisher"]
+    assert rows[0]["var_diff"] == 0.0 and np.isnan(rows[0]["moments_latency_ms"])
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from src.risk.metrics import downside_semidev, historical_var_es, max_drawdown
+from src.risk.rolling import (
+    rolling_drawdown,
+    rolling_max_drawdown,
+    rolling_risk_metrics,
+    rolling_semidev,
+    rolling_var_es,
+)
+
+
+def _naive(returns, window, fn):
+    out = np.full(len(returns), np.nan)
+    for t in range(window - 1, len(returns)):
+        out[t] = fn(returns[t - window + 1: t + 1])
+    return out
+
+
+@pytest.mark.parametrize("window", [1, 24, 168])
+def test_rolling_var_es_matches_recomputation(returns, window):
+    var, es = rolling_var_es(returns, window, alpha=0.05)
+    naive = [historical_var_es(returns[t - window + 1: t + 1], alpha=0.05) for t in range(window - 1, len(returns))]
+    assert np.isnan(var[: window - 1]).all() and np.isnan(es[: window - 1]).all()
+    np.testing.assert_array_equal(var[window - 1:], [v for v, _ in naive])
+    np.testing.assert_allclose(es[window - 1:], [e for _, e in naive], rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("window", [1, 24, 168])
+def test_rolling_semidev_matches_recomputation(returns, window):
+    np.testing.assert_allclose(
+        rolling_semidev(returns, window), _naive(returns, window, downside_semidev), rtol=1e-9, atol=1e-12
+    )
+
+
+@pytest.mark.parametrize("window", [1, 24, 168])
+def test_rolling_max_drawdown_matches_recomputation(returns, window):
+    np.testing.assert_allclose(
+        rolling_max_drawdown(returns, window), _naive(returns, window, max_drawdown), rtol=1e-9, atol=1e-12
+    )
+
+
+def test_rolling_drawdown_is_distance_from_window_peak(returns):
+    window = 24
+    equity = np.cumprod(1 + returns)
+    expected = np.full(len(returns), np.nan)
+    for t in range(window - 1, len(returns)):
+        peak = equity[t - window + 1: t + 1].max()
+        expected[t] = (equity[t] - peak) / peak
+    np.testing.assert_allclose(rolling_drawdown(returns, window), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_short_series_gives_all_nan(returns):
+    var, es = rolling_var_es(returns[:10], 24)
+    assert np.isnan(var).all() and np.isnan(es).all()
+    assert np.isnan(rolling_semidev(returns[:10], 24)).all()
+    assert np.isnan(rolling_max_drawdown(returns[:10], 24)).all()
+
+
+def test_rolling_risk_metrics_frame(returns):
+    df = rolling_risk_metrics(returns, 24)
+    assert list(df.columns) == ["var", "es", "semidev", "mdd"]
+    assert len(df) == len(returns)
+    assert df.iloc[23:].notna().all().all()
@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.risk.scenarios import get_scenario_library
+from src.risk.simulation import get_market_data
+from src.risk.snapshot import compute_risk_snapshot
+
+
+def test_market_data_does_not_depend_on_lookback():
+    short, short_dates = get_market_data(n_assets=4, n_periods=500, seed=7)
+    long, long_dates = get_market_data(n_assets=4, n_periods=2000, seed=7)
+    assert np.array_equal(short, long[-len(short):])
+    assert short_dates.equals(long_dates[-len(short_dates):])
+
+
+def test_scenario_windows_match_snapshot_returns():
+    n_assets, n_periods = 4, 2000
+    snapshot = compute_risk_snapshot(n_assets, n_periods, 7, 0.05, np.full(n_assets, 1 / n_assets))
+    library = get_scenario_library(n_assets, n_periods, seed=7)
+    position = {d: i for i, d in enumerate(snapshot.dates)}
+
+    checked = 0
+    for k, bars in enumerate(library["bars"].tolist()):
+        start = position.get(library["start"][k])
+        if start is None or start + bars > len(snapshot.dates):
+            continue
+        assert np.array_equal(library["returns"][k, :bars], snapshot.asset_returns[start: start + bars])
+        checked += 1
+    assert checked > 0
@@ -0,0 +1,227 @@
+import gc
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from src.eval import sinks
+from src.eval.export import ExportBuffer, rehydrate
+from src.eval.sinks import EventSink, acquire_event_sink, open_event_sink, read_log_file, snapshot_ref
+
+BACKENDS = ["jsonl", "sqlite"]
+
+
+def _events(n, start=0):
+    return [
+        {"timestamp_utc": f"2026-01-01T00:00:{i:02d}+00:00", "session_id": "s1", "event": "decision_submit", "i": i}
+        for i in range(start, start + n)
+    ]
+
+
+@pytest.fixture(params=BACKENDS)
+def sink(request, tmp_path):
+    sink = open_event_sink(request.param, str(tmp_path), "s1", fsync="always")
+    yield sink
+    sink.close()
+
+
+def test_events_round_trip(sink):
+    for event in _events(100):
+        sink.append(event)
+    assert sink.read_all() == _events(100)
+    assert sink.count == 100
+    assert list(sink.tail)[-1] == _events(100)[-1]
+
+
+def test_read_from_returns_only_new_events(sink):
+    for event in _events(3):
+        sink.append(event)
+    first, position = sink.read_from(0)
+    for event in _events(2, start=3):
+        sink.append(event)
+    second, position = sink.read_from(position)
+    assert first == _events(3)
+    assert second == _events(2, start=3)
+    assert sink.read_from(position)[0] == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_log_survives_close_and_reopen(tmp_path, backend):
+    sink = open_event_sink(backend, str(tmp_path), "s1")
+    for event in _events(5):
+        sink.append(event)
+    sink.close()
+    assert read_log_file(sink.path)[0] == _events(5)
+    reopened = open_event_sink(backend, str(tmp_path), "s1")
+    reopened.append(_events(1, start=5)[0])
+    assert reopened.read_all() == _events(6)
+    reopened.close()
+    with pytest.raises(RuntimeError):
+        reopened.append({"event": "late"})
+
+
+def test_jsonl_reader_skips_a_partial_last_line(tmp_path):
+    sink = open_event_sink("jsonl", str(tmp_path), "s1")
+    sink.append(_events(1)[0])
+    sink.close()
+    with open(sink.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "cut sho')
+    assert read_log_file(sink.path)[0] == _events(1)
+    # A new writer terminates the partial line before appending.
+    reopened = open_event_sink("jsonl", str(tmp_path), "s1")
+    reopened.append(_events(1, start=1)[0])
+    assert reopened.read_all() == _events(2)
+    reopened.close()
+
+
+def test_unknown_backend_and_policy_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_event_sink("csv", str(tmp_path), "s1")
+    with pytest.raises(ValueError):
+        open_event_sink("jsonl", str(tmp_path), "s1", fsync="sometimes")
+
+
+def test_event_sink_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        EventSink(str(tmp_path / "log"))
+
+
+def test_leases_share_one_sink_and_the_last_release_closes_it(tmp_path):
+    a = acquire_event_sink("jsonl", str(tmp_path), "s1")
+    b = acquire_event_sink("jsonl", str(tmp_path), "s1")
+    assert a.sink is b.sink
+    shared = a.sink
+    a.release()
+    assert not shared._closed
+    shared.append(_events(1)[0])
+    del b
+    gc.collect()
+    assert shared._closed and not shared._thread.is_alive()
+    assert shared.path not in sinks._shared_sinks and shared not in sinks._open_sinks
+
+    c = acquire_event_sink("jsonl", str(tmp_path), "s1")
+    assert c.sink is not shared
+    assert c.sink.read_all() == _events(1)
+    c.release()
+
+
+SNAPSHOT = {"risk_score": 0.41, "risk_level": "MEDIUM", "weights": [0.5, 0.5]}
+
+
+def test_repeated_snapshots_are_stored_once(sink):
+    refs = {sink.append_snapshot(dict(SNAPSHOT)) for _ in range(5)}
+    other = sink.append_snapshot(dict(SNAPSHOT, risk_score=0.9))
+    assert refs == {snapshot_ref(SNAPSHOT)} and other not in refs
+    assert sink.read_snapshots() == {snapshot_ref(SNAPSHOT): SNAPSHOT, other: dict(SNAPSHOT, risk_score=0.9)}
+    if isinstance(sink, sinks.JsonlSink):
+        with open(sink.snapshot_path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 2
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_snapshot_cache_is_bounded(tmp_path, backend):
+    sink = open_event_sink(backend, str(tmp_path), "s1", snapshot_cache_size=2)
+    refs = [sink.append_snapshot({"i": i}) for i in range(4)]
+    assert len(sink._snapshots) == 2
+    assert sink.cached_snapshot(refs[0]) is None and sink.cached_snapshot(refs[3]) == {"i": 3}
+    # An evicted snapshot seen again is written again; readers still get one entry per ref.
+    assert sink.append_snapshot({"i": 0}) == refs[0]
+    assert sink.read_snapshots() == {ref: {"i": i} for i, ref in enumerate(refs)}
+    sink.close()
+
+
+def test_rehydrate_restores_the_flat_event():
+    ref = snapshot_ref(SNAPSHOT)
+    event = {"event": "decision_submit", "snapshot_ref": ref, "decision": "ACCEPT"}
+    assert rehydrate(event, {ref: SNAPSHOT}) == {"event": "decision_submit", **SNAPSHOT, "decision": "ACCEPT"}
+    assert rehydrate(event, {}) is event
+
+
+def _log_session(sink):
+    flat = []
+    for i, event in enumerate(_events(6)):
+        snapshot = dict(SNAPSHOT, risk_score=0.1 * (i % 2))
+        ref = sink.append_snapshot(snapshot)
+        sink.append({**event, "snapshot_ref": ref, "note": "x" if i == 4 else None})
+        flat.append({**event, **snapshot, "note": "x" if i == 4 else None})
+    return flat
+
+
+def test_flat_export_matches_events_with_their_snapshots(sink):
+    flat = _log_session(sink)
+    buffer = ExportBuffer(sink, "flat").refresh()
+    assert json.loads(buffer.json_bytes()) == flat
+    assert buffer.json_bytes() == json.dumps(flat, indent=2).encode("utf-8")
+    exported = pd.read_csv(io.BytesIO(buffer.csv_bytes()))
+    assert list(exported.columns) == list(pd.DataFrame(flat).columns)
+    assert len(exported) == len(flat)
+
+    # Refreshing appends only what was logged since.
+    sink.append(_events(1, start=6)[0])
+    assert json.loads(buffer.refresh().json_bytes()) == flat + _events(1, start=6)
+    assert buffer.count == 7
+
+
+LATEST_SNAPSHOT = {
+    "n_assets": 2, "n_periods": 750, "seed": 7, "alpha": 0.05, "weights": [0.25, 0.75],
+    "risk_level": "MEDIUM", "risk_score": 0.4123, "hhi": 0.625, "semidev": 0.0061, "mdd": -0.31,
+    "var": -0.0112, "es": -0.0167, "machine_action": "REDUCE RISK", "machine_recommendation_text": "Why.",
+    "explanation_shown": True, "counterfactual_shown": False, "loss_aversion_mode": True,
+}
+
+
+def _study_logs():
+    """The same session as (baseline inline events, events with snapshot_ref), in log order."""
+    snapshot = LATEST_SNAPSHOT
+    decision = {"event": "decision_submit", "participant_id": "P001", "task_id": "T1",
+                "condition": "EXPLANATION_ON", "decision": "ACCEPT", "confidence_1_7": 4, "trust_1_7": 5}
+    timer = {"event": "task_timer_start", "participant_id": "P001", "task_id": "T1", "condition": "EXPLANATION_ON"}
+    stamp = {"timestamp_utc": "2026-01-01T00:00:00+00:00", "session_id": "s1"}
+    # decision_submit used to carry the snapshot inline with the weights last.
+    inline_decision = {
+        **decision,
+        **{k: v for k, v in snapshot.items() if k != "weights"},
+        "weights": snapshot["weights"],
+        "elapsed_sec": 12.5,
+    }
+    baseline = [
+        {**inline_decision, **stamp},
+        {**timer, **snapshot, **stamp},
+        {"event": "task_timer_stop", "participant_id": "P001", "task_id": "T1",
+         "condition": "EXPLANATION_ON", "elapsed_sec": 30.25, **stamp},
+        {"event": "sus_submit", "participant_id": "P001", "task_id": "T1", "condition": "EXPLANATION_ON",
+         "sus_score": 72.5, "sus_items": [4, 2, 4, 2, 4, 2, 4, 2, 4, 1], "elapsed_sec": 40.0, **stamp},
+    ]
+    ref = snapshot_ref(snapshot)
+    logged = [
+        {**decision, "snapshot_ref": ref, "elapsed_sec": 12.5, **stamp},
+        {**timer, "snapshot_ref": ref, **stamp},
+        baseline[2],
+        baseline[3],
+    ]
+    return baseline, logged
+
+
+def test_flat_csv_is_what_pandas_wrote_for_inline_events(sink):
+    baseline, logged = _study_logs()
+    sink.append_snapshot(LATEST_SNAPSHOT)
+    buffer = ExportBuffer(sink, "flat")
+    for i, event in enumerate(logged, start=1):
+        # Refreshed after every event: integer columns turn float once a row lacks them.
+        sink.append(event)
+        buffer.refresh()
+        expected = pd.DataFrame(baseline[:i]).to_csv(index=False).encode("utf-8")
+        assert buffer.csv_bytes() == expected
+        assert buffer.json_bytes() == json.dumps(baseline[:i], indent=2).encode("utf-8")
+    assert b",4.0,5.0," in buffer.csv_bytes()
+
+
+def test_normalized_export_keeps_refs_and_a_snapshots_table(sink):
+    _log_session(sink)
+    buffer = ExportBuffer(sink, "normalized").refresh()
+    events = json.loads(buffer.json_bytes())
+    assert all("risk_score" not in e and "snapshot_ref" in e for e in events)
+    assert buffer.write_snapshot_tables() == 2
+    table = json.loads(buffer.snapshots_json_bytes())
+    assert {row["snapshot_ref"] for row in table} == {e["snapshot_ref"] for e in events}
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.risk.metrics import (
+    downside_semidev,
+    herfindahl_hirschman_index,
+    historical_var_es,
+    max_drawdown,
+    portfolio_returns,
+)
+from src.risk.recommendations import counterfactual_suggestion, recommendation_from_score
+from src.risk.scoring import risk_score
+from src.risk.simulation import get_market_data
+from src.risk.snapshot import compute_risk_snapshot, get_risk_snapshot
+
+
+def _state(weights, **overrides):
+    return {"n_assets": len(weights), "n_periods": 750, "seed": 7, "alpha": 0.05, "weights": np.array(weights), **overrides}
+
+
+def test_snapshot_matches_the_per_tab_pipeline():
+    # What render_dashboard and render_explainability each computed before the snapshot.
+    state = _state([0.1, 0.2, 0.3, 0.4])
+    snapshot = compute_risk_snapshot(state["n_assets"], state["n_periods"], state["seed"], state["alpha"], state["weights"])
+    asset_rets, dates = get_market_data(n_assets=4, n_periods=750, seed=7)
+    port_rets = portfolio_returns(asset_rets, state["weights"])
+    hhi = herfindahl_hirschman_index(state["weights"])
+    sd = downside_semidev(port_rets, mar=0.0)
+    mdd = max_drawdown(port_rets)
+    var, es = historical_var_es(port_rets, alpha=0.05)
+    score = risk_score(hhi, sd, mdd, var, es)
+
+    np.testing.assert_array_equal(snapshot.port_rets, port_rets)
+    np.testing.assert_array_equal(snapshot.equity, np.cumprod(1 + port_rets))
+    assert snapshot.dates.equals(dates)
+    assert (snapshot.hhi, snapshot.semidev, snapshot.mdd, snapshot.var, snapshot.es, snapshot.score) == (
+        hhi, sd, mdd, var, es, score,
+    )
+    assert (snapshot.risk_level, snapshot.machine_action, snapshot.rationale) == recommendation_from_score(score)
+    assert snapshot.counterfactual == counterfactual_suggestion(hhi, sd, mdd, var, es, score)
+
+
+def test_log_fields_match_the_inline_payload():
+    state = _state([0.5, 0.5])
+    snapshot = get_risk_snapshot(state)
+    fields = snapshot.log_fields()
+    assert list(fields) == [
+        "n_assets", "n_periods", "seed", "alpha", "weights", "risk_level", "risk_score", "hhi",
+        "semidev", "mdd", "var", "es", "machine_action", "machine_recommendation_text",
+    ]
+    assert fields["weights"] == [0.5, 0.5]
+    assert fields["risk_score"] == snapshot.score and fields["machine_recommendation_text"] == snapshot.rationale
+
+
+def test_snapshots_are_memoized_on_their_inputs():
+    state = _state([0.25, 0.75])
+    first = get_risk_snapshot(state)
+    assert get_risk_snapshot(_state([0.25, 0.75])) is first
+    assert get_risk_snapshot(_state([0.75, 0.25])) is not first
+    assert get_risk_snapshot(_state([0.25, 0.75], alpha=0.01)) is not first
+    assert first.derived("answer", lambda: 42) == 42
+    assert first.derived("answer", lambda: pytest.fail("derived results are memoized")) == 42
+
+
+def test_snapshot_arrays_are_read_only():
+    snapshot = get_risk_snapshot(_state([0.3, 0.7]))
+    for array in (snapshot.weights, snapshot.port_rets, snapshot.equity):
+        with pytest.raises(ValueError):
+            array[0] = 1.0
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.eval.stats import CHUNK_SIZE, STUDY_METRICS, compare_conditions, comparison_table, metric_samples
+from src.utils.parallel import reset_process_pool
+
+
+def _study_events(n_participants=12, seed=1):
+    rng = np.random.default_rng(seed)
+    events = []
+    for p in range(n_participants):
+        condition = "EXPLANATION_ON" if p < n_participants // 2 else "EXPLANATION_OFF"
+        shift = 1.0 if condition == "EXPLANATION_ON" else 0.0
+        for _ in range(3):
+            trust = int(np.clip(round(4 + shift + rng.normal()), 1, 7))
+            events.append({"event": "decision_submit", "participant_id": p, "condition": condition,
+                           "decision": "ACCEPT" if trust > 4 else "REJECT", "trust_1_7": trust,
+                           "confidence_1_7": int(rng.integers(3, 7))})
+            events.append({"event": "task_timer_stop", "participant_id": p, "condition": condition,
+                           "elapsed_sec": 60 - 10 * shift + 10 * rng.normal()})
+        events.append({"event": "sus_submit", "participant_id": p, "condition": condition,
+                       "sus_score": 65 + 10 * shift + 5 * rng.normal()})
+    return events
+
+
+@pytest.fixture(scope="module")
+def events():
+    return _study_events()
+
+
+def test_metric_samples(events):
+    samples = metric_samples(events)
+    assert set(samples) == set(STUDY_METRICS)
+    assert [len(v) for v in samples["trust"]] == [18, 18]
+    assert [len(v) for v in metric_samples(events, by_participant=True)["trust"]] == [6, 6]
+    on, _ = samples["acceptance"]
+    assert set(np.unique(on)) <= {0.0, 1.0}
+
+
+def test_results_are_reproducible_and_independent_of_workers(events):
+    kwargs = dict(n_permutations=CHUNK_SIZE + 100, n_bootstrap=2 * CHUNK_SIZE + 5, seed=11)
+    one = comparison_table(compare_conditions(events, workers=1, **kwargs))
+    try:
+        two = comparison_table(compare_conditions(events, workers=2, **kwargs))
+    finally:
+        reset_process_pool()
+    pd.testing.assert_frame_equal(one, two)
+    pd.testing.assert_frame_equal(one, comparison_table(compare_conditions(events, workers=1, **kwargs)))
+    assert not one.equals(comparison_table(compare_conditions(events, workers=1, **dict(kwargs, seed=12))))
+
+
+def test_permutation_p_value_matches_a_naive_test(events):
+    result = compare_conditions(events, metrics=["trust"], n_permutations=20000, n_bootstrap=100)
+    a, b = metric_samples(events, metrics=["trust"])["trust"]
+    pooled, observed = np.concatenate([a, b]), a.mean() - b.mean()
+    rng = np.random.default_rng(5)
+    extreme = 0
+    for _ in range(20000):
+        x = rng.permutation(pooled)
+        extreme += abs(x[: len(a)].mean() - x[len(a):].mean()) >= abs(observed) - 1e-12
+    assert result["trust"]["p_value"] == pytest.approx((1 + extreme) / 20001, abs=0.01)
+    stats = result["trust"]
+    assert stats["mean_diff"] == pytest.approx(observed)
+    assert stats["diff_lower"] < stats["mean_diff"] < stats["diff_upper"]
+
+
+def test_counts_must_be_positive(events):
+    with pytest.raises(ValueError):
+        compare_conditions(events, n_permutations=0, n_bootstrap=0)
+    with pytest.raises(ValueError):
+        compare_conditions(events, n_permutations=10, n_bootstrap=0)
+
+
+@pytest.mark.parametrize("column", ["condition", "participant_id", "trust_1_7"])
+def test_missing_columns_give_nan_statistics(events, column):
+    stripped = [{k: v for k, v in e.items() if k != column} for e in events]
+    table = comparison_table(compare_conditions(stripped, metrics=["trust"], n_permutations=10,
+                                                n_bootstrap=10, by_participant=True))
+    assert table.loc["trust", ["n_a", "n_b"]].tolist() == [0, 0]
+    assert np.isnan(table.loc["trust", "p_value"])
+
+
+def test_too_few_values_give_nan_statistics(events):
+    table = comparison_table(compare_conditions(events[:5], n_permutations=10, n_bootstrap=10))
+    assert table["p_value"].isna().all()
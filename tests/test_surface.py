@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src.risk.metrics import (
+    downside_semidev,
+    herfindahl_hirschman_index,
+    historical_var_es,
+    max_drawdown,
+    portfolio_returns,
+)
+from src.risk.recommendations import HIGH_THRESHOLD, MEDIUM_THRESHOLD
+from src.risk.scoring import risk_score
+from src.risk.surface import SURFACE_TOLERANCE, ScoreSurface, lattice_resolution, score_preview
+
+
+def exact_score(asset_returns, weights, alpha=0.05):
+    w = np.asarray(weights, dtype=float)
+    r = portfolio_returns(asset_returns, w)
+    var, es = historical_var_es(r, alpha=alpha)
+    return risk_score(herfindahl_hirschman_index(w), downside_semidev(r, mar=0.0), max_drawdown(r), var, es)
+
+
+@pytest.fixture(scope="module")
+def asset_returns():
+    rng = np.random.default_rng(3)
+    return rng.standard_t(4, size=(800, 3)) * np.array([0.01, 0.02, 0.005])
+
+
+@pytest.fixture(scope="module")
+def surface(asset_returns):
+    s = ScoreSurface(3, lattice_resolution(3))
+    s.compute(asset_returns, 0.05)
+    assert s.error is None
+    return s
+
+
+def test_lookup_is_exact_at_lattice_points(surface, asset_returns):
+    for w in surface.points[::17]:
+        assert surface.lookup(w)["score"] == pytest.approx(exact_score(asset_returns, w), abs=1e-9)
+
+
+def test_lookup_off_grid_is_within_measured_error(surface, asset_returns):
+    weights = np.random.default_rng(1).dirichlet(np.ones(3), size=50)
+    errors = [abs(surface.lookup(w)["score"] - exact_score(asset_returns, w)) for w in weights]
+    assert max(errors) <= 2 * surface.max_error
+    assert surface.max_error <= SURFACE_TOLERANCE
+
+
+def margin(score):
+    return min(abs(score - MEDIUM_THRESHOLD), abs(score - HIGH_THRESHOLD))
+
+
+def test_preview_uses_surface_away_from_thresholds(surface, asset_returns):
+    weights = np.random.default_rng(2).dirichlet(np.ones(3), size=50)
+    w = max(weights, key=lambda w: margin(surface.lookup(w)["score"]))
+    preview = score_preview(surface, w, lambda: pytest.fail("exact score should not be needed"))
+    assert preview["source"] == "surface"
+    assert preview["score"] == pytest.approx(exact_score(asset_returns, w), abs=2 * surface.max_error)
+
+
+def test_preview_falls_back_while_computing():
+    pending = ScoreSurface(3, 4)
+    assert score_preview(pending, [1, 1, 1], lambda: 0.5) == {"score": 0.5, "level": "MEDIUM", "source": "exact"}
+
+
+def test_preview_falls_back_outside_the_simplex_or_tolerance(surface):
+    assert score_preview(surface, [1, 1], lambda: 0.1)["source"] == "exact"
+    assert score_preview(surface, [1, 1, 1], lambda: 0.1, tolerance=0.0)["source"] == "exact"
+
+
+def test_preview_falls_back_near_a_threshold(surface):
+    w = min(surface.points, key=lambda w: margin(surface.lookup(w)["score"]))
+    near = ScoreSurface(3, surface.m)
+    near.values, near.max_error = surface.values, margin(surface.lookup(w)["score"]) + 1e-6
+    near.ready.set()
+    assert score_preview(near, w, lambda: 0.2, tolerance=1.0) == {"score": 0.2, "level": "LOW", "source": "exact"}
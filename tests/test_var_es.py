@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from src.risk.batch import batch_historical_var_es
+from src.risk.metrics import historical_var_es
+from src.risk.sketch import QuantileSketch
+
+
+def _sorted_var_es(returns, alpha):
+    # The full-sort reference the partition-based implementation replaced.
+    r = np.sort(np.asarray(returns))
+    idx = max(0, int(np.floor(alpha * len(r))) - 1)
+    return float(r[idx]), float(np.mean(r[: idx + 1]))
+
+
+@pytest.mark.parametrize("alpha", [0.001, 0.01, 0.05, 0.25])
+@pytest.mark.parametrize("length", [1, 19, 20, 1500])
+def test_partition_var_es_is_bit_identical_to_full_sort(returns, alpha, length):
+    assert historical_var_es(returns[:length], alpha=alpha) == _sorted_var_es(returns[:length], alpha)
+
+
+def test_batch_var_es_is_bit_identical_per_column(returns):
+    matrix = np.column_stack([returns, returns[::-1], np.roll(returns, 7)])
+    var, es = batch_historical_var_es(matrix, alpha=0.05)
+    for k in range(matrix.shape[1]):
+        assert (var[k], es[k]) == historical_var_es(matrix[:, k], alpha=0.05)
+
+
+def test_empty_series_gives_nan():
+    assert all(np.isnan(v) for v in historical_var_es(np.array([])))
+    assert all(np.isnan(v).all() for v in batch_historical_var_es(np.empty((0, 3))))
+
+
+def test_sketch_var_es_within_relative_accuracy(returns):
+    var, es = historical_var_es(returns, alpha=0.05)
+    sketch_var, sketch_es = historical_var_es(returns, alpha=0.05, method="sketch", relative_accuracy=0.01)
+    assert sketch_var == pytest.approx(var, rel=0.01)
+    assert sketch_es == pytest.approx(es, rel=0.01)
+
+
+def test_merged_sketches_match_one_sketch_and_stay_bounded():
+    rng = np.random.default_rng(3)
+    parts = [rng.lognormal(mean, 3, 2000) * rng.choice([-1, 1], 2000) for mean in (0, 5, 10)]
+    merged = QuantileSketch(0.01)
+    for part in parts:
+        merged.merge(QuantileSketch(0.01).update(part))
+    whole = QuantileSketch(0.01).update(np.concatenate(parts))
+    assert merged.count == whole.count
+    assert merged.var_es(0.05) == whole.var_es(0.05)
+
+    capped = QuantileSketch(0.01, max_buckets=50)
+    for part in parts:
+        capped.merge(QuantileSketch(0.01, max_buckets=50).update(part))
+    assert len(capped._pos) <= 50 and len(capped._neg) <= 50
+    assert capped.count == whole.count